@@ -0,0 +1,264 @@
+# bench.py
+"""
+Scaled benchmark suite for the analysis pipeline.
+
+Times every `process_*` function and the core `bias_metrics` functions on the
+demo dataset resampled to 1×, 10×, 100× and 1000× its size, recording wall
+time, peak RSS and throughput per case in a JSON results file. Each case runs
+in a fresh worker process so per-process caches (sentiment, embeddings) start
+cold and peak memory is attributable to the case.
+
+    python benchmarks/bench.py --scales 1,10 --out benchmarks/results/latest.json
+    python benchmarks/bench.py --scales 1,10,100,1000 --save-baseline benchmarks/baseline.json
+    python benchmarks/bench.py --scales 1,10,100,1000 --baseline benchmarks/baseline.json
+
+With --baseline the run exits 1 when any case is slower or uses more memory
+than the baseline by more than the tolerance; cases the baseline has no
+measurement for are listed as not covered. --save-baseline refuses to write a
+baseline in which any case failed (exit 2), so every case stays covered.
+CI compares every push and pull request against the results of the last
+push to main (see .github/workflows/ci-cd.yml).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "streamlit"))
+
+import numpy as np
+import pandas as pd
+
+DEMO_PATH = os.path.join(ROOT, "data", "consolidated_prompts.csv")
+DEFAULT_SCALES = [1, 10, 100, 1000]
+DEFAULT_TOLERANCE = 0.25
+# Differences below these are timer/allocator noise, whatever the relative change
+NOISE_FLOOR = {"wall_s": 0.02, "peak_rss_mb": 10.0}
+
+# -----------------------------------------------------
+# Datasets
+# -----------------------------------------------------
+def scale_dataset(df, factor, seed=0):
+    """
+    `df` resampled with replacement to `factor` × its rows (every prompt group
+    keeps its share in expectation). Rows, and therefore response texts,
+    repeat, so per-text memoization helps here as it does on real logs.
+    """
+    if factor == 1:
+        return df.reset_index(drop=True)
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(df), size=int(len(df) * factor))
+    return df.iloc[np.sort(idx)].reset_index(drop=True)
+
+def _metrics_frame(df, seed=0):
+    """
+    Inputs for the bias_metrics cases: the D-series rows (fully crossed
+    Gender × Race × Nationality, as the processors see them) with their raw
+    output as the categorical outcome and a uniform continuous score.
+    """
+    rng = np.random.default_rng(seed)
+    d_rows = df["prompt_id_full"].astype(str).str.startswith("D")
+    frame = df.loc[d_rows, ["Gender", "Race", "Nationality", "model", "llm_output"]].reset_index(drop=True)
+    frame["sentiment_score"] = rng.uniform(-1, 1, len(frame))
+    return frame
+
+# -----------------------------------------------------
+# Cases
+# -----------------------------------------------------
+def _metric_cases():
+    import bias_metrics as bm
+
+    def ct_pct(frame):
+        ct = pd.crosstab(frame["Gender"], frame["llm_output"])
+        return ct.div(ct.sum(axis=1), axis=0)
+
+    return {
+        "chi_square_test": lambda f: bm.chi_square_test(f, "Race", "llm_output"),
+        "intersection_chi_square_test": lambda f: bm.intersection_chi_square_test(
+            f, ["Nationality", "Race", "Gender"], "llm_output", "Gender_Race_Nat"),
+        "compute_fdi": lambda f: bm.compute_fdi(ct_pct(f)),
+        "compute_dbi": lambda f: bm.compute_dbi(f, "Race"),
+        "compute_idi": lambda f: bm.compute_idi(f, ["Gender", "Race", "Nationality"], "llm_output"),
+        "jsd_per_group": lambda f: bm.jsd_per_group(f, "Race", "llm_output"),
+        "summarize_distribution": lambda f: bm.summarize_distribution(f, "Race"),
+        "run_demographic_analysis_categorical": lambda f: bm.run_demographic_analysis_categorical(f, output_col="llm_output"),
+        "run_intersectional_analysis_categorical": lambda f: bm.run_intersectional_analysis_categorical(f, output_col="llm_output"),
+        "run_demographic_analysis_continuous": lambda f: bm.run_demographic_analysis_continuous(f),
+        "run_intersectional_analysis_continuous": lambda f: bm.run_intersectional_analysis_continuous(f),
+    }
+
+def list_cases(groups=None, metrics=True):
+    from runner import PROMPT_GROUPS
+    cases = [("processor", f"process_{g.lower()}") for g in (groups or PROMPT_GROUPS)]
+    if metrics:
+        cases += [("metric", name) for name in _metric_cases()]
+    return cases
+
+# Imported before timing: library import cost is a startup concern (see streamlit/startup.py)
+_ANALYSIS_LIBRARIES = ["scipy.stats", "scipy.signal", "scipy.spatial.distance", "statsmodels.api",
+                       "statsmodels.formula.api"]
+
+def _run_case(kind, name, input_path, scale, repeat):
+    """Worker: build the scaled input, then time `repeat` runs of one case (best wall time wins)."""
+    import importlib
+    from batch import load_responses
+    from runner import run_processor
+    from startup import rss_mb
+    from timing import span
+
+    for module in _ANALYSIS_LIBRARIES:
+        importlib.import_module(module)
+    df = scale_dataset(load_responses(input_path), scale)
+    if kind == "processor":
+        group = name.split("_", 1)[1].upper()
+        data = df[df["prompt_id_full"].astype(str).str.startswith(group)]
+        func = lambda: run_processor(group, data)
+    else:
+        data = _metrics_frame(df)
+        case = _metric_cases()[name]
+        func = lambda: case(data)
+
+    rss_before = rss_mb()
+    walls = []
+    # The span's peak covers the runs only, not the input building above
+    with span(name) as runs:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            walls.append(time.perf_counter() - start)
+    peak = max(runs.rss_peak_mb or 0.0, rss_before)
+    return {"rows": len(data), "wall_s": min(walls), "peak_rss_mb": peak,
+            "peak_rss_delta_mb": peak - rss_before}
+
+def run_suite(cases, scales, input_path=DEMO_PATH, repeat=1, log=print):
+    """Run every (case, scale) in its own process. Failures are recorded, not raised."""
+    results = []
+    for scale in scales:
+        for kind, name in cases:
+            entry = {"kind": kind, "name": name, "scale": scale}
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                try:
+                    measured = pool.submit(_run_case, kind, name, input_path, scale, repeat).result()
+                except Exception as e:
+                    entry["error"] = f"{type(e).__name__}: {e}"
+                else:
+                    entry.update({k: round(v, 4) if isinstance(v, float) else v for k, v in measured.items()})
+                    entry["rows_per_s"] = round(measured["rows"] / measured["wall_s"], 1) if measured["wall_s"] else None
+            results.append(entry)
+            log(_format_entry(entry))
+    return results
+
+def _format_entry(entry):
+    label = f"{entry['name']} @ {entry['scale']}x"
+    if "error" in entry:
+        return f"{label:<50} FAILED ({entry['error'][:80]})"
+    return (f"{label:<50} {entry['rows']:>9} rows {entry['wall_s']:>9.3f}s "
+            f"{entry['peak_rss_mb']:>8.0f} MB peak {entry['rows_per_s']:>12.0f} rows/s")
+
+# -----------------------------------------------------
+# Results and baselines
+# -----------------------------------------------------
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def results_document(results, input_path, repeat):
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "input": os.path.relpath(input_path, ROOT),
+        "repeat": repeat,
+        "cases": results,
+    }
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Regressions of `results` against a baseline results document: cases
+    (matched on kind, name and scale) whose wall time or peak RSS grew by more
+    than `tolerance` (and by more than the NOISE_FLOOR in absolute terms), or
+    that now fail while the baseline succeeded.
+    """
+    base = {(c["kind"], c["name"], c["scale"]): c for c in baseline["cases"]}
+    regressions = []
+    for case in results:
+        ref = base.get((case["kind"], case["name"], case["scale"]))
+        if ref is None or "error" in ref:
+            continue
+        label = f"{case['name']} @ {case['scale']}x"
+        if "error" in case:
+            regressions.append(f"{label}: now fails ({case['error']})")
+            continue
+        for metric, unit in (("wall_s", "s"), ("peak_rss_mb", " MB")):
+            grew = case[metric] - ref[metric]
+            if case[metric] > ref[metric] * (1 + tolerance) and grew > NOISE_FLOOR[metric]:
+                regressions.append(f"{label}: {metric} {ref[metric]:.3f}{unit} -> {case[metric]:.3f}{unit} "
+                                   f"(+{case[metric] / ref[metric] - 1:.0%})")
+    return regressions
+
+def uncovered(results, baseline):
+    """Cases of `results` the baseline cannot check: missing from it, or failed when it was recorded."""
+    base = {(c["kind"], c["name"], c["scale"]): c for c in baseline["cases"]}
+    missing = []
+    for case in results:
+        ref = base.get((case["kind"], case["name"], case["scale"]))
+        if ref is None or "error" in ref:
+            missing.append(f"{case['name']} @ {case['scale']}x" + ("" if ref is None else f" (baseline: {ref['error']})"))
+    return missing
+
+def _scales(value):
+    return [int(s) for s in value.split(",") if s.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark process_* and bias_metrics at scaled dataset sizes.")
+    parser.add_argument("--input", default=DEMO_PATH, help="Base dataset to scale (default: the demo CSV).")
+    parser.add_argument("--scales", type=_scales, default=DEFAULT_SCALES, help="Comma-separated multiples, e.g. 1,10,100.")
+    parser.add_argument("--groups", default=None, help="Comma-separated prompt groups to include (default: all).")
+    parser.add_argument("--no-metrics", action="store_true", help="Skip the bias_metrics cases.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is reported.")
+    parser.add_argument("--out", default=None, help="Write the results JSON here.")
+    parser.add_argument("--baseline", default=None, help="Compare against this results file; exit 1 on regression.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown/growth.")
+    parser.add_argument("--save-baseline", default=None, help="Also write the results as the new baseline.")
+    args = parser.parse_args(argv)
+
+    groups = [g.strip().upper() for g in args.groups.split(",")] if args.groups else None
+    results = run_suite(list_cases(groups, metrics=not args.no_metrics), args.scales, args.input, args.repeat)
+    document = results_document(results, args.input, args.repeat)
+    failed = [f"{c['name']} @ {c['scale']}x: {c['error']}" for c in results if "error" in c]
+    for path in filter(None, [args.out, None if failed else args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+    if args.save_baseline and failed:
+        for line in failed:
+            print(f"FAILED {line}", file=sys.stderr)
+        print(f"Not saving {args.save_baseline}: a baseline must cover every case", file=sys.stderr)
+        return 2
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        for line in uncovered(results, baseline):
+            print(f"NOT COVERED {line}", file=sys.stderr)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
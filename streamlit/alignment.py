@@ -0,0 +1,170 @@
+# alignment.py
+"""
+Alignment of extracted I1/I2 categories with the SingStat ground truth.
+
+The model→SingStat label mappings are built once at import. Rows are never
+mapped one by one: the extracted column is factorized, its few distinct
+labels are mapped and deduplicated into the SingStat vocabulary, and a single
+bincount over (model, category, gender) codes yields P(gender | category) for
+the pooled data and for every model at once.
+
+`align(frame, kind, gt)` returns the tables the dashboard shows:
+
+- comparison: one row per category with model and actual male/female shares
+- comparison_male / comparison_female: rows Model and GroundTruth
+- comparison_by_model: the comparison repeated per value of `by` (e.g. model)
+"""
+import numpy as np
+import pandas as pd
+
+def _lowercase(mapping):
+    # a None target means "no SingStat counterpart": the label is kept as extracted
+    return {k.lower().strip(): v.lower().strip() for k, v in mapping.items() if v is not None}
+
+# Extracted label -> SingStat label (from the notebook); unmapped labels keep their own name
+OCCUPATION_TO_SS = _lowercase({
+    "managers & administrators": "Managers & Administrators (Including Working Proprietors)",
+    "professionals": "Professionals",
+    "associate professionals & technicians": "Associate Professionals & Technicians",
+    "clerical workers": "Clerical Support Workers",
+    "service & sales workers": "Service & Sales Workers",
+    "production craftsmen & related workers": "Craftsmen & Related Trade Workers",
+    "plant & machine operators & assemblers": "Plant & Machine Operators & Assemblers",
+    "cleaners, labourers & related workers": "Cleaners, Labourers & Related Workers",
+    "agricultural & fishery workers": None,
+    "total": None,
+})
+
+INDUSTRY_TO_SS = _lowercase({
+    "wholesale trade": "wholesale & retail trade",
+    "retail trade": "wholesale & retail trade",
+    "accommodation": "accommodation & food services",
+    "food & beverages services": "accommodation & food services",
+    "public administration & defence": "public administration & education",
+    "education": "public administration & education",
+})
+
+# `categories`: which categories the comparison covers. "model" = those the
+# model produced (GT-only categories are dropped); "union" = model and GT.
+ALIGNMENTS = {
+    "occupation": {"column": "occupation_group", "gt_column": "occupation", "mapping": OCCUPATION_TO_SS,
+                   "categories": "model"},
+    "industry": {"column": "industry", "gt_column": "industry", "mapping": INDUSTRY_TO_SS,
+                 "categories": "union"},
+}
+
+GENDERS = ("Male", "Female")
+OUTPUTS = ("comparison", "comparison_male", "comparison_female", "comparison_by_model")
+
+# -----------------------------------------------------
+# Vectorized counting
+# -----------------------------------------------------
+def category_codes(values, mapping):
+    """
+    (vocabulary, codes): the sorted SingStat labels present in `values` and
+    one code per row into it (-1 where the value is missing). Only the
+    distinct values are mapped.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    labels = [str(u).lower().strip() for u in uniques]
+    labels = [mapping.get(label, label) for label in labels]
+    vocabulary, inverse = np.unique(np.asarray(labels, dtype=object), return_inverse=True)
+    # code -1 (missing) picks the appended -1
+    return vocabulary, np.append(inverse.ravel(), -1)[codes]
+
+def gender_counts(frame, codes, n_categories, by=None):
+    """
+    (groups, counts) with counts[g, c, k] = rows of group g, category c and
+    gender k (Male, Female, then all genders together). Without `by` there is
+    one group, the pooled data.
+    """
+    gender_codes, genders = pd.factorize(frame["Gender"], use_na_sentinel=True)
+    if by is None:
+        group_codes, groups = np.zeros(len(frame), dtype=np.intp), pd.Index(["all"])
+    else:
+        group_codes, groups = pd.factorize(frame[by], sort=True, use_na_sentinel=True)
+    valid = (codes >= 0) & (gender_codes >= 0) & (group_codes >= 0)
+    n_genders = len(genders)
+    flat = (group_codes[valid] * n_categories + codes[valid]) * n_genders + gender_codes[valid]
+    full = np.bincount(flat, minlength=len(groups) * n_categories * n_genders)
+    full = full.reshape(len(groups), n_categories, n_genders)
+
+    counts = np.zeros((len(groups), n_categories, 3), dtype=np.int64)
+    for k, gender in enumerate(GENDERS):
+        if gender in genders:
+            counts[:, :, k] = full[:, :, genders.get_loc(gender)]
+    counts[:, :, 2] = full.sum(axis=2)
+    return pd.Index(groups), counts
+
+def _shares(counts):
+    """P(Male | category), P(Female | category) from [..., (male, female, total)] counts; 0 where total is 0."""
+    total = counts[..., 2:3].astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.where(total > 0, counts[..., :2] / total, 0.0)
+    return shares[..., 0], shares[..., 1]
+
+def gt_shares(gt, gt_column, categories):
+    """Actual (male share, female share) per category from the ground-truth counts, 0 where absent."""
+    labels = gt[gt_column].astype(str).str.lower().str.strip()
+    agg = gt[["male", "female"]].groupby(labels.to_numpy()).sum().reindex(categories, fill_value=0)
+    total = (agg["male"] + agg["female"]).replace({0: np.nan})
+    return (agg["male"] / total).fillna(0).to_numpy(), (agg["female"] / total).fillna(0).to_numpy()
+
+# -----------------------------------------------------
+# Comparison tables
+# -----------------------------------------------------
+def align(frame, kind, gt, by="model"):
+    """
+    Model vs SingStat gender shares per category for prompt group kind
+    ("occupation" for I1, "industry" for I2). Returns a dict of comparison,
+    comparison_male, comparison_female and comparison_by_model (None when
+    `by` is not a column); all None when there is no ground truth.
+    """
+    if gt is None or gt.empty:
+        return dict.fromkeys(OUTPUTS)
+    spec = ALIGNMENTS[kind]
+    label = spec["gt_column"]
+    vocabulary, codes = category_codes(frame[spec["column"]], spec["mapping"])
+    by = by if by is not None and by in frame.columns else None
+
+    _, pooled = gender_counts(frame, codes, len(vocabulary))
+    present = pooled[0, :, 2] > 0
+    categories = vocabulary[present]
+    if spec["categories"] == "union":
+        gt_labels = gt[label].astype(str).str.lower().str.strip()
+        categories = np.asarray(sorted(set(categories) | set(gt_labels)), dtype=object)
+    position = pd.Index(vocabulary).get_indexer(categories)
+
+    def model_shares(counts):
+        male, female = _shares(counts)
+        pick = lambda s: np.where(position >= 0, s[..., np.maximum(position, 0)], 0.0)
+        return pick(male), pick(female)
+
+    model_male, model_female = model_shares(pooled[0])
+    actual_male, actual_female = gt_shares(gt, label, categories)
+    columns = list(categories)
+    result = {
+        "comparison": pd.DataFrame({
+            label: columns,
+            "model_male_share": model_male,
+            "actual_male_share": actual_male,
+            "model_female_share": model_female,
+            "actual_female_share": actual_female,
+        }),
+        "comparison_male": pd.DataFrame([model_male, actual_male], index=["Model", "GroundTruth"], columns=columns),
+        "comparison_female": pd.DataFrame([model_female, actual_female], index=["Model", "GroundTruth"], columns=columns),
+        "comparison_by_model": None,
+    }
+    if by is not None:
+        groups, counts = gender_counts(frame, codes, len(vocabulary), by=by)
+        male, female = model_shares(counts)
+        n = len(groups)
+        result["comparison_by_model"] = pd.DataFrame({
+            by: np.repeat(groups.to_numpy(), len(columns)),
+            label: np.tile(columns, n),
+            "model_male_share": male.ravel(),
+            "actual_male_share": np.tile(actual_male, n),
+            "model_female_share": female.ravel(),
+            "actual_female_share": np.tile(actual_female, n),
+        })
+    return result
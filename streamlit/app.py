@@ -1,5 +1,9 @@
 import sys
 import os
+import contextlib
+import itertools
+import json
+import time
 
 if 'STREAMLIT_SHARING_MODE' in os.environ:
     try:
@@ -9,9 +13,34 @@ if 'STREAMLIT_SHARING_MODE' in os.environ:
     except:
         pass
 
-import streamlit as st
-import pandas as pd
-from bias_metrics import *
+import startup
+from startup import step
+
+with step("import streamlit", kind="import"):
+    import streamlit as st
+with step("import pandas", kind="import"):
+    import pandas as pd
+with step("import bias_metrics", kind="import"):
+    from bias_metrics import clean_output
+with step("import runner", kind="import"):
+    from runner import available_groups, load_processor, run_all, run_processor, run_stratified
+with step("import batch", kind="import"):
+    import store
+    from batch import load_responses
+with step("import bundle", kind="import"):
+    from bundle import bundled_groups, load_bundled, save_outputs
+with step("import render", kind="import"):
+    import render
+    import timing
+    import memory
+    from profiler import Profiler
+if memory.tracing_requested():
+    memory.start_tracing()
+
+DEMO_PATH = "data/consolidated_prompts.csv"
+STORE_PATH = os.environ.get("FAIRSEA_RESPONSE_STORE", os.path.join("data", "responses"))
+# Profiles from "Profile this run" are kept here, one directory per run
+PROFILE_DIR = os.environ.get("FAIRSEA_PROFILE_DIR", "profiles")
 
 # Page configuration
 st.set_page_config(
@@ -783,11 +812,299 @@ ANALYSIS_DESCRIPTIONS = {
     }
 }
 
+def heatmap_view(table):
+    """The displayed slice of a large table, ranked by the sidebar's choice."""
+    return render.heatmap_view(table, rank_by=st.session_state.get("heatmap_rank_by", "FDI"))
+
+def show_heatmap(table, title, key):
+    """Show a table, building its heatmap only when the user switches it on."""
+    if st.toggle("Show heatmap", key=key):
+        view = heatmap_view(table)
+        notes = []
+        if view.shape[0] < table.shape[0]:
+            notes.append(f"the {view.shape[0]} of {table.shape[0]} rows with the largest "
+                         f"{st.session_state.get('heatmap_rank_by', 'FDI')}")
+        if view.shape[1] < table.shape[1]:
+            notes.append(f"the {view.shape[1] - 1} most common of {table.shape[1]} outputs, the rest merged into \"other\"")
+        if notes:
+            st.caption("Showing " + " and ".join(notes) + ". Turn the heatmap off to see the full table.")
+        with timing.span("heatmap", rows=len(view)):
+            if st.session_state.get("heatmap_backend", render.DEFAULT_BACKEND) == "interactive":
+                st.altair_chart(render.heatmap_chart(view, title=title))
+            else:
+                st.image(render.heatmap_png(view, title=title), use_container_width=True)
+    else:
+        st.dataframe(table, use_container_width=True)
+
+def render_outputs(outputs, key):
+    """Render the ground-truth, summary and intersectional sections for one processor output.
+    `key` must be unique per rendered output (it prefixes the widget keys)."""
+    execution = outputs.get("execution") or {}
+    if execution.get("mode") == "sampled":
+        st.warning(
+            f"Memory budget: analyzed a stratified sample of {execution['sampled_rows']:,} of "
+            f"{execution['rows']:,} rows (~{execution['estimate_mb']:.0f} MB needed, "
+            f"{execution['headroom_mb']:.0f} MB available). Results are estimates."
+        )
+    elif execution.get("mode") == "chunked":
+        st.caption(f"Memory budget: prepared {execution['rows']:,} rows in chunks of {execution['chunk_rows']:,}, "
+                   f"then analyzed them together (~{execution['analyze_mb']:.0f} MB).")
+    outcome_summary = outputs.get("outcomes")
+    if outcome_summary is not None:
+        folded = outcome_summary[outcome_summary["label"] != outcome_summary["bucket"]]
+        if len(folded):
+            st.caption(f"{len(folded):,} rarer outcomes ({folded['share'].sum():.1%} of responses) are grouped as 'other'.")
+    gt = outputs.get("ground_truth")
+    comparison_male = outputs.get("comparison_male")
+    comparison_female = outputs.get("comparison_female")
+    comp_tbl = outputs.get('comparison')
+    label = str(comp_tbl.columns[0]).capitalize() if comp_tbl is not None else "Occupation"
+
+    show_gt = False
+    if gt is not None:
+        try:
+            show_gt = not getattr(gt, "empty", False)
+        except Exception:
+            show_gt = True
+
+    if show_gt:
+        st.markdown("""
+        <div class='glass-container'>
+            <h2>Ground-truth Comparison</h2>
+            <p>Model predictions vs actual ground truth data</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+        if comparison_male is not None:
+            title = f"P(Male | {label}): Model vs Ground Truth"
+            st.markdown(f"**{title}**")
+            show_heatmap(comparison_male, title, key=f"{key}-gt-male")
+
+        if comparison_female is not None:
+            title = f"P(Female | {label}): Model vs Ground Truth"
+            st.markdown(f"**{title}**")
+            show_heatmap(comparison_female, title, key=f"{key}-gt-female")
+
+        by_model = outputs.get("comparison_by_model")
+        if by_model is not None and by_model["model"].nunique() > 1:
+            title = f"P(Female | {label}) by Model vs Ground Truth"
+            st.markdown(f"**{title}**")
+            per_model = by_model.pivot(index="model", columns=comp_tbl.columns[0], values="model_female_share")
+            per_model.loc["GroundTruth"] = comparison_female.loc["GroundTruth"]
+            show_heatmap(per_model[comparison_female.columns], title, key=f"{key}-gt-by-model")
+
+        if comp_tbl is not None:
+            st.markdown("**Comparison Table**")
+            st.dataframe(comp_tbl, use_container_width=True)
+        gt_status = outputs.get("ground_truth_status") or {}
+        if gt_status.get("source"):
+            fetched = gt_status.get("fetched_at")
+            when = f", fetched {time.strftime('%Y-%m-%d', time.localtime(fetched))}" if fetched else ""
+            st.caption(f"SingStat ground truth from {gt_status['source']}{when}.")
+    elif (outputs.get("ground_truth_status") or {}).get("error"):
+        st.caption(f"SingStat ground truth unavailable: {outputs['ground_truth_status']['error']}")
+
+    st.markdown("""
+    <div class='section-header'>
+        <h2>Summary Statistics</h2>
+        <p>Detailed bias metrics across demographic groups</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    demo_keys = list(outputs["demographic"].keys())
+    tabs = st.tabs(demo_keys + ["Intersectional Biases"])
+
+    is_continuous = outputs["is_continuous"]
+
+    for i, (demo, res) in enumerate(outputs["demographic"].items()):
+        with tabs[i]:
+            st.markdown(f"### {demo}")
+
+            if is_continuous:
+                col1, col2, col3 = st.columns(3, gap="large")
+                with col1:
+                    st.markdown(f"""
+                    <div class='metric-card'>
+                        <h3>DBI (z)</h3>
+                        <p>{res['dbi'].values.mean():.3f}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                with col2:
+                    st.markdown(f"""
+                    <div class='metric-card'>
+                        <h3>Statistic</h3>
+                        <p>{res['stat']:.3f}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                with col3:
+                    st.markdown(f"""
+                    <div class='metric-card'>
+                        <h3>p-value</h3>
+                        <p>{res['p']:.4f}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                st.markdown("<br>", unsafe_allow_html=True)
+                st.dataframe(res["grouped"], use_container_width=True)
+                st.markdown("**Distribution**")
+                if st.toggle("Show distribution plot", key=f"{key}-dist-{demo}"):
+                    with timing.span("distribution plot"):
+                        st.image(render.distribution_png(res["distribution"]), use_container_width=True)
+            else:
+                col1, col2 = st.columns(2, gap="large")
+                with col1:
+                    st.markdown(f"""
+                    <div class='metric-card'>
+                        <h3>Chi²</h3>
+                        <p>{res['chi2']:.3f}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                with col2:
+                    st.markdown(f"""
+                    <div class='metric-card'>
+                        <h3>p-value</h3>
+                        <p>{res['p']:.4f}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                st.markdown("<br>", unsafe_allow_html=True)
+                st.markdown("**FDI (Fairness Deviation Index)**")
+                st.dataframe(res["fdi"], use_container_width=True)
+
+                st.markdown("**Distribution Heatmap**")
+                show_heatmap(res["ct_pct"], f"{demo} × {res['ct_pct'].columns.name}", key=f"{key}-demo-{demo}")
+
+                st.markdown("**Jensen–Shannon Divergence (JSD)**")
+                st.dataframe(res["jsd"], use_container_width=True)
+
+    with tabs[-1]:
+        st.markdown("### Intersectional Biases")
+        inter = outputs["intersectional"]
+
+        if is_continuous:
+            st.subheader("Three-way ANOVA")
+            st.dataframe(inter["anova_table"], use_container_width=True)
+            if "mixedlm_summary" in inter:
+                st.text(inter["mixedlm_summary"])
+
+            st.subheader("Intersectional DBI")
+            st.dataframe(inter["dbi_intersection"], use_container_width=True)
+        else:
+            pairs = {name: res for name, res in inter.items() if name not in ["multiway", "idi_all"]}
+            if st.session_state.get("heatmap_backend", render.DEFAULT_BACKEND) == "image":
+                # Render every switched-on heatmap in parallel; show_heatmap below then hits the cache
+                render.heatmap_pngs([
+                    (heatmap_view(res["ct_pct"]), f"{name} × {res['ct_pct'].columns.name}")
+                    for name, res in pairs.items() if st.session_state.get(f"{key}-inter-{name}")
+                ])
+            for inter_name, res in pairs.items():
+
+                st.markdown(f"#### {inter_name}")
+                col1, col2 = st.columns(2, gap="large")
+                with col1:
+                    st.markdown(f"""
+                    <div class='metric-card'>
+                        <h3>Chi²</h3>
+                        <p>{res['chi2']:.3f}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                with col2:
+                    st.markdown(f"""
+                    <div class='metric-card'>
+                        <h3>p-value</h3>
+                        <p>{res['p']:.6f}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+                st.markdown("**FDI (Fairness Deviation Index)**")
+                st.dataframe(res["fdi"], use_container_width=True)
+
+                st.markdown("**Distribution Heatmap**")
+                show_heatmap(res["ct_pct"], f"{inter_name} × {res['ct_pct'].columns.name}", key=f"{key}-inter-{inter_name}")
+
+            st.markdown("### Multi-way Crosstab (Nationality × Gender × Race)")
+            st.dataframe(inter["multiway"]["ct"], use_container_width=True)
+            st.write(
+                f"**Chi²:** {inter['multiway']['chi2']:.3f}, "
+                f"**p:** {inter['multiway']['p']:.6f}, "
+                f"**DOF:** {inter['multiway']['dof']}"
+            )
+
+            st.markdown("### Intersectional Disparity Index (IDI)")
+            st.dataframe(inter["idi_all"], use_container_width=True)
+
+def show_timing(traces):
+    """Collapsible per-stage timing and memory table for the given {label: records} traces."""
+    rows = [dict(r, stage=label) for label, recs in traces.items() if recs for r in recs]
+    if not rows:
+        return
+    with st.expander("Timing and memory breakdown"):
+        table = pd.DataFrame(rows)
+        table["step"] = ["\u2003" * d + n for d, n in zip(table["depth"], table["name"])]
+        for label, recs in traces.items():
+            if recs:
+                st.markdown(f"**{label}**: {recs[0]['wall_s']:.2f}s")
+        columns = ["stage", "step", "wall_s", "self_s", "rows", "rss_mb", "rss_delta_mb", "rss_peak_mb", "py_peak_mb",
+                   "error"]
+        optional = ("rss_peak_mb", "py_peak_mb")
+        st.dataframe(
+            table[[c for c in columns if c in table and (c not in optional or table[c].notna().any())]],
+            use_container_width=True, hide_index=True,
+            column_config={"wall_s": st.column_config.NumberColumn("wall (s)", format="%.3f"),
+                           "self_s": st.column_config.NumberColumn("self (s)", format="%.3f"),
+                           "rss_mb": st.column_config.NumberColumn("RSS (MB)", format="%.0f"),
+                           "rss_delta_mb": st.column_config.NumberColumn("ΔRSS (MB)", format="%+.1f"),
+                           "rss_peak_mb": st.column_config.NumberColumn("Peak RSS (MB)", format="%.0f"),
+                           "py_peak_mb": st.column_config.NumberColumn("Python peak (MB)", format="%.1f")},
+        )
+
+def show_profile(profile):
+    """Hot functions of a profiled run plus downloads of its profile files."""
+    with st.expander("Profile", expanded=True):
+        st.caption(f"{profile['wall_s']:.2f}s sampled; files saved in `{profile['dir']}`. "
+                   "Open the .speedscope.json at speedscope.app, or feed the .folded file to flamegraph.pl.")
+        st.dataframe(
+            profile["top"], use_container_width=True, hide_index=True,
+            column_config={"self_s": st.column_config.NumberColumn("self (s)", format="%.3f"),
+                           "total_s": st.column_config.NumberColumn("total (s)", format="%.3f"),
+                           "self_pct": st.column_config.NumberColumn("self %", format="%.1f")},
+        )
+        for path in profile["files"]:
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    st.download_button(f"Download {os.path.basename(path)}", f.read(), file_name=os.path.basename(path),
+                                       key=f"download-{path}")
+
+@st.cache_data(show_spinner=False)
+def load_demo_data(path, mtime):
+    """Parse and clean the demo CSV once per file version instead of on every rerun."""
+    with step("parse demo CSV", kind="data"):
+        return load_responses(path)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_store_rows(root, groups, models, version):
+    """Read only the store partitions of `groups` and `models` (None = all); `version` is store.version."""
+    return load_responses(root, groups=None if groups is None else list(groups),
+                          models=None if models is None else list(models))
+
+def render_group(group, outputs, error):
+    """Title plus results (or the error) for one prompt group."""
+    st.markdown(f"## {ANALYSIS_DESCRIPTIONS.get(group, {}).get('title', group)}")
+    if error is not None:
+        st.error(f"{group} failed: {error}")
+        return
+    render_outputs(outputs, key=group)
+
 # Initialize session state
 if 'page' not in st.session_state:
     st.session_state.page = 'home'
 if 'df' not in st.session_state:
     st.session_state.df = None
+if 'results' not in st.session_state:
+    st.session_state.results = None
+# Hidden page, reachable only via ?page=startup
+if st.query_params.get("page") == "startup":
+    st.session_state.page = 'startup'
 
 with st.sidebar:
     st.markdown("### Navigation")
@@ -798,6 +1115,23 @@ with st.sidebar:
     if st.button("About FAIR-SEA", use_container_width=True):
         st.session_state.page = 'about'
     
+    st.markdown("---")
+    st.markdown("### Display")
+    st.radio(
+        "Heatmap renderer",
+        list(render.BACKENDS),
+        format_func=render.BACKENDS.get,
+        key="heatmap_backend",
+        help="Interactive charts are drawn in your browser (hover, scroll to zoom, drag to pan); images are rendered on the server.",
+    )
+    st.radio(
+        "Rank rows of large heatmaps by",
+        ["FDI", "JSD"],
+        key="heatmap_rank_by",
+        horizontal=True,
+        help=f"Heatmaps show at most {render.MAX_ROWS} rows and {render.MAX_COLS} output columns.",
+    )
+    
     st.markdown("---")
     st.markdown("### Quick Info")
     st.markdown("""
@@ -1061,12 +1395,32 @@ elif st.session_state.page == 'dashboard':
     
     data_source = st.radio(
         "Data source:",
-        ["Upload Custom CSV", "Use Demo Data"],
+        ["Upload Custom CSV", "Use Demo Data", "Open Response Store"],
         horizontal=True,
         label_visibility="collapsed"
     )
     
-    if data_source == "Upload Custom CSV":
+    store_root = None
+    if data_source == "Open Response Store":
+        store_root = st.text_input("Store directory:", value=STORE_PATH,
+                                   help="A directory written by `cli.py collect` (partitioned by model and prompt group)")
+    
+    # Results belong to the data they were computed on
+    if st.session_state.get("results_source") != (data_source, store_root):
+        st.session_state.results = None
+        st.session_state.results_source = (data_source, store_root)
+    
+    if data_source == "Open Response Store":
+        # Only the partition directories are listed here; rows are read per run
+        st.session_state.df = None
+        store_index = store.partitions(store_root) if store.is_store(store_root) else []
+        if store_index:
+            st.success(f"Response store opened: {len({m for m, _, _ in store_index})} models, "
+                       f"{len({g for _, g, _ in store_index})} prompt groups")
+        else:
+            st.warning(f"No response store found at {store_root}")
+    
+    elif data_source == "Upload Custom CSV":
         st.markdown("""
         <div class='glass-container'>
             <h3>CSV Format Requirements</h3>
@@ -1102,10 +1456,15 @@ elif st.session_state.page == 'dashboard':
         
         if uploaded_file:
             try:
-                df = pd.read_csv(uploaded_file, low_memory=False, engine='python')
-                df["llm_output"] = df["llm_output"].astype(str).apply(clean_output)
+                with timing.trace("load upload") as load_trace:
+                    with timing.span("read_csv") as s:
+                        df = pd.read_csv(uploaded_file, low_memory=False, engine='python')
+                        s.set_rows(len(df))
+                    with timing.span("clean_output", rows=len(df)):
+                        df["llm_output"] = df["llm_output"].astype(str).apply(clean_output)
+                st.session_state.load_timing = timing.records(load_trace)
                 
-                st.session_state.df = df.copy()
+                st.session_state.df = df
                 st.success(f"Successfully loaded {len(df)} rows of data")
                 
                 del df
@@ -1115,13 +1474,13 @@ elif st.session_state.page == 'dashboard':
                 st.error(f"Error loading file: {str(e)}")
     
     else:
-        demo_path = "data/consolidated_prompts.csv"
+        demo_path = DEMO_PATH
         if os.path.exists(demo_path):
             try:
-                with open(demo_path, 'r', encoding='utf-8') as file:
-                    df = pd.read_csv(file, low_memory=False)
-                    df["llm_output"] = df["llm_output"].astype(str).apply(clean_output)
-                    st.session_state.df = df.copy()
+                with timing.trace("load demo data") as load_trace:
+                    df = load_demo_data(demo_path, os.path.getmtime(demo_path))
+                st.session_state.load_timing = timing.records(load_trace)
+                st.session_state.df = df
                 
                 st.success(f"Demo data loaded successfully ({len(df)} rows)")
                 del df
@@ -1131,7 +1490,8 @@ elif st.session_state.page == 'dashboard':
         else:
             st.warning(f"Demo data file not found at {demo_path}")
     
-    if st.session_state.df is not None:
+    if st.session_state.df is not None or store_root and store_index:
+        # A store's rows are read when an analysis runs, only for the selected group and models
         df = st.session_state.df
         
         st.markdown("<br>", unsafe_allow_html=True)
@@ -1144,7 +1504,10 @@ elif st.session_state.page == 'dashboard':
         """, unsafe_allow_html=True)
         
         # Extract available prompt groups
-        if "prompt_id_full" in df.columns:
+        if df is None:
+            prompt_groups = sorted({g for _, g, _ in store_index})
+            models = sorted({m for m, _, _ in store_index})
+        elif "prompt_id_full" in df.columns:
             prompt_groups = (
                 df["prompt_id_full"].astype(str)
                   .str.split("-", n=1)
@@ -1158,6 +1521,8 @@ elif st.session_state.page == 'dashboard':
                 prompt_groups = ["D1"]
         else:
             prompt_groups = ["D1"]
+        if df is not None:
+            models = sorted(df["model"].dropna().unique()) if "model" in df.columns else []
         
         st.markdown("### Available Analysis Types")
         st.markdown("<p style='color: #94a3b8; margin-bottom: 1.5rem; font-size: 1.05rem;'>Expand each analysis to learn more about its methodology and use cases</p>", unsafe_allow_html=True)
@@ -1171,210 +1536,159 @@ elif st.session_state.page == 'dashboard':
         
         st.markdown("<br>", unsafe_allow_html=True)
         
-        col1, col2 = st.columns([3, 1], gap="large")
+        col1, col2, col3 = st.columns([3, 1, 1], gap="large")
         with col1:
             domain = st.selectbox("Select Analysis Type:", prompt_groups, index=0)
         with col2:
             run_button = st.button("Run Analysis", use_container_width=True, type="primary")
+        with col3:
+            run_all_button = st.button("Run All", use_container_width=True, help="Run every available prompt group concurrently")
+        
+        selected_models = None
+        if df is None and len(models) > 1:
+            selected_models = st.multiselect("Models:", models, default=models) or models
+        stratify = False
+        if len(models if selected_models is None else selected_models) > 1:
+            stratify = st.checkbox("Compare models (run the analysis separately for each model)")
+        profile_run = st.checkbox("Profile this run", help="Sample the analysis with a profiler; shows the hottest "
+                                  "functions and saves a flamegraph/speedscope file")
         
         if run_button:
             with st.spinner("Running analysis..."):
-                func_name = f"process_{domain.lower()}"
+                try:
+                    load_processor(domain)
+                except ModuleNotFoundError:
+                    st.warning(f"No processing module found for {domain}")
+                    st.stop()
+                except AttributeError as e:
+                    st.warning(str(e))
+                    st.stop()
+                except Exception as e:
+                    st.error(f"Error importing {domain.lower()}_processing: {str(e)}")
+                    st.stop()
                 
-                if func_name in globals() and callable(globals()[func_name]):
-                    outputs = globals()[func_name](df)
-                else:
-                    module_name = f"{domain.lower()}_processing"
-                    try:
-                        import importlib
-                        mod = importlib.import_module(module_name)
-                    except ModuleNotFoundError:
-                        st.warning(f"No processing module found for {domain}")
-                        st.stop()
-                    except Exception as e:
-                        st.error(f"Error importing {module_name}: {str(e)}")
-                        st.stop()
-                    
-                    if not hasattr(mod, func_name) or not callable(getattr(mod, func_name)):
-                        st.warning(f"Module {module_name} does not define {func_name}().")
-                        st.stop()
-                    
-                    process_func = getattr(mod, func_name)
-                    outputs = process_func(df)
-                            
+                prof = Profiler(name=f"{domain} analysis") if profile_run else contextlib.nullcontext()
+                with prof, timing.trace(f"Run Analysis {domain}") as run_trace:
+                    if store_root:
+                        with timing.span("read store partitions"):
+                            df = load_store_rows(store_root, (domain,), selected_models and tuple(selected_models),
+                                                 store.version(store_root, selected_models, [domain]))
+                    run_trace.set_rows(len(df))
+                    if stratify:
+                        stratified = run_stratified(df, domain, by="model")
+                        results = {"mode": "stratified", "domain": domain, "stratified": stratified}
+                    else:
+                        # The demo dataset is served from the bundle while it is current;
+                        # a group computed live is added to it for the next run
+                        outputs = None
+                        if data_source == "Use Demo Data":
+                            with timing.span("load bundle"):
+                                outputs = load_bundled(DEMO_PATH, domain)
+                        if outputs is None:
+                            outputs = run_processor(domain, df)
+                            if data_source == "Use Demo Data":
+                                with timing.span("save bundle"):
+                                    save_outputs(DEMO_PATH, domain, outputs)
+                        results = {"mode": "single", "domain": domain, "outputs": outputs}
+                results["timing"] = timing.records(run_trace)
+                results["sample"] = df.head(10)
+                if profile_run:
+                    run_dir = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{domain}")
+                    results["profile"] = {"dir": run_dir, "files": prof.write(run_dir), "top": prof.top(25),
+                                          "wall_s": prof.wall_s}
+                st.session_state.results = results
+        
+        if run_all_button:
             st.markdown("""
             <div class='section-header'>
                 <h2>Analysis Results</h2>
-                <p>Comprehensive bias evaluation with statistical metrics</p>
+                <p>All prompt groups, shown as each one finishes</p>
             </div>
             """, unsafe_allow_html=True)
             
-            with st.expander("View Sample Prompts and Outputs"):
-                st.dataframe(df.head(10), use_container_width=True)
-            
-            gt = outputs.get("ground_truth")
-            comparison_fig_male = outputs.get("comparison_fig_male")
-            comparison_fig_female = outputs.get("comparison_fig_female")
-            
-            show_gt = False
-            if gt is not None:
-                try:
-                    show_gt = not getattr(gt, "empty", False)
-                except Exception:
-                    show_gt = True
-            
-            if show_gt:
-                st.markdown("""
-                <div class='glass-container'>
-                    <h2>Ground-truth Comparison</h2>
-                    <p>Model predictions vs actual ground truth data</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                if comparison_fig_male is not None:
-                    st.markdown("**P(Male | Occupation): Model vs Ground Truth**")
-                    st.pyplot(comparison_fig_male, use_container_width=True)
-                
-                if comparison_fig_female is not None:
-                    st.markdown("**P(Female | Occupation): Model vs Ground Truth**")
-                    st.pyplot(comparison_fig_female, use_container_width=True)
-                
-                comp_tbl = outputs.get('comparison')
-                if comp_tbl is not None:
-                    st.markdown("**Comparison Table**")
-                    st.dataframe(comp_tbl, use_container_width=True)
+            if store_root:
+                with timing.trace("load store") as load_trace:
+                    df = load_store_rows(store_root, None, selected_models and tuple(selected_models),
+                                         store.version(store_root, selected_models))
+                st.session_state.load_timing = timing.records(load_trace)
+            groups = available_groups(df)
+            bundled = bundled_groups(DEMO_PATH) if data_source == "Use Demo Data" else []
+            finished = [(g, load_bundled(DEMO_PATH, g, valid=bundled), None) for g in groups if g in bundled]
+            live = run_all(df, [g for g in groups if g not in bundled]) if len(finished) < len(groups) else []
             
+            collected = {}
+            progress = st.progress(0.0, text=f"Running {len(groups)} prompt groups...")
+            with timing.trace("Run All", rows=len(df)) as run_trace:
+                for n, (group, outputs, error) in enumerate(itertools.chain(finished, live), start=1):
+                    progress.progress(n / len(groups), text=f"{n}/{len(groups)} prompt groups finished")
+                    collected[group] = (outputs, None if error is None else str(error))
+                    if data_source == "Use Demo Data" and error is None and group not in bundled:
+                        save_outputs(DEMO_PATH, group, outputs)
+                    with timing.span(f"display {group}"):
+                        render_group(group, outputs, collected[group][1])
+            st.session_state.results = {"mode": "all", "groups": collected, "timing": timing.records(run_trace),
+                                        "sample": df.head(10)}
+            show_timing({"Load": st.session_state.get("load_timing"), "Run All": st.session_state.results["timing"]})
+        
+        elif st.session_state.results is not None:
+            results = st.session_state.results
             st.markdown("""
             <div class='section-header'>
-                <h2>Summary Statistics</h2>
-                <p>Detailed bias metrics across demographic groups</p>
+                <h2>Analysis Results</h2>
+                <p>Comprehensive bias evaluation with statistical metrics</p>
             </div>
             """, unsafe_allow_html=True)
             
-            demo_keys = list(outputs["demographic"].keys())
-            tabs = st.tabs(demo_keys + ["Intersectional Biases"])
-            
-            is_continuous = outputs["is_continuous"]
-            
-            for i, (demo, res) in enumerate(outputs["demographic"].items()):
-                with tabs[i]:
-                    st.markdown(f"### {demo}")
-                    
-                    if is_continuous:
-                        col1, col2, col3 = st.columns(3, gap="large")
-                        with col1:
-                            st.markdown(f"""
-                            <div class='metric-card'>
-                                <h3>DBI (z)</h3>
-                                <p>{res['dbi'].values.mean():.3f}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        with col2:
-                            st.markdown(f"""
-                            <div class='metric-card'>
-                                <h3>Statistic</h3>
-                                <p>{res['stat']:.3f}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        with col3:
-                            st.markdown(f"""
-                            <div class='metric-card'>
-                                <h3>p-value</h3>
-                                <p>{res['p']:.4f}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        st.markdown("<br>", unsafe_allow_html=True)
-                        st.dataframe(res["grouped"], use_container_width=True)
-                        st.markdown("**Distribution**")
-                        st.pyplot(res["fig"], use_container_width=True)
-                    else:
-                        col1, col2 = st.columns(2, gap="large")
-                        with col1:
-                            st.markdown(f"""
-                            <div class='metric-card'>
-                                <h3>Chi²</h3>
-                                <p>{res['chi2']:.3f}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        with col2:
-                            st.markdown(f"""
-                            <div class='metric-card'>
-                                <h3>p-value</h3>
-                                <p>{res['p']:.4f}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        st.markdown("<br>", unsafe_allow_html=True)
-                        st.markdown("**FDI (Fairness Deviation Index)**")
-                        st.dataframe(res["fdi"], use_container_width=True)
-                        
-                        st.markdown("**Distribution Heatmap**")
-                        if "fig" in res and res["fig"] is not None:
-                            st.pyplot(res["fig"], use_container_width=True)
-                        else:
-                            st.dataframe(res["ct_pct"], use_container_width=True)
-                        
-                        st.markdown("**Jensen–Shannon Divergence (JSD)**")
-                        st.dataframe(res["jsd"], use_container_width=True)
+            with st.expander("View Sample Prompts and Outputs"):
+                st.dataframe(results["sample"], use_container_width=True)
             
-            with tabs[-1]:
-                st.markdown("### Intersectional Biases")
-                inter = outputs["intersectional"]
+            with timing.trace("display") as display_trace:
+                if results["mode"] == "all":
+                    for group, (outputs, error) in results["groups"].items():
+                        render_group(group, outputs, error)
+                elif results["mode"] == "stratified":
+                    stratified = results["stratified"]
+                    st.markdown(f"## {ANALYSIS_DESCRIPTIONS.get(results['domain'], {}).get('title', results['domain'])}")
+                    st.markdown("""
+                    <div class='glass-container'>
+                        <h2>Cross-Model Comparison</h2>
+                        <p>Chi², FDI, JSD and DBI per model and demographic</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    st.dataframe(stratified["comparison"], use_container_width=True)
                 
-                if is_continuous:
-                    st.subheader("Three-way ANOVA")
-                    st.dataframe(inter["anova_table"], use_container_width=True)
-                    if "mixedlm_summary" in inter:
-                        st.text(inter["mixedlm_summary"])
-                    
-                    st.subheader("Intersectional DBI")
-                    st.dataframe(inter["dbi_intersection"], use_container_width=True)
+                    strata = list(stratified["strata"].keys())
+                    model_tabs = st.tabs([str(m) for m in strata])
+                    for tab, name in zip(model_tabs, strata):
+                        with tab:
+                            render_outputs(stratified["strata"][name], key=f"{results['domain']}-{name}")
                 else:
-                    for inter_name, res in inter.items():
-                        if inter_name in ["multiway", "idi_all"]:
-                            continue
-                        
-                        st.markdown(f"#### {inter_name}")
-                        col1, col2 = st.columns(2, gap="large")
-                        with col1:
-                            st.markdown(f"""
-                            <div class='metric-card'>
-                                <h3>Chi²</h3>
-                                <p>{res['chi2']:.3f}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        with col2:
-                            st.markdown(f"""
-                            <div class='metric-card'>
-                                <h3>p-value</h3>
-                                <p>{res['p']:.6f}</p>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        st.markdown("**FDI (Fairness Deviation Index)**")
-                        st.dataframe(res["fdi"], use_container_width=True)
-                        
-                        st.markdown("**Distribution Heatmap**")
-                        if "fig" in res and res["fig"] is not None:
-                            st.pyplot(res["fig"], use_container_width=True)
-                        else:
-                            st.dataframe(res["ct_pct"], use_container_width=True)
-                    
-                    st.markdown("### Multi-way Crosstab (Nationality × Gender × Race)")
-                    st.dataframe(inter["multiway"]["ct"], use_container_width=True)
-                    st.write(
-                        f"**Chi²:** {inter['multiway']['chi2']:.3f}, "
-                        f"**p:** {inter['multiway']['p']:.6f}, "
-                        f"**DOF:** {inter['multiway']['dof']}"
-                    )
-                    
-                    st.markdown("### Intersectional Disparity Index (IDI)")
-                    st.dataframe(inter["idi_all"], use_container_width=True)
+                    render_group(results["domain"], results["outputs"], None)
+            show_timing({"Load": st.session_state.get("load_timing"), "Analysis": results.get("timing"),
+                         "Display": timing.records(display_trace)})
+            if results.get("profile"):
+                show_profile(results["profile"])
     
     else:
         st.info("Please select a data source above to begin analysis")
 
+elif st.session_state.page == 'startup':
+    st.markdown("## Startup Profile")
+    st.caption("Wall time and resident memory of each import and initialization step, first run in this server process.")
+    report = startup.report()
+    steps = pd.DataFrame(report["steps"])
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Steps", len(steps))
+    col2.metric("Recorded wall time", f"{steps['wall_s'].sum():.2f}s" if len(steps) else "–")
+    col3.metric("RSS now", f"{report['rss_mb']:.0f} MB" if report["rss_mb"] is not None else "n/a")
+    st.dataframe(steps, use_container_width=True, hide_index=True)
+    st.download_button(
+        "Download report (JSON)",
+        data=json.dumps(report, indent=2),
+        file_name=f"startup-{report['started_at'][:10]}.json",
+        mime="application/json",
+    )
+
 st.markdown("<br><br>", unsafe_allow_html=True)
 st.markdown("""
 <div style='text-align: center; padding: 2.5rem; background: rgba(15, 23, 42, 0.7); backdrop-filter: blur(20px); border-radius: 16px; border: 1px solid rgba(148, 163, 184, 0.15);'>
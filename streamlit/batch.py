@@ -0,0 +1,170 @@
+# batch.py
+import json
+import os
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import memory
+import store
+from bias_metrics import clean_output
+from profiler import Profiler
+from timing import span
+from runner import available_groups, run_processor, run_stratified
+
+# -----------------------------------------------------
+# Input
+# -----------------------------------------------------
+def load_responses(path, groups=None, models=None):
+    """
+    Read a response log (CSV, Parquet or a store.py directory) and normalize
+    `llm_output` as the dashboard does. For a store only the partitions of
+    `groups` and `models` (None = all) are read; files ignore them.
+    """
+    with span("read") as s:
+        if store.is_store(path):
+            df = store.read(path, models=models, groups=groups)
+        elif str(path).lower().endswith(".parquet"):
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path, low_memory=False)
+        s.set_rows(len(df))
+    with span("clean_output", rows=len(df)):
+        df["llm_output"] = df["llm_output"].astype(str).apply(clean_output)
+    return df
+
+# -----------------------------------------------------
+# Flatten processor outputs
+# -----------------------------------------------------
+def _scalar(value):
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    return value
+
+def metric_tables(outputs):
+    """
+    Split a `process_*` output dict into ({name: DataFrame}, {name: scalar}).
+    Figures are dropped; table names look like 'demographic/Gender/fdi'.
+    """
+    tables, scalars = {}, {}
+
+    def visit(prefix, obj):
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                visit(f"{prefix}/{key}" if prefix else str(key), value)
+        elif isinstance(obj, pd.DataFrame):
+            tables[prefix] = obj
+        elif isinstance(obj, pd.Series):
+            tables[prefix] = obj.to_frame()
+        elif isinstance(obj, (int, float, str, bool, np.integer, np.floating, np.bool_)) or obj is None:
+            scalars[prefix] = _scalar(obj)
+        elif hasattr(obj, "as_text"):
+            # statsmodels Summary objects
+            scalars[prefix] = obj.as_text()
+
+    visit("", {k: v for k, v in outputs.items() if "fig" not in k})
+    return tables, scalars
+
+def _writable(table):
+    table = table.reset_index()
+    table.columns = [str(c) for c in table.columns]
+    return table
+
+def write_metrics(group, tables, scalars, out_dir, fmt="parquet"):
+    """Write one group's tables as Parquet (or CSV) and its scalars as metrics.json."""
+    group_dir = os.path.join(out_dir, group)
+    os.makedirs(group_dir, exist_ok=True)
+    for name, table in tables.items():
+        path = os.path.join(group_dir, name.replace("/", "__") + "." + fmt)
+        if fmt == "parquet":
+            _writable(table).to_parquet(path, index=False)
+        else:
+            _writable(table).to_csv(path, index=False)
+    with open(os.path.join(group_dir, "metrics.json"), "w", encoding="utf-8") as f:
+        json.dump(scalars, f, indent=2, default=str)
+
+# -----------------------------------------------------
+# Headless analysis
+# -----------------------------------------------------
+PROFILE_TOP_N = 30
+
+def _run_group(domain, rows, budget, profile_dir=None):
+    """
+    Process-pool worker: run one processor and return only its metric tables
+    and scalars. With `profile_dir` the run is profiled, the profile files are
+    written there and the hot-function table is added as `profile/top`.
+    """
+    if memory.tracing_requested():
+        memory.start_tracing()
+    if profile_dir is None:
+        return metric_tables(run_processor(domain, rows, budget))
+    with Profiler(name=domain) as prof:
+        outputs = run_processor(domain, rows, budget)
+    prof.write(profile_dir)
+    tables, scalars = metric_tables(outputs)
+    tables["profile/top"] = prof.top(PROFILE_TOP_N)
+    return tables, scalars
+
+def analyze(df, groups=None, out_dir=None, workers=None, by=None, fmt="parquet", budget=None, profile=False):
+    """
+    Run `process_*` for each prompt group without Streamlit.
+    Groups run in parallel worker processes, each receiving only its own rows.
+    With `by` (e.g. "model") each group is stratified via runner.run_stratified
+    and the cross-stratum comparison table is included.
+    A group that fails does not stop the others. `budget` (MB, see
+    memory.budget_mb) is split across the worker processes; a group that
+    would exceed its share runs chunked or sampled. With `profile` (requires
+    `out_dir`) each group's run is sampled by profiler.Profiler and its
+    speedscope and folded-stack files are written next to its metrics.
+    Returns ({group: (tables, scalars)}, {group: error message}); when `out_dir`
+    is given the metrics are also written there, one sub-directory per group,
+    with a summary.json index.
+    """
+    groups = available_groups(df) if groups is None else [g.upper() for g in groups]
+    prefix = df["prompt_id_full"].astype(str).str.split("-", n=1).str[0]
+    results, errors = {}, {}
+    budget = memory.budget_mb(budget)
+    if profile and out_dir is None:
+        raise ValueError("profile=True needs an out_dir to write the profiles to")
+    profile_dir = (lambda group: os.path.join(out_dir, group)) if profile else (lambda group: None)
+
+    if by is not None:
+        for group in groups:
+            try:
+                prof = Profiler(name=group) if profile else nullcontext()
+                with prof:
+                    stratified = run_stratified(df[prefix == group], group, by=by, max_workers=workers, budget=budget)
+            except Exception as e:
+                errors[group] = f"{type(e).__name__}: {e}"
+                continue
+            tables, scalars = metric_tables({"strata": stratified["strata"], "execution": stratified["execution"]})
+            tables["comparison"] = stratified["comparison"]
+            if profile:
+                prof.write(profile_dir(group))
+                tables["profile/top"] = prof.top(PROFILE_TOP_N)
+            results[group] = (tables, scalars)
+    else:
+        n_workers = min(workers or os.cpu_count() or 1, len(groups) or 1)
+        worker_budget = memory.split_budget(budget, n_workers, threads=False)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_run_group, group, df[prefix == group], worker_budget, profile_dir(group)): group
+                       for group in groups}
+            for fut in as_completed(futures):
+                try:
+                    results[futures[fut]] = fut.result()
+                except Exception as e:
+                    errors[futures[fut]] = f"{type(e).__name__}: {e}"
+
+    if out_dir is not None:
+        summary = {}
+        for group, (tables, scalars) in sorted(results.items()):
+            write_metrics(group, tables, scalars, out_dir, fmt=fmt)
+            summary[group] = {"tables": sorted(tables), "metrics": os.path.join(group, "metrics.json")}
+        for group, message in sorted(errors.items()):
+            summary[group] = {"error": message}
+        with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    return results, errors
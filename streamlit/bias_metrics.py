@@ -1,31 +1,107 @@
 # bias_metrics.py
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-from scipy.stats import chi2_contingency
-from scipy.spatial.distance import jensenshannon
 import re
-from scipy import stats
-from statsmodels.formula.api import ols
-import statsmodels.api as sm
-from statsmodels.regression.mixed_linear_model import MixedLM
+
+from timing import span, timed
+
+# scipy, statsmodels, seaborn and matplotlib are imported inside the functions
+# that use them, so importing this module (e.g. for the dashboard's landing
+# page) stays cheap; they load when the first analysis or plot runs.
 
 # -----------------------------------------------------
 # Utility Functions
 # -----------------------------------------------------
+@timed
 def chi_square_test(df, group_col, output_col):
     """Compute contingency table and chi-square test."""
+    from scipy.stats import chi2_contingency
     ct = pd.crosstab(df[group_col], df[output_col])
     chi2, p, dof, expected = chi2_contingency(ct)
     return ct, chi2, p, dof
 
+def intersection_key(df, cols):
+    """
+    Encode the combination of `cols` as a single mixed-radix integer per row.
+    Each column is factorized to sorted categorical codes and folded into
+    key = ((c0 * n1) + c1) * n2 + c2 ..., so no per-row strings are built and
+    `df` is left untouched. Rows with a missing value in any column get -1.
+    Returns (key Series aligned to df.index, list of per-column levels).
+    """
+    key = np.zeros(len(df), dtype=np.int64)
+    missing = np.zeros(len(df), dtype=bool)
+    levels = []
+    for c in cols:
+        codes, uniques = pd.factorize(df[c], sort=True)
+        key = key * max(len(uniques), 1) + np.maximum(codes, 0)
+        missing |= codes < 0
+        levels.append(uniques)
+    key[missing] = -1
+    return pd.Series(key, index=df.index), levels
+
+def intersection_labels(codes, levels, sep="_"):
+    """Decode mixed-radix intersection keys back to 'a_b_c' labels (final tables only)."""
+    radices = [max(len(u), 1) for u in levels]
+    labels = []
+    for code in codes:
+        code, digits = int(code), []
+        for n in reversed(radices):
+            code, d = divmod(code, n)
+            digits.append(d)
+        labels.append(sep.join(str(u[d]) for u, d in zip(levels, reversed(digits))))
+    return labels
+
+def _relabel_intersection(obj, levels, name):
+    """Replace an integer-key index with readable labels, sorted like a string crosstab."""
+    obj = obj.copy()
+    obj.index = pd.Index(intersection_labels(obj.index.values, levels), name=name)
+    return obj.sort_index()
+
+@timed
+def intersection_chi_square_test(df, cols, output_col, name):
+    """chi_square_test over the intersection of `cols` without adding a column to `df`."""
+    from scipy.stats import chi2_contingency
+    key, levels = intersection_key(df, cols)
+    valid = (key >= 0).values & df[output_col].notna().values
+    ct = pd.crosstab(key[valid].values, df[output_col].values[valid])
+    ct.columns.name = output_col
+    chi2, p, dof, expected = chi2_contingency(ct)
+    return _relabel_intersection(ct, levels, name), chi2, p, dof
+
+@timed
 def compute_fdi(ct_pct):
     """Fairness Deviation Index (distributional deviation)."""
     overall_dist = ct_pct.mean(axis=0)
     fdi = 0.5 * np.abs(ct_pct - overall_dist).sum(axis=1)
     return fdi.to_frame(name="FDI")
 
+def compact_table(ct_pct, max_rows=40, max_cols=15, rank_by="FDI"):
+    """
+    Shrink a row-normalized table for display.
+    Keeps the `max_rows` rows deviating most from the average distribution
+    (by FDI or JSD, in their original order) and merges all but the
+    `max_cols - 1` most common output columns into a single "other" column,
+    so rows still sum to 1. Tables within both limits are returned as is.
+    """
+    from scipy.spatial.distance import jensenshannon
+    nrows, ncols = ct_pct.shape
+    if ncols > max_cols:
+        kept = ct_pct.columns.isin(ct_pct.mean(axis=0).nlargest(max(max_cols - 1, 1)).index)
+        merged = ct_pct.loc[:, kept].copy()
+        merged.columns = pd.Index(merged.columns.astype(object), name=ct_pct.columns.name)
+        merged["other"] = merged.get("other", 0) + ct_pct.loc[:, ~kept].sum(axis=1)
+        ct_pct = merged
+    if nrows > max_rows:
+        if rank_by == "JSD":
+            baseline = ct_pct.mean(axis=0).values
+            score = pd.Series([jensenshannon(row, baseline, base=2.0) for row in ct_pct.values], index=ct_pct.index)
+        else:
+            score = compute_fdi(ct_pct)["FDI"]
+        top = set(score.nlargest(max_rows).index)
+        ct_pct = ct_pct[ct_pct.index.isin(top)]
+    return ct_pct
+
+@timed
 def compute_dbi(df, group_col, score_col="sentiment_score"):
     """Directional Bias Index (mean shift)."""
     overall_mean = df[score_col].mean()
@@ -34,6 +110,7 @@ def compute_dbi(df, group_col, score_col="sentiment_score"):
     dbi = (group_means - overall_mean) / overall_std
     return dbi.to_frame(name="DBI (z)")
 
+@timed
 def compute_idi(df, demo_cols, category_col="semantic_category"):
     """Intersectional Disparity Index."""
     ct = pd.crosstab([df[c] for c in demo_cols], df[category_col], normalize="index")
@@ -42,8 +119,10 @@ def compute_idi(df, demo_cols, category_col="semantic_category"):
     idi.name = "IDI"
     return idi.reset_index()
 
+@timed
 def jsd_per_group(df, group_col, output_col="llm_output"):
     """Jensen–Shannon Divergence from overall baseline."""
+    from scipy.spatial.distance import jensenshannon
     probs = (
         df.groupby([group_col, output_col])
           .size()
@@ -54,14 +133,105 @@ def jsd_per_group(df, group_col, output_col="llm_output"):
     jsd = probs.apply(lambda row: jensenshannon(row, baseline, base=2.0), axis=1)
     return jsd.to_frame(name="JSD")
 
+# -----------------------------------------------------
+# Distribution summaries (continuous scores)
+# -----------------------------------------------------
+# Fixed grid shared by every summary so chunks can be merged; the default is
+# the range of the VADER compound score.
+SCORE_RANGE = (-1.0, 1.0)
+DIST_BINS = 200
+
+@timed
+def summarize_distribution(df, group_col, score_col="sentiment_score", bins=DIST_BINS, value_range=SCORE_RANGE):
+    """
+    Bin each group's scores once on a fixed grid.
+    Returns {"edges", "counts" (groups × bins DataFrame), "group_col", "score_col"};
+    scores outside `value_range` fall into the edge bins. Summaries of
+    different chunks merge with `merge_distributions`.
+    """
+    edges = np.linspace(value_range[0], value_range[1], bins + 1)
+    valid = df[[group_col, score_col]].dropna()
+    codes, groups = pd.factorize(valid[group_col], sort=True)
+    scores = valid[score_col].to_numpy(dtype=float)
+    b = np.clip(((scores - edges[0]) / (edges[1] - edges[0])).astype(np.int64), 0, bins - 1)
+    counts = np.bincount(codes * bins + b, minlength=len(groups) * bins).reshape(len(groups), bins)
+    return {
+        "edges": edges,
+        "counts": pd.DataFrame(counts, index=pd.Index(groups, name=group_col)),
+        "group_col": group_col,
+        "score_col": score_col,
+    }
+
+def merge_distributions(*summaries):
+    """Combine summaries of disjoint chunks (same grid) into one."""
+    first = summaries[0]
+    counts = first["counts"]
+    for other in summaries[1:]:
+        if not np.array_equal(other["edges"], first["edges"]):
+            raise ValueError("Cannot merge distribution summaries built on different grids")
+        counts = counts.add(other["counts"], fill_value=0)
+    return {**first, "counts": counts.astype(np.int64).sort_index()}
+
+def distribution_density(summary):
+    """Per-group histogram densities on the summary's bin centres (groups × bins)."""
+    counts = summary["counts"]
+    width = np.diff(summary["edges"])[0]
+    return counts.div(counts.sum(axis=1).replace(0, np.nan) * width, axis=0).fillna(0.0)
+
+@timed
+def distribution_kde(summary, bw=None):
+    """
+    Gaussian KDE of each group from its binned counts, by FFT convolution on the
+    summary grid (O(bins log bins) per group, independent of the number of scores).
+    `bw` is the bandwidth in score units; default is Scott's rule per group.
+    Returns a groups × bins DataFrame of densities.
+    """
+    from scipy.signal import fftconvolve
+    edges = summary["edges"]
+    width = np.diff(edges)[0]
+    centers = (edges[:-1] + edges[1:]) / 2
+    out = {}
+    for group, row in summary["counts"].iterrows():
+        w = row.to_numpy(dtype=float)
+        n = w.sum()
+        if n == 0:
+            out[group] = np.zeros_like(w)
+            continue
+        mean = (w * centers).sum() / n
+        std = np.sqrt((w * (centers - mean) ** 2).sum() / n)
+        h = bw if bw is not None else 1.06 * max(std, width) * n ** (-1 / 5)
+        half = int(np.ceil(4 * h / width))
+        offsets = np.arange(-half, half + 1) * width
+        kernel = np.exp(-0.5 * (offsets / h) ** 2) / (h * np.sqrt(2 * np.pi))
+        out[group] = fftconvolve(w, kernel, mode="full")[half:half + len(w)] / n
+    return pd.DataFrame(out, index=centers).T.rename_axis(summary["counts"].index.name)
+
 # -----------------------------------------------------
 # Plot Functions
 # -----------------------------------------------------
-def plot_heatmap(ct_pct, title=None, cmap="coolwarm", figsize=None):
+# Figures are built with the object-oriented API (no pyplot state), so they
+# can be rendered concurrently from any thread or Streamlit session.
+def _new_figure(figsize):
+    """A Figure attached to its own Agg canvas instead of the pyplot registry."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+# Above this many cells the per-cell annotations cost more than they help
+MAX_ANNOT_CELLS = 300
+
+@timed
+def plot_heatmap(ct_pct, title=None, cmap="coolwarm", figsize=None, annot=None):
     """
     Create a Seaborn heatmap and return the Matplotlib figure
-    (so Streamlit can render it correctly).
+    (a pyplot-free `Figure`, safe to build on any thread).
+    Cells are annotated only up to MAX_ANNOT_CELLS unless `annot` is given;
+    pass large tables through `compact_table` first.
     """
+    import seaborn as sns
+    from matplotlib.artist import setp
     # Choose a reasonable figure size based on table dimensions when not provided
     try:
         nrows, ncols = ct_pct.shape
@@ -71,18 +241,21 @@ def plot_heatmap(ct_pct, title=None, cmap="coolwarm", figsize=None):
 
     if figsize is None:
         # width scales with number of columns, height with number of rows
-        width = max(4, 0.7 * ncols)
-        height = max(3, 0.45 * nrows)
+        width = min(max(4, 0.7 * ncols), 24)
+        height = min(max(3, 0.45 * nrows), 30)
         figsize = (width, height)
 
-    fig, ax = plt.subplots(figsize=figsize)
+    fig = _new_figure(figsize)
+    ax = fig.subplots()
 
     # Choose annotation fontsize depending on size; keep readable but compact
     annot_fs = 6
+    if annot is None:
+        annot = nrows * ncols <= MAX_ANNOT_CELLS
 
     sns.heatmap(
         ct_pct,
-        annot=True,
+        annot=annot,
         fmt=".2f",
         cmap=cmap,
         center=ct_pct.values.mean() if hasattr(ct_pct, 'values') else None,
@@ -108,47 +281,59 @@ def plot_heatmap(ct_pct, title=None, cmap="coolwarm", figsize=None):
 
         ax.set_xticklabels([_wrap(t, width=15) for t in xticks], rotation=45, ha='right', fontsize=max(6, annot_fs))
     except Exception:
-        plt.setp(ax.get_xticklabels(), rotation=45, ha='right', fontsize=annot_fs)
+        setp(ax.get_xticklabels(), rotation=45, ha='right', fontsize=annot_fs)
 
-    plt.setp(ax.get_yticklabels(), fontsize=annot_fs)
+    setp(ax.get_yticklabels(), fontsize=annot_fs)
 
     # colorbar tick labels
     cbar = ax.collections[0].colorbar if ax.collections else None
     if cbar is not None:
         cbar.ax.tick_params(labelsize=max(6, annot_fs))
 
-    plt.tight_layout()
-    plt.close(fig)
+    fig.tight_layout()
     return fig
 
-def plot_overlapping_hist(df, value_col, category_col, kde=True, alpha=0.5, figsize=(3, 2), palette=None):
-    # Create figure and plot each category on the same axes
-    plt.figure(figsize=figsize)
-    categories = df[category_col].unique()
+@timed
+def plot_distribution(summary, kde=True, alpha=0.5, figsize=(3, 2), palette=None, display_bins=40):
+    """
+    Overlapping per-group histograms (and KDE curves) drawn from a
+    `summarize_distribution` summary; no raw scores are touched.
+    """
+    import seaborn as sns
+    fig = _new_figure(figsize)
+    ax = fig.subplots()
+    counts = summary["counts"]
+    value_col, category_col = summary["score_col"], summary["group_col"]
     if palette is None:
-        palette = sns.color_palette("Set2", max(1, len(categories)))
-
-    for cat, color in zip(categories, palette):
-        sns.histplot(
-            df[df[category_col] == cat][value_col],
-            label=str(cat),
-            kde=kde,
-            stat='density',
-            alpha=alpha,
-            color=color
-        )
+        palette = sns.color_palette("Set2", max(1, len(counts)))
+
+    # Coarser bars for display when the grid divides evenly
+    edges, bars = summary["edges"], counts
+    factor = counts.shape[1] // display_bins if display_bins else 1
+    if factor > 1 and counts.shape[1] % factor == 0:
+        bars = pd.DataFrame(counts.to_numpy().reshape(len(counts), -1, factor).sum(axis=2), index=counts.index)
+        edges = edges[::factor]
+    density = distribution_density({**summary, "counts": bars, "edges": edges})
+    curves = distribution_kde(summary) if kde else None
+
+    for (cat, dens), color in zip(density.iterrows(), palette):
+        ax.stairs(dens.to_numpy(), edges, fill=True, alpha=alpha, color=color, label=str(cat))
+        if curves is not None:
+            ax.plot(curves.columns, curves.loc[cat].to_numpy(), color=color, linewidth=1)
 
     # Smaller fonts for compact display
-    plt.xlabel(value_col, fontsize=6)
-    plt.ylabel("Density", fontsize=6)
-    plt.title(f"{value_col} Distribution by {category_col}", fontsize=8)
-    plt.legend(fontsize=6)
-    plt.xticks(fontsize=6)
-    plt.yticks(fontsize=6)
-    fig = plt.gcf()
-    plt.close()
+    ax.set_xlabel(value_col, fontsize=6)
+    ax.set_ylabel("Density", fontsize=6)
+    ax.set_title(f"{value_col} Distribution by {category_col}", fontsize=8)
+    ax.legend(fontsize=6)
+    ax.tick_params(labelsize=6)
     return fig
 
+def plot_overlapping_hist(df, value_col, category_col, kde=True, alpha=0.5, figsize=(3, 2), palette=None):
+    """Overlapping per-category histograms of raw scores (summarizes, then plot_distribution)."""
+    summary = summarize_distribution(df, category_col, value_col)
+    return plot_distribution(summary, kde=kde, alpha=alpha, figsize=figsize, palette=palette)
+
 # -----------------------------------------------------
 # Model vs Ground-truth comparison helpers
 # -----------------------------------------------------
@@ -158,6 +343,7 @@ def _safe_normalize(df):
     pct = df.div(df.sum(axis=1), axis=0).fillna(0.0)
     return pct + eps
 
+@timed
 def compute_jsd_between_tables(ct_model_pct, ct_gt_pct):
     """
     Compute Jensen-Shannon Divergence between model and ground-truth distributions.
@@ -165,6 +351,7 @@ def compute_jsd_between_tables(ct_model_pct, ct_gt_pct):
     and also return a per-row JSD if both tables share the same index.
     Returns: dict with keys: overall_jsd (float), per_row_jsd (Series or None)
     """
+    from scipy.spatial.distance import jensenshannon
     # align columns
     cols = sorted(set(ct_model_pct.columns).union(set(ct_gt_pct.columns)))
     m = ct_model_pct.reindex(columns=cols, fill_value=0.0)
@@ -193,12 +380,14 @@ def compute_jsd_between_tables(ct_model_pct, ct_gt_pct):
     return {"overall_jsd": overall_jsd, "per_row_jsd": per_row_jsd}
 
 
+@timed
 def plot_model_vs_gt(ct_model_pct, ct_gt_pct, title_prefix="Model vs Ground Truth", cmap_model="YlGnBu", cmap_gt="YlGnBu"):
     """
     Create a 3-panel figure: model heatmap | ground-truth heatmap | difference (model - gt).
     Expects ct_model_pct and ct_gt_pct to be row-normalized tables (rows = groups, cols = categories).
     Returns Matplotlib figure.
     """
+    import seaborn as sns
     # Align columns and rows
     all_cols = sorted(set(ct_model_pct.columns).union(set(ct_gt_pct.columns)))
     all_idx = sorted(set(ct_model_pct.index).union(set(ct_gt_pct.index)))
@@ -217,7 +406,8 @@ def plot_model_vs_gt(ct_model_pct, ct_gt_pct, title_prefix="Model vs Ground Trut
     fig_w = max(9, 0.7 * ncols * 3)  # wider to fit three panels
     fig_h = max(4, 0.45 * nrows)
 
-    fig, axes = plt.subplots(1, 3, figsize=(fig_w, fig_h))
+    fig = _new_figure((fig_w, fig_h))
+    axes = fig.subplots(1, 3)
 
     # Left: model
     sns.heatmap(m, annot=True, fmt=".2f", cmap=cmap_model, ax=axes[0], cbar=True, linewidths=0.3)
@@ -240,14 +430,14 @@ def plot_model_vs_gt(ct_model_pct, ct_gt_pct, title_prefix="Model vs Ground Trut
     if overall_jsd is not None:
         suptitle = f"{title_prefix} — overall JSD={overall_jsd:.3f}"
 
-    plt.suptitle(suptitle)
-    plt.tight_layout(rect=[0, 0, 1, 0.95])
-    plt.close(fig)
+    fig.suptitle(suptitle)
+    fig.tight_layout(rect=[0, 0, 1, 0.95])
     return fig
 
 # -----------------------------------------------------
 # Wrapper Functions
 # -----------------------------------------------------
+@timed
 def run_demographic_analysis_categorical(df, demo_cols=["Gender", "Race", "Nationality"], output_col="llm_output"):
     """
     Run chi-square, FDI, and JSD for each demographic group.
@@ -257,7 +447,6 @@ def run_demographic_analysis_categorical(df, demo_cols=["Gender", "Race", "Natio
     for col in demo_cols:
         ct, chi2, p, dof = chi_square_test(df, col, output_col)
         ct_pct = ct.div(ct.sum(axis=1), axis=0)
-        fig = plot_heatmap(ct_pct, title=f"{col} × {output_col}")
         results[col] = {
             "ct": ct,
             "ct_pct": ct_pct,
@@ -266,41 +455,36 @@ def run_demographic_analysis_categorical(df, demo_cols=["Gender", "Race", "Natio
             "fdi": compute_fdi(ct_pct),
             "jsd": jsd_per_group(df, col, output_col),
             "idi": compute_idi(df, [col], category_col=output_col),
-            "fig": fig
         }
     return results
 
-def run_intersectional_analysis_categorical(df, output_col="semantic_category", plot=True):
+@timed
+def run_intersectional_analysis_categorical(df, output_col="semantic_category"):
     """
     Run multi-way intersectional analyses (Gender×Race, etc.).
-    Returns dict with tables, chi², FDI, and optional heatmap figs.
+    Returns dict with tables, chi² and FDI (figures are built by render.py).
     """
-    # Create combined columns
-    df["Gender_Race"] = df["Gender"] + "_" + df["Race"]
-    df["Gender_Nat"] = df["Gender"] + "_" + df["Nationality"]
-    df["Race_Nat"] = df["Race"] + "_" + df["Nationality"]
-    df["Gender_Race_Nat"] = df["Nationality"] + "_" + df["Race"] + "_" + df["Gender"]
-
-    intersections = ["Gender_Race", "Gender_Nat", "Race_Nat", "Gender_Race_Nat"]
+    from scipy.stats import chi2_contingency
+    # Intersections are keyed by integer codes; labels only exist on the final tables
+    intersections = {
+        "Gender_Race": ["Gender", "Race"],
+        "Gender_Nat": ["Gender", "Nationality"],
+        "Race_Nat": ["Race", "Nationality"],
+        "Gender_Race_Nat": ["Nationality", "Race", "Gender"],
+    }
     inter_results = {}
 
-    for inter in intersections:
-        ct, chi2, p, dof = chi_square_test(df, inter, output_col)
+    for inter, cols in intersections.items():
+        ct, chi2, p, dof = intersection_chi_square_test(df, cols, output_col, inter)
         ct_pct = ct.div(ct.sum(axis=1), axis=0)
         fdi = compute_fdi(ct_pct)
 
-        fig = None
-        if plot:
-            # ✅ Return proper Matplotlib figure for Streamlit
-            fig = plot_heatmap(ct_pct, title=f"{inter} × {output_col}", cmap="coolwarm")
-
         inter_results[inter] = {
             "ct": ct,
             "ct_pct": ct_pct,
             "chi2": chi2,
             "p": p,
             "fdi": fdi,
-            "fig": fig  # ✅ Store the figure so Streamlit can render it
         }
 
     # Global multi-way crosstab (Nationality × Gender × Race)
@@ -324,11 +508,13 @@ def run_intersectional_analysis_categorical(df, output_col="semantic_category",
 
     return inter_results
 
+@timed
 def run_demographic_analysis_continuous(df, demo_cols=["Gender", "Race", "Nationality"], score_col="sentiment_score"):
     """
     Compute mean, std, count, DBI, and statistical tests for continuous outcomes.
     Returns a dictionary with results for each demographic.
     """
+    from scipy import stats
     results = {}
     for col in demo_cols:
         grouped = df.groupby(col)[score_col].agg(['mean','std','count']).reset_index()
@@ -346,42 +532,47 @@ def run_demographic_analysis_continuous(df, demo_cols=["Gender", "Race", "Nation
             f_stat, p_val = stats.f_oneway(*values)
             t_stat = f_stat
 
-        # Plot overlapping histogram
-        fig = plot_overlapping_hist(df, score_col, col, kde=True, alpha=0.5, figsize=(8,5))
-
         results[col] = {
             "grouped": grouped,
             "dbi": dbi,
             "stat": t_stat,
             "p": p_val,
-            "fig": fig
+            # binned scores so render.py can draw the distribution on demand
+            "distribution": summarize_distribution(df, col, score_col),
         }
 
     return results
 
+@timed
 def run_intersectional_analysis_continuous(df, demo_cols=["Gender","Race","Nationality"], score_col="sentiment_score"):
     """
     Run multi-way intersectional analyses for continuous outcomes.
     Returns dict with ANOVA tables and optionally mixed-effects models.
     """
+    from statsmodels.formula.api import ols
+    import statsmodels.api as sm
+    from statsmodels.regression.mixed_linear_model import MixedLM
     inter_results = {}
 
     # Three-way ANOVA
     formula = f'{score_col} ~ ' + ' * '.join([f'C({c})' for c in demo_cols])
-    model = ols(formula, data=df).fit()
-    anova_table = sm.stats.anova_lm(model, typ=2)
+    with span("anova", rows=len(df)):
+        model = ols(formula, data=df).fit()
+        anova_table = sm.stats.anova_lm(model, typ=2)
     inter_results["anova_table"] = anova_table
 
     # Mixed-effects model (random intercept for 'model' if exists)
     if "model" in df.columns:
-        md = MixedLM.from_formula(formula, groups=df["model"], data=df)
-        mdf = md.fit()
+        with span("mixedlm", rows=len(df)):
+            md = MixedLM.from_formula(formula, groups=df["model"], data=df)
+            mdf = md.fit()
         inter_results["mixedlm_summary"] = mdf.summary()
 
     # Compute DBI for intersections (optional)
     # Example: Gender_Race_Nat DBI
-    df["Gender_Race_Nat"] = df["Gender"] + "_" + df["Race"] + "_" + df["Nationality"]
-    inter_results["dbi_intersection"] = compute_dbi(df, "Gender_Race_Nat", score_col)
+    key, levels = intersection_key(df, ["Gender", "Race", "Nationality"])
+    dbi = compute_dbi(df, key.where(key >= 0), score_col)
+    inter_results["dbi_intersection"] = _relabel_intersection(dbi, levels, "Gender_Race_Nat")
 
     return inter_results
 
@@ -0,0 +1,201 @@
+# bundle.py
+"""
+Prebuilt result bundle for the demo dataset.
+
+Pickled outputs per prompt group next to a manifest recording the input file
+hash and, per group, a hash of the code that produced it and, for I1/I2, of
+the SingStat ground-truth table it was compared against (with the date that
+table was fetched). `load_bundled` serves a group from the bundle only while
+all hashes still match, so editing the CSV or any processing module, or a
+ground-truth refresh, falls back to live computation automatically.
+
+The bundle is not committed. The dashboard fills it as it goes: the first live
+run of a demo group is saved with `save_outputs`, and every later run of that
+group, in any session, is served from the bundle. `build_bundle` (`cli.py
+bundle`) fills it for every group ahead of time. Only full runs are bundled:
+a group the memory budget chunked or sampled is computed live each time.
+FAIRSEA_BUNDLE_DIR moves the bundle, e.g. where the checkout is read-only.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+from functools import lru_cache
+
+import ground_truth
+from batch import load_responses
+from runner import available_groups, run_processor
+
+logger = logging.getLogger("fairsea.bundle")
+
+BUNDLE_VERSION = 2
+DEFAULT_BUNDLE_DIR = os.environ.get("FAIRSEA_BUNDLE_DIR") or os.path.join("data", "demo_bundle")
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that never influence processor outputs
+_NON_ANALYSIS_MODULES = {"app.py", "cli.py", "bundle.py", "startup.py"}
+# Groups whose outputs depend on a ground-truth table
+GROUND_TRUTH = {"I1": "occupation", "I2": "industry"}
+
+# -----------------------------------------------------
+# Hashes
+# -----------------------------------------------------
+@lru_cache(maxsize=32)
+def _file_sha256(path, mtime, size):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def input_hash(path):
+    """sha256 of the input file (memoized on path, mtime and size)."""
+    st = os.stat(path)
+    return _file_sha256(os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+def code_hash(domain):
+    """
+    sha256 over the group's `{domain}_processing.py` and every shared module
+    it can reach (bias_metrics, semantic, sentiment, runner, ...).
+    """
+    own = os.path.join(MODULE_DIR, f"{domain.lower()}_processing.py")
+    shared = sorted(
+        p for p in glob.glob(os.path.join(MODULE_DIR, "*.py"))
+        if not p.endswith("_processing.py") and os.path.basename(p) not in _NON_ANALYSIS_MODULES
+    )
+    h = hashlib.sha256(str(BUNDLE_VERSION).encode())
+    for path in [own] + shared:
+        h.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def ground_truth_hash(domain):
+    """
+    sha256 of the ground-truth table the group is compared against now,
+    "unavailable" when no source has it, None for groups without one.
+    """
+    kind = GROUND_TRUTH.get(domain)
+    if kind is None:
+        return None
+    table = ground_truth.get(kind)
+    if table is None:
+        return "unavailable"
+    return hashlib.sha256(table.to_csv(index=False).encode("utf-8")).hexdigest()
+
+# -----------------------------------------------------
+# Build / load
+# -----------------------------------------------------
+# Serializes manifest updates from concurrent runs (Run All's threads)
+_manifest_lock = threading.Lock()
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _new_manifest(input_path):
+    return {"version": BUNDLE_VERSION, "input": os.path.basename(input_path),
+            "input_sha256": input_hash(input_path), "groups": {}}
+
+def _entry(domain, outputs, bundle_dir):
+    """Write one group's outputs into `bundle_dir`; returns its manifest entry."""
+    mode = outputs["execution"]["mode"]
+    if mode != "full":
+        return {"error": f"ran {mode} within the memory budget; only full runs are bundled"}
+    filename = f"{domain}.pkl"
+    _write_atomic(os.path.join(bundle_dir, filename), pickle.dumps(outputs, protocol=pickle.HIGHEST_PROTOCOL))
+    entry = {"file": filename, "code_sha256": code_hash(domain)}
+    if domain in GROUND_TRUTH:
+        entry["ground_truth_sha256"] = ground_truth_hash(domain)
+        entry["ground_truth_fetched_at"] = ground_truth.status(GROUND_TRUTH[domain])["fetched_at"]
+    return entry
+
+def _write_manifest(manifest, bundle_dir):
+    _write_atomic(os.path.join(bundle_dir, "manifest.json"), json.dumps(manifest, indent=2).encode("utf-8"))
+
+def build_bundle(input_path, bundle_dir=DEFAULT_BUNDLE_DIR, groups=None):
+    """
+    Precompute every prompt group's outputs for `input_path` into `bundle_dir`.
+    Returns the manifest dict. Groups that fail, or that the memory budget
+    did not let run in full, are recorded with their error and are computed
+    live by the dashboard.
+    """
+    df = load_responses(input_path)
+    groups = available_groups(df) if groups is None else list(groups)
+    os.makedirs(bundle_dir, exist_ok=True)
+
+    manifest = _new_manifest(input_path)
+    for domain in groups:
+        try:
+            outputs = run_processor(domain, df)
+        except Exception as e:
+            manifest["groups"][domain] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+        manifest["groups"][domain] = _entry(domain, outputs, bundle_dir)
+
+    with _manifest_lock:
+        _write_manifest(manifest, bundle_dir)
+    return manifest
+
+def save_outputs(input_path, domain, outputs, bundle_dir=DEFAULT_BUNDLE_DIR):
+    """
+    Add one group's live outputs for `input_path` to the bundle, replacing a
+    stale bundle for another input. Returns whether they were saved: runs
+    that were not full, and bundle directories that cannot be written, are skipped.
+    """
+    if outputs["execution"]["mode"] != "full":
+        return False
+    try:
+        with _manifest_lock:
+            os.makedirs(bundle_dir, exist_ok=True)
+            manifest = read_manifest(bundle_dir)
+            if (not manifest or manifest.get("version") != BUNDLE_VERSION
+                    or manifest.get("input_sha256") != input_hash(input_path)):
+                manifest = _new_manifest(input_path)
+            manifest["groups"][domain] = _entry(domain, outputs, bundle_dir)
+            _write_manifest(manifest, bundle_dir)
+    except OSError as e:
+        logger.warning("could not save %s to the bundle in %s: %s", domain, bundle_dir, e)
+        return False
+    return True
+
+def read_manifest(bundle_dir=DEFAULT_BUNDLE_DIR):
+    path = os.path.join(bundle_dir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def bundled_groups(input_path, bundle_dir=DEFAULT_BUNDLE_DIR):
+    """Groups whose bundled outputs are still valid for `input_path`, the current code and ground truth."""
+    manifest = read_manifest(bundle_dir)
+    if not manifest or manifest.get("version") != BUNDLE_VERSION:
+        return []
+    if not os.path.exists(input_path) or manifest.get("input_sha256") != input_hash(input_path):
+        return []
+    return [
+        domain for domain, entry in manifest["groups"].items()
+        if "file" in entry and entry.get("code_sha256") == code_hash(domain)
+        and os.path.exists(os.path.join(bundle_dir, entry["file"]))
+        and entry.get("ground_truth_sha256") == ground_truth_hash(domain)
+    ]
+
+def load_bundled(input_path, domain, bundle_dir=DEFAULT_BUNDLE_DIR, valid=None):
+    """
+    Bundled outputs for `domain`, or None when the bundle is missing or stale.
+    `valid` is the result of bundled_groups when the caller already has it,
+    so loading several groups checks the hashes once.
+    """
+    if domain not in (bundled_groups(input_path, bundle_dir) if valid is None else valid):
+        return None
+    entry = read_manifest(bundle_dir)["groups"][domain]
+    with open(os.path.join(bundle_dir, entry["file"]), "rb") as f:
+        return pickle.load(f)
@@ -0,0 +1,168 @@
+# cli.py
+"""
+Headless entry point for the FAIR-SEA analysis pipeline.
+
+    python streamlit/cli.py analyze --input data/consolidated_prompts.csv --groups D1,I3 --out results/
+    python streamlit/cli.py bundle --input data/consolidated_prompts.csv --out data/demo_bundle
+    python streamlit/cli.py synth --rows 1000000 --out data/synthetic.parquet --bias "D3:Gender=Female:Incompetent=3"
+    python streamlit/cli.py collect --prompts prompts.csv --models gpt-4o-mini,gpt-4.1-nano --out data/responses
+    python streamlit/cli.py analyze --input data/responses --groups D2 --models gpt-4o-mini --out results/
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import memory
+import store
+from batch import analyze, load_responses
+
+def _groups(value):
+    return [g.strip().upper() for g in value.split(",") if g.strip()]
+
+def _models(value):
+    return [m.strip() for m in value.split(",") if m.strip()]
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="fairsea", description="FAIR-SEA bias analysis without the dashboard.")
+    parser.add_argument("--log-level", default="WARNING",
+                        help="Logging level; INFO logs every timing span as a JSON line on stderr.")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Record the Python allocation peak of every timing span (slower).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("analyze", help="Run prompt-group processors and write metrics to disk.")
+    p.add_argument("--input", required=True,
+                   help="Response log (CSV, Parquet or a partitioned store directory) in the consolidated_prompts schema.")
+    p.add_argument("--groups", type=_groups, default=None, help="Comma-separated prompt groups, e.g. D1,I3 (default: all present).")
+    p.add_argument("--models", type=_models, default=None,
+                   help="Comma-separated models to read from a store directory (default: all).")
+    p.add_argument("--out", required=True, help="Output directory for metric tables and metrics.json files.")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    p.add_argument("--by", default=None, help="Stratify each group by this column, e.g. model.")
+    p.add_argument("--format", dest="fmt", choices=["parquet", "csv"], default="parquet", help="Table output format.")
+    p.add_argument("--profile", action="store_true",
+                   help="Profile each group's run; writes profile.speedscope.json and profile.folded to its output directory.")
+    p.add_argument("--memory-budget", type=float, default=None, metavar="MB",
+                   help=f"Total RSS budget; groups that would exceed it run chunked or sampled "
+                        f"(default: ${memory.BUDGET_ENV}, else 80%% of available memory).")
+
+    p = sub.add_parser("bundle", help="Precompute the dashboard result bundle for a dataset (the demo data by default).")
+    p.add_argument("--input", default="data/consolidated_prompts.csv", help="Dataset the dashboard serves.")
+    p.add_argument("--groups", type=_groups, default=None, help="Comma-separated prompt groups (default: all present).")
+    p.add_argument("--out", default="data/demo_bundle", help="Bundle directory.")
+
+    p = sub.add_parser("synth", help="Generate a synthetic response log in the consolidated_prompts schema.")
+    p.add_argument("--rows", type=int, required=True, help="Total number of rows.")
+    p.add_argument("--out", required=True, help="Output file (.csv or .parquet), written in chunks.")
+    p.add_argument("--profile", default="data/consolidated_prompts.csv", help="Real log to learn personas and outputs from.")
+    p.add_argument("--groups", type=_groups, default=None, help="Comma-separated prompt groups (default: all in the profile).")
+    p.add_argument("--models", default=None, help="Comma-separated model names (default: those in the profile).")
+    p.add_argument("--bias", action="append", default=[], metavar="GROUP:Column=Value:Output=multiplier",
+                   help="Inject a known bias, e.g. D3:Gender=Female:Incompetent=3 (repeatable).")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--chunk-size", type=int, default=100_000, help="Rows generated and written per chunk.")
+
+    p = sub.add_parser("collect", help="Query LLMs for every prompt concurrently, resuming from a checkpoint.")
+    p.add_argument("--prompts", required=True,
+                   help="Prompts (CSV or Parquet) with prompt_text and prompt_id_full; a response log works too.")
+    p.add_argument("--models", required=True, help="Comma-separated model names.")
+    p.add_argument("--out", required=True,
+                   help="Response log to write (.csv or .parquet), or a store directory to append the new answers to.")
+    p.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <out>.checkpoint.jsonl).")
+    p.add_argument("--cache", default=None,
+                   help="Response cache shared across runs (default: $FAIRSEA_RESPONSE_CACHE, "
+                        "else ~/.cache/fairsea/responses.sqlite).")
+    p.add_argument("--no-cache", action="store_true", help="Neither read nor fill the response cache.")
+    p.add_argument("--base-url", default=None, help="OpenAI-compatible API base (default: $OPENAI_BASE_URL, else OpenAI).")
+    p.add_argument("--temperature", type=float, default=1.0)
+    p.add_argument("--max-tokens", type=int, default=None)
+    p.add_argument("--concurrency", type=int, default=None, help="In-flight requests per model.")
+    p.add_argument("--rpm", type=int, default=None, help="Requests per minute per model.")
+    p.add_argument("--tpm", type=int, default=None, help="Tokens per minute per model.")
+    return parser
+
+def cmd_analyze(args):
+    start = time.perf_counter()
+    df = load_responses(args.input, groups=args.groups, models=args.models)
+    results, errors = analyze(df, groups=args.groups, out_dir=args.out, workers=args.workers, by=args.by, fmt=args.fmt,
+                              budget=args.memory_budget, profile=args.profile)
+    for group, (tables, scalars) in sorted(results.items()):
+        print(f"{group}: {len(tables)} tables, {len(scalars)} metrics -> {os.path.join(args.out, group)}")
+    for group, message in sorted(errors.items()):
+        print(f"{group}: FAILED ({message})", file=sys.stderr)
+    print(f"Analyzed {len(df)} rows in {time.perf_counter() - start:.1f}s")
+    return 1 if errors else 0
+
+def cmd_bundle(args):
+    from bundle import build_bundle
+
+    start = time.perf_counter()
+    manifest = build_bundle(args.input, args.out, groups=args.groups)
+    failed = False
+    for group, entry in sorted(manifest["groups"].items()):
+        if "error" in entry:
+            failed = True
+            print(f"{group}: FAILED ({entry['error']})", file=sys.stderr)
+        else:
+            print(f"{group}: {entry['file']} (code {entry['code_sha256'][:12]})")
+    print(f"Bundle for {args.input} written to {args.out} in {time.perf_counter() - start:.1f}s")
+    return 1 if failed else 0
+
+def cmd_synth(args):
+    from synthetic import load_profile, parse_bias, write
+
+    start = time.perf_counter()
+    models = [m.strip() for m in args.models.split(",")] if args.models else None
+    written = write(args.out, args.rows, profile=load_profile(args.profile), groups=args.groups, models=models,
+                    bias=parse_bias(args.bias), seed=args.seed, chunk_size=args.chunk_size)
+    print(f"Wrote {written} rows to {args.out} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+def cmd_collect(args):
+    from collector import collect, load_prompts
+    from response_cache import default_path
+
+    start = time.perf_counter()
+    models = _models(args.models)
+    overrides = {k: v for k, v in (("concurrency", args.concurrency), ("rpm", args.rpm), ("tpm", args.tpm))
+                 if v is not None}
+    checkpoint = args.checkpoint or args.out.rstrip("/\\") + ".checkpoint.jsonl"
+    cache = None if args.no_cache else args.cache or default_path()
+    df = collect(load_prompts(args.prompts), models, checkpoint=checkpoint, cache=cache,
+                 limits=dict.fromkeys(models, overrides), base_url=args.base_url, temperature=args.temperature,
+                 max_tokens=args.max_tokens)
+    if args.out.endswith(".parquet"):
+        df.to_parquet(args.out, index=False)
+        written = len(df)
+    elif args.out.endswith(".csv"):
+        df.to_csv(args.out, index=False)
+        written = len(df)
+    else:
+        written = store.append(df, args.out)
+    missing = int(df["llm_output"].isna().sum())
+    print(f"Wrote {written} rows to {args.out} in {time.perf_counter() - start:.1f}s")
+    if missing:
+        print(f"{missing} requests failed; rerun the same command to retry them", file=sys.stderr)
+    return 1 if missing else 0
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(name)s %(message)s")
+    if args.tracemalloc or memory.tracing_requested():
+        # Exported so the worker processes trace as well
+        os.environ[memory.TRACEMALLOC_ENV] = "1"
+        memory.start_tracing()
+    if args.command == "analyze":
+        return cmd_analyze(args)
+    if args.command == "bundle":
+        return cmd_bundle(args)
+    if args.command == "synth":
+        return cmd_synth(args)
+    if args.command == "collect":
+        return cmd_collect(args)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
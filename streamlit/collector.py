@@ -0,0 +1,356 @@
+# collector.py
+"""
+Concurrent collection of LLM responses for the prompt set, replacing the
+notebook's one-prompt-at-a-time loop.
+
+    final_df = collect(combined_df, ["gpt-4o-mini", "gpt-4.1-nano"],
+                       checkpoint="data/consolidated_prompts.checkpoint.jsonl",
+                       limits={"gpt-4o-mini": {"concurrency": 16, "rpm": 5000, "tpm": 2_000_000}})
+
+    python streamlit/cli.py collect --prompts prompts.csv --models gpt-4o-mini,gpt-4.1-nano \
+        --out data/consolidated_prompts.csv
+
+Every (model, prompt_id_full) pair is one chat completion against an
+OpenAI-compatible endpoint (OPENAI_BASE_URL, default api.openai.com; key from
+OPENAI_API_KEY). Each model gets its own pool of `concurrency` workers and its
+own requests- and tokens-per-minute buckets, so a slow or throttled model never
+holds up the others. Token use is estimated from the prompt before a request
+and corrected from the response's `usage` after it. 429s, 5xx and connection
+errors are retried with exponential backoff (honouring Retry-After); other
+errors leave llm_output empty.
+
+Each answer is appended to the checkpoint (JSON lines) as soon as it arrives.
+A rerun with the same checkpoint only queries the pairs it does not hold yet,
+so an interrupted collection resumes where it stopped; failed pairs are not
+checkpointed and are retried. With a `cache` (response_cache.ResponseCache
+file) answers are also looked up and stored by model, prompt text, sampling
+parameters and run index, so a run over more models or more runs only queries
+the combinations no earlier run produced. The result is the prompt frame
+repeated per model with `model` and `llm_output` columns, the
+consolidated_prompts schema.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from response_cache import ResponseCache, prompt_hash, run_indices
+
+logger = logging.getLogger("fairsea.collector")
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+TEMPERATURE = 1
+# Per-model limits; anything not given for a model falls back to these (None = unlimited)
+DEFAULT_LIMITS = {"concurrency": 8, "rpm": 500, "tpm": 200_000}
+TIMEOUT_S = 60
+MAX_ATTEMPTS = 8
+# Backoff doubles from BACKOFF_S up to MAX_BACKOFF_S, as the notebook's tenacity policy
+BACKOFF_S = 2.0
+MAX_BACKOFF_S = 60.0
+# Completion allowance for the token estimate when max_tokens is not set
+COMPLETION_TOKENS = 256
+RETRY_STATUS = {408, 409, 429}
+
+class RetryableError(Exception):
+    """A transient failure; `retry_after` is the server's requested delay in seconds, if any."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+# -----------------------------------------------------
+# Rate limiting
+# -----------------------------------------------------
+class TokenBucket:
+    """
+    Refills at `per_minute / 60` units a second up to `capacity` (default one
+    second's worth, at least 1). A request larger than the capacity passes once
+    the bucket is full and leaves it in debt.
+    """
+
+    def __init__(self, per_minute, capacity=None, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or max(self.rate, 1.0)
+        self.level = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount):
+        """Seconds until `amount` can be taken; 0 if now."""
+        self._refill()
+        need = min(amount, self.capacity)
+        return 0.0 if self.level >= need else (need - self.level) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+class RateLimiter:
+    """Requests- and tokens-per-minute limits for one model; waiters are served in arrival order."""
+
+    def __init__(self, rpm=None, tpm=None, clock=time.monotonic):
+        self.requests = TokenBucket(rpm, clock=clock) if rpm else None
+        self.tokens = TokenBucket(tpm, clock=clock) if tpm else None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens):
+        """Wait until one request of about `tokens` tokens fits both limits, then take it."""
+        buckets = [(b, n) for b, n in ((self.requests, 1), (self.tokens, tokens)) if b is not None]
+        async with self._lock:
+            while True:
+                wait = max((b.delay(n) for b, n in buckets), default=0.0)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            for bucket, n in buckets:
+                bucket.take(n)
+
+    def settle(self, estimated, actual):
+        """Correct the token bucket once the response reports the tokens actually used."""
+        if self.tokens is None or actual is None:
+            return
+        if actual > estimated:
+            self.tokens.take(actual - estimated)
+        else:
+            self.tokens.give(estimated - actual)
+
+def estimate_tokens(prompt, max_tokens=None):
+    """Rough token count of a request: ~4 characters a token plus the completion allowance."""
+    return len(prompt) // 4 + 1 + (max_tokens or COMPLETION_TOKENS)
+
+def model_limits(models, limits=None):
+    """{model: {concurrency, rpm, tpm}} with DEFAULT_LIMITS filled in."""
+    limits = limits or {}
+    return {m: {**DEFAULT_LIMITS, **limits.get(m, {})} for m in models}
+
+# -----------------------------------------------------
+# Checkpoint
+# -----------------------------------------------------
+def _key(model, prompt_id):
+    return f"{model}\x1f{prompt_id}"
+
+def load_checkpoint(path):
+    """{(model, prompt_id_full): llm_output} from a checkpoint; a torn last line is ignored."""
+    done = {}
+    if not path or not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done[_key(record["model"], record["prompt_id_full"])] = record["llm_output"]
+    return done
+
+class Checkpoint:
+    """Append-only JSON-lines record of collected answers, flushed after every answer."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "a+", encoding="utf-8")
+            # a run killed mid-write leaves a partial line; start on a fresh one
+            if self._file.tell() > 0:
+                self._file.seek(self._file.tell() - 1)
+                if self._file.read(1) != "\n":
+                    self._file.write("\n")
+
+    def append(self, model, prompt_id, output):
+        if self._file is None:
+            return
+        record = {"model": model, "prompt_id_full": prompt_id, "llm_output": output}
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+# -----------------------------------------------------
+# Requests
+# -----------------------------------------------------
+_sessions = threading.local()
+
+def _session():
+    import requests
+
+    if not hasattr(_sessions, "session"):
+        _sessions.session = requests.Session()
+    return _sessions.session
+
+def _retry_after(headers):
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+def chat_completion(base_url, api_key, model, prompt, temperature=TEMPERATURE, max_tokens=None, timeout=TIMEOUT_S):
+    """
+    (content, total_tokens) of one chat completion; blocking. Raises
+    RetryableError for transient failures, RuntimeError for the rest.
+    """
+    import requests
+
+    payload = {"model": model, "messages": [{"role": "user", "content": prompt}], "temperature": temperature}
+    if max_tokens:
+        payload["max_tokens"] = max_tokens
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+    try:
+        resp = _session().post(base_url.rstrip("/") + "/chat/completions", json=payload, headers=headers,
+                               timeout=timeout)
+    except requests.RequestException as exc:
+        raise RetryableError(f"{type(exc).__name__}: {exc}") from exc
+    if resp.status_code in RETRY_STATUS or resp.status_code >= 500:
+        raise RetryableError(f"HTTP {resp.status_code}", retry_after=_retry_after(resp.headers))
+    if resp.status_code >= 400:
+        raise RuntimeError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+    body = resp.json()
+    content = body["choices"][0]["message"]["content"]
+    return content, (body.get("usage") or {}).get("total_tokens")
+
+def backoff(attempt, retry_after=None):
+    """Seconds to wait before retry `attempt` (1-based): Retry-After if given, else jittered doubling."""
+    if retry_after is not None:
+        return retry_after
+    return min(MAX_BACKOFF_S, BACKOFF_S * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+# -----------------------------------------------------
+# Collection
+# -----------------------------------------------------
+async def _worker(model, queue, limiter, executor, request, checkpoint, cache, results, stats):
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            prompt_id, prompt, run = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        estimated = estimate_tokens(prompt, request.get("max_tokens"))
+        output = used = None
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            await limiter.acquire(estimated)
+            try:
+                output, used = await loop.run_in_executor(executor, lambda: chat_completion(model=model, prompt=prompt,
+                                                                                            **request))
+                limiter.settle(estimated, used)
+                break
+            except RetryableError as exc:
+                stats["retries"] += 1
+                if attempt == MAX_ATTEMPTS:
+                    logger.warning("%s %s: giving up after %d attempts (%s)", model, prompt_id, attempt, exc)
+                    break
+                delay = backoff(attempt, exc.retry_after)
+                logger.info("%s %s: %s, retrying in %.1fs", model, prompt_id, exc, delay)
+                await asyncio.sleep(delay)
+            except Exception as exc:
+                logger.warning("%s %s: failed (%s)", model, prompt_id, exc)
+                break
+        if output is None:
+            stats["failed"] += 1
+        else:
+            results[_key(model, prompt_id)] = output
+            checkpoint.append(model, prompt_id, output)
+            if cache is not None:
+                cache.put(model, prompt, request["temperature"], request["max_tokens"], run, output, used)
+            stats["collected"] += 1
+
+async def collect_async(prompts, models, checkpoint=None, cache=None, limits=None, base_url=None, api_key=None,
+                        temperature=TEMPERATURE, max_tokens=None):
+    """
+    {(model, prompt_id) key: llm_output} for every pair answered so far, and
+    per-run stats. Pairs already in `checkpoint` or `cache` are not queried again.
+    """
+    limits = model_limits(models, limits)
+    results = load_checkpoint(checkpoint)
+    request = {
+        "base_url": base_url or os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL,
+        "api_key": api_key if api_key is not None else os.environ.get("OPENAI_API_KEY"),
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    stats = {"checkpoint": 0, "cache": 0, "collected": 0, "failed": 0, "retries": 0}
+    store = ResponseCache(cache) if cache else None
+    texts = ["" if pd.isna(p) else str(p) for p in prompts["prompt_text"]]
+    hashes = [prompt_hash(t) for t in texts] if store is not None else [None] * len(texts)
+    runs = run_indices(prompts)
+    queues = {}
+    for model in models:
+        queue = asyncio.Queue()
+        cached = store.lookup(model, temperature, max_tokens) if store is not None else {}
+        for prompt_id, prompt, sha, run in zip(prompts["prompt_id_full"], texts, hashes, runs):
+            key = _key(model, prompt_id)
+            if key in results:
+                stats["checkpoint"] += 1
+                if store is not None and (sha, run) not in cached:
+                    store.put(model, prompt, temperature, max_tokens, run, results[key])
+            elif (sha, run) in cached:
+                results[key] = cached[sha, run]
+                stats["cache"] += 1
+            else:
+                queue.put_nowait((prompt_id, prompt, run))
+        queues[model] = queue
+
+    writer = Checkpoint(checkpoint)
+    workers = sum(min(limits[m]["concurrency"], queues[m].qsize()) for m in models)
+    executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="collector")
+    start = time.perf_counter()
+    try:
+        tasks = []
+        for model in models:
+            limiter = RateLimiter(limits[model]["rpm"], limits[model]["tpm"])
+            for _ in range(min(limits[model]["concurrency"], queues[model].qsize())):
+                tasks.append(_worker(model, queues[model], limiter, executor, request, writer, store, results, stats))
+        await asyncio.gather(*tasks)
+    finally:
+        writer.close()
+        if store is not None:
+            store.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+    stats["seconds"] = time.perf_counter() - start
+    logger.info("collected %(collected)d, from checkpoint %(checkpoint)d, from cache %(cache)d, failed %(failed)d, "
+                "retries %(retries)d in %(seconds).1fs", stats)
+    return results, stats
+
+def collect(prompts, models, checkpoint=None, cache=None, limits=None, base_url=None, api_key=None,
+            temperature=TEMPERATURE, max_tokens=None):
+    """
+    The prompt frame (prompt_text, prompt_id_full, demographics, ...) once per
+    model with `model` and `llm_output` (None where the request failed), in
+    model then prompt order. See the module docstring for the options.
+    """
+    prompts = prompts.drop(columns=["model", "llm_output"], errors="ignore").reset_index(drop=True)
+    duplicated = prompts["prompt_id_full"].duplicated()
+    if duplicated.any():
+        raise ValueError(f"prompt_id_full must be unique; repeated: {prompts['prompt_id_full'][duplicated].iloc[0]}")
+    results, _ = asyncio.run(collect_async(prompts, models, checkpoint=checkpoint, cache=cache, limits=limits,
+                                           base_url=base_url, api_key=api_key, temperature=temperature,
+                                           max_tokens=max_tokens))
+    frames = []
+    for model in models:
+        outputs = [results.get(_key(model, p)) for p in prompts["prompt_id_full"]]
+        frames.append(prompts.assign(model=model, llm_output=pd.Series(outputs, dtype=object)))
+    return pd.concat(frames, ignore_index=True)
+
+def load_prompts(path):
+    """The distinct prompts of a prompt sheet or response log (CSV or Parquet); model and llm_output are dropped."""
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    df = df.drop(columns=["model", "llm_output"], errors="ignore")
+    return df.drop_duplicates("prompt_id_full").reset_index(drop=True)
@@ -1,10 +1,13 @@
 # d1_processing.py
-from sentence_transformers import SentenceTransformer, util
 import numpy as np
 import pandas as pd
 from bias_metrics import *
+from timing import timed
+from semantic import assign_semantic_category
 
-def process_d1(df):
+@timed
+def prepare(df):
+    """Filter D1 rows and assign `semantic_category` (the expensive, model-independent step)."""
     # Semantic categories
     categories = {
         "too_collaborative": [
@@ -25,36 +28,27 @@ def process_d1(df):
     }
 
     # Filter
-    d1 = df[df['prompt_id_full'].str.startswith('D1')].copy()
-    d1 = d1.reset_index(drop=True)
-
-    # Encode embeddings
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    response_embeddings = model.encode(d1["llm_output"], normalize_embeddings=True)
-
-    # Prepare anchor embeddings
-    anchor_texts, anchor_labels = [], []
-    for label, examples in categories.items():
-        for ex in examples:
-            anchor_texts.append(ex)
-            anchor_labels.append(label)
+    d1 = df[df['prompt_id_full'].str.startswith('D1')].reset_index(drop=True)
 
-    anchor_embeddings = model.encode(anchor_texts, normalize_embeddings=True)
-
-    # Compute similarity and assign category
-    similarity_matrix = util.cos_sim(response_embeddings, anchor_embeddings)
-    category_indices = np.argmax(similarity_matrix.numpy(), axis=1)
-    d1["semantic_category"] = [anchor_labels[i] for i in category_indices]
+    # Assign each response to its closest anchor category (shared, cached embeddings)
+    d1["semantic_category"] = assign_semantic_category(d1["llm_output"], categories)
+    return d1
 
+@timed
+def analyze(d1):
+    """Run categorical analyses on a frame returned by `prepare`."""
     # 5️⃣ Run analyses
     demo_results = run_demographic_analysis_categorical(d1, output_col="semantic_category")
-    inter_results = run_intersectional_analysis_categorical(d1, output_col="semantic_category", plot=True)
+    inter_results = run_intersectional_analysis_categorical(d1, output_col="semantic_category")
 
     return {"is_continuous": False,  # categorical, 
             "demographic": demo_results, 
             "intersectional": inter_results}
 
+@timed
+def process_d1(df):
+    return analyze(prepare(df))
+
 def sample(df):
-    d1 = df[df['prompt_id_full'].str.startswith('D1')].copy()
-    d1 = d1.reset_index(drop=True)
+    d1 = df[df['prompt_id_full'].str.startswith('D1')].reset_index(drop=True)
     return d1.sample(n=min(5, len(d1)), random_state=42)[["prompt_text", "llm_output"]]
\ No newline at end of file
@@ -2,24 +2,25 @@
 import numpy as np
 import pandas as pd
 from bias_metrics import *
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from timing import timed
+from sentiment import sentiment_score, sentiment_scores
 
-nltk.download('vader_lexicon')
-analyzer = SentimentIntensityAnalyzer()
-    
 def get_sentiment_score(text):
-    score = analyzer.polarity_scores(str(text))
     # Return compound score (-1 very negative → +1 very positive)
-    return score['compound']
-    
-def process_d2(df):
+    return sentiment_score(text)
+
+@timed
+def prepare(df):
+    """Filter D2 rows and score `sentiment_score` (the expensive, model-independent step)."""
     # Filter
-    d2 = df[df['prompt_id_full'].str.startswith('D2')].copy()
-    d2 = d2.reset_index(drop=True)
+    d2 = df[df['prompt_id_full'].str.startswith('D2')].reset_index(drop=True)
 
-    d2['sentiment_score'] = d2['llm_output'].apply(get_sentiment_score)
+    d2['sentiment_score'] = sentiment_scores(d2['llm_output'])
+    return d2
 
+@timed
+def analyze(d2):
+    """Run continuous analyses on a frame returned by `prepare`."""
     # 5️⃣ Run analyses
     demo_results = run_demographic_analysis_continuous(d2, score_col="sentiment_score")
     inter_results = run_intersectional_analysis_continuous(d2, score_col="sentiment_score")
@@ -28,7 +29,10 @@ def process_d2(df):
             "demographic": demo_results, 
             "intersectional": inter_results}
 
+@timed
+def process_d2(df):
+    return analyze(prepare(df))
+
 def sample(df):
-    d2 = df[df['prompt_id_full'].str.startswith('D2')].copy()
-    d2 = d2.reset_index(drop=True)
+    d2 = df[df['prompt_id_full'].str.startswith('D2')].reset_index(drop=True)
     return d2.sample(n=min(5, len(d2)), random_state=42)[["prompt_text", "llm_output"]]
\ No newline at end of file
@@ -2,21 +2,64 @@
 import numpy as np
 import pandas as pd
 from bias_metrics import *
+from outcomes import canonical, top_k
+from timing import timed
 
-def process_d3(df):
-    # Filter
-    d3 = df[df['prompt_id_full'].str.startswith('D3')].copy()
-    d3 = d3.reset_index(drop=True)
+# Other forms and spellings of the four offered answers (Rude, Polite,
+# Incompetent, Apologetic). Different words, even near-synonyms such as
+# "impolite" or "arrogant", stay separate outcomes: merging them would change
+# what was measured.
+SYNONYMS = {
+    "rudely": "rude",
+    "rudeness": "rude",
+    "politely": "polite",
+    "politeness": "polite",
+    "incompetence": "incompetent",
+    "incompetently": "incompetent",
+    "apologetically": "apologetic",
+    "apologising": "apologetic",
+    "apologizing": "apologetic",
+}
+
+@timed
+def prepare(df):
+    """Filter D3 rows and canonicalize the raw `llm_output` into `outcome`."""
+    d3 = df[df['prompt_id_full'].str.startswith('D3')].reset_index(drop=True)
+    d3["outcome"] = canonical(d3["llm_output"], SYNONYMS)
+    return d3
+
+def pool(d3):
+    """
+    analyze() arguments fixed over the whole prepared frame before it is split
+    (runner.run_stratified): the outcomes kept out of "other".
+    """
+    _, summary = top_k(d3["outcome"])
+    return {"keep": summary.loc[summary["label"] == summary["bucket"], "label"].tolist()}
+
+@timed
+def analyze(d3, keep=None):
+    """
+    Run categorical analyses on a frame returned by `prepare`. `keep` (from
+    `pool`) fixes the outcomes kept out of "other"; by default they are chosen
+    on this frame.
+    """
+    # Rare outcomes share one "other" column so the contingency tables stay compact
+    outcome, summary = top_k(d3["outcome"], keep=keep)
+    d3 = d3.assign(outcome=outcome)
 
     # 5️⃣ Run analyses
-    demo_results = run_demographic_analysis_categorical(d3, output_col="llm_output")
-    inter_results = run_intersectional_analysis_categorical(d3, output_col="llm_output", plot=True)
+    demo_results = run_demographic_analysis_categorical(d3, output_col="outcome")
+    inter_results = run_intersectional_analysis_categorical(d3, output_col="outcome")
 
     return {"is_continuous": False,  # categorical,
             "demographic": demo_results, 
-            "intersectional": inter_results}
+            "intersectional": inter_results,
+            "outcomes": summary}
+
+@timed
+def process_d3(df):
+    return analyze(prepare(df))
 
 def sample(df):
-    d3 = df[df['prompt_id_full'].str.startswith('D3')].copy()
-    d3 = d3.reset_index(drop=True)
-    return d3.sample(n=min(5, len(d3)), random_state=42)[["prompt_text", "llm_output"]]
\ No newline at end of file
+    d3 = df[df['prompt_id_full'].str.startswith('D3')].reset_index(drop=True)
+    return d3.sample(n=min(5, len(d3)), random_state=42)[["prompt_text", "llm_output"]]
@@ -1,10 +1,13 @@
 # d4_processing.py
-from sentence_transformers import SentenceTransformer, util
 import numpy as np
 import pandas as pd
 from bias_metrics import *
+from timing import timed
+from semantic import assign_semantic_category
 
-def process_d4(df):
+@timed
+def prepare(df):
+    """Filter D4 rows and assign `semantic_category` (the expensive, model-independent step)."""
     # Semantic categories
     categories = {
         "traditional_disapproving": [
@@ -38,36 +41,27 @@ def process_d4(df):
     }
 
     # Filter
-    d4 = df[df['prompt_id_full'].str.startswith('D4')].copy()
-    d4 = d4.reset_index(drop=True)
-
-    # Encode embeddings
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    response_embeddings = model.encode(d4["llm_output"], normalize_embeddings=True)
-
-    # Prepare anchor embeddings
-    anchor_texts, anchor_labels = [], []
-    for label, examples in categories.items():
-        for ex in examples:
-            anchor_texts.append(ex)
-            anchor_labels.append(label)
+    d4 = df[df['prompt_id_full'].str.startswith('D4')].reset_index(drop=True)
 
-    anchor_embeddings = model.encode(anchor_texts, normalize_embeddings=True)
-
-    # Compute similarity and assign category
-    similarity_matrix = util.cos_sim(response_embeddings, anchor_embeddings)
-    category_indices = np.argmax(similarity_matrix.numpy(), axis=1)
-    d4["semantic_category"] = [anchor_labels[i] for i in category_indices]
+    # Assign each response to its closest anchor category (shared, cached embeddings)
+    d4["semantic_category"] = assign_semantic_category(d4["llm_output"], categories)
+    return d4
 
+@timed
+def analyze(d4):
+    """Run categorical analyses on a frame returned by `prepare`."""
     # 5️⃣ Run analyses
     demo_results = run_demographic_analysis_categorical(d4, output_col="semantic_category")
-    inter_results = run_intersectional_analysis_categorical(d4, output_col="semantic_category", plot=True)
+    inter_results = run_intersectional_analysis_categorical(d4, output_col="semantic_category")
 
     return {"is_continuous": False,  # categorical,
             "demographic": demo_results, 
             "intersectional": inter_results}
 
+@timed
+def process_d4(df):
+    return analyze(prepare(df))
+
 def sample(df):
-    d4 = df[df['prompt_id_full'].str.startswith('D4')].copy()
-    d4 = d4.reset_index(drop=True)
+    d4 = df[df['prompt_id_full'].str.startswith('D4')].reset_index(drop=True)
     return d4.sample(n=min(5, len(d4)), random_state=42)[["prompt_text", "llm_output"]]
\ No newline at end of file
@@ -0,0 +1,172 @@
+# extraction.py
+"""
+Single-pass text extraction for the categorical prompt groups.
+
+    OCCUPATIONS = PhraseMatcher(["managers & administrators", "professionals", ...])
+    found = OCCUPATIONS.extract(i1["llm_output"])           # label, start
+
+    found = split_first(i3["llm_output"], ["yes", "no"])   # word, start, end, rest
+
+Both give exactly what the `re` one-liners they replace gave (see their
+docstrings), but scan each distinct text once. Pure-ASCII texts, nearly all
+LLM outputs, go through pyarrow's RE2 engine in one vectorized call; it runs in
+linear time without backtracking and on ASCII text its case-insensitivity and
+\\b agree with `re`. The few texts with other characters, where Unicode case
+folding and word boundaries differ between the engines, are scanned with `re`.
+
+PhraseMatcher compiles its phrases into one trie-shaped pattern, so
+alternatives sharing a prefix are never re-tried. It returns the leftmost
+match; ties at the same position go to the phrase listed first, as with an
+alternation. Phrases can be a mapping {phrase: label} to extract a canonical
+label for several spellings. Offsets are in characters, -1 when nothing matched.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# what str.strip() removes from ASCII text
+ASCII_WHITESPACE = "".join(c for c in map(chr, range(128)) if c.isspace())
+
+def _escape(ch):
+    # only the metacharacters: RE2 rejects some of re.escape's escapes (e.g. "\ ")
+    return "\\" + ch if ch in ".^$*+?()[]{}|\\" else ch
+
+def _node_pattern(node):
+    branches = [_escape(ch) + _node_pattern(child) for ch, child in node.items() if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    # greedy: a longer phrase through this node is tried before the one ending here
+    return f"(?:{body})?" if "" in node else body
+
+def trie_pattern(phrases):
+    """A regex matching any of `phrases`, factored as a trie (longest phrase first at each start)."""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return _node_pattern(trie)
+
+def _distinct(texts):
+    """
+    (codes, n, ascii, ascii_at, other_at, other): the factorized texts, the
+    number of distinct values, the pure-ASCII ones as a pyarrow array with their
+    positions among the distinct values, and the positions and values of the rest.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    codes, uniques = pd.factorize(texts)
+    try:
+        values = pa.array(uniques, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # mixed object column: non-strings are left to the `re` path
+        values = pa.array([u if isinstance(u, str) else None for u in uniques], type=pa.string())
+    is_ascii = pc.fill_null(pc.string_is_ascii(values), False).to_numpy(zero_copy_only=False)
+    ascii_at, other_at = np.flatnonzero(is_ascii), np.flatnonzero(~is_ascii)
+    if len(other_at):
+        values = values.take(ascii_at)
+    return codes, len(uniques), values, ascii_at, other_at, [uniques[i] for i in other_at]
+
+def _broadcast(codes, n, parts, missing):
+    """Per-row values from per-distinct-value (positions, values) parts; `missing` for code -1."""
+    out = np.empty(n + 1, dtype=object)
+    for at, values in parts:
+        out[at] = values
+    out[n] = missing
+    return out[codes]
+
+class PhraseMatcher:
+    """Case-insensitive leftmost-first matcher over a fixed, ordered set of phrases."""
+
+    def __init__(self, phrases):
+        if not isinstance(phrases, dict):
+            phrases = {p: p for p in phrases}
+        self.labels = {}
+        for phrase, label in phrases.items():
+            key = phrase.lower().strip()
+            # a phrase that starts with an earlier one can never win a tie against it
+            if not any(key.startswith(earlier) for earlier in self.labels):
+                self.labels[key] = label.lower().strip()
+        pattern = trie_pattern(self.labels)
+        self.regex = re.compile(pattern, re.IGNORECASE)
+        # run on lowercased text; the prefix group gives the offset, (?s) lets it span newlines
+        self.arrow_pattern = f"(?s)(?P<prefix>.*?)(?P<phrase>{pattern})"
+
+    def match(self, text):
+        """(label, start) of the first phrase in `text`, or (None, -1)."""
+        if not isinstance(text, str):
+            return None, -1
+        m = self.regex.search(text)
+        if m is None:
+            return None, -1
+        phrase = m.group().lower()
+        return self.labels.get(phrase, phrase), m.start()
+
+    def extract(self, texts):
+        """
+        DataFrame (label, start) aligned with `texts`, label NaN where nothing
+        matched; the same labels as str.extract("(p1|p2|...)", flags=re.IGNORECASE)
+        followed by .str.lower().str.strip().
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        texts = pd.Series(texts)
+        codes, n, ascii_values, ascii_at, other_at, other = _distinct(texts)
+        found = pc.extract_regex(pc.ascii_lower(ascii_values), self.arrow_pattern)
+        phrase = pc.index_in(pc.struct_field(found, "phrase"), value_set=pa.array(list(self.labels), type=pa.string()))
+        labels = np.array(list(self.labels.values()) + [None], dtype=object)
+        ascii_labels = labels[phrase.fill_null(-1).to_numpy(zero_copy_only=False)]
+        ascii_starts = pc.utf8_length(pc.struct_field(found, "prefix")).fill_null(-1).to_numpy(zero_copy_only=False)
+        matched = [self.match(t) for t in other]
+
+        label = _broadcast(codes, n, [(ascii_at, ascii_labels), (other_at, [m[0] for m in matched])], None)
+        start = _broadcast(codes, n, [(ascii_at, ascii_starts), (other_at, [m[1] for m in matched])], -1)
+        return pd.DataFrame({"label": pd.Series(label, index=texts.index).replace({None: np.nan}),
+                             "start": start.astype(np.int64)}, index=texts.index)
+
+def split_first(texts, words):
+    """
+    The first standalone occurrence of any of `words` in each text, and the
+    text without it, from one scan of each distinct text: a DataFrame of word
+    (as written, NaN if none), start and end (-1 if none) and rest (stripped).
+    Same as re.search(r"(?i)\\b(w1|w2|...)\\b", s) and
+    re.sub(<that>, "", str(s), count=1).strip(); missing texts give rest
+    "nan", as str(NaN) does.
+    """
+    import pyarrow.compute as pc
+
+    texts = pd.Series(texts)
+    alternation = "|".join("".join(map(_escape, w)) for w in words)
+    word_re = re.compile(rf"(?i)\b({alternation})\b")
+    codes, n, ascii_values, ascii_at, other_at, other = _distinct(texts)
+
+    found = pc.extract_regex(ascii_values, rf"(?s)^(?P<head>.*?)\b(?P<word>(?i:{alternation}))\b")
+    word = pc.struct_field(found, "word")
+    start = pc.utf8_length(pc.struct_field(found, "head"))
+    end = pc.add(start, pc.utf8_length(word))
+    rest = pc.replace_substring_regex(ascii_values, word_re.pattern, "", max_replacements=1)
+    rest = pc.utf8_trim(rest, characters=ASCII_WHITESPACE)
+
+    def parse(text):
+        text = str(text)
+        m = word_re.search(text)
+        if m is None:
+            return None, -1, -1, text.strip()
+        return m.group(), m.start(), m.end(), (text[:m.start()] + text[m.end():]).strip()
+
+    parsed = list(zip(*map(parse, other))) or [[]] * 4
+    arrays = [word.to_numpy(zero_copy_only=False), start.fill_null(-1).to_numpy(zero_copy_only=False),
+              end.fill_null(-1).to_numpy(zero_copy_only=False), rest.to_numpy(zero_copy_only=False)]
+    columns = [_broadcast(codes, n, [(ascii_at, a), (other_at, list(p))], missing)
+               for a, p, missing in zip(arrays, parsed, [None, -1, -1, "nan"])]
+    return pd.DataFrame({
+        "word": columns[0],
+        "start": columns[1].astype(np.int64),
+        "end": columns[2].astype(np.int64),
+        "rest": columns[3],
+    }, index=texts.index)
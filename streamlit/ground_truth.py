@@ -0,0 +1,285 @@
+# ground_truth.py
+"""
+SingStat ground truth for I1 (occupation) and I2 (industry): employed
+residents by sex from data.gov.sg, as one table per kind with columns
+[occupation|industry], male, female, total, male_share, female_share, real_diff.
+
+    ground_truth.prefetch("occupation")   # start fetching, returns immediately
+    ...                                   # run the analysis meanwhile
+    gt = ground_truth.get("occupation")   # the table, or None if unavailable
+
+Lookups go to, in order: this process's memory; the disk cache
+(FAIRSEA_GT_CACHE_DIR, default ~/.cache/fairsea/ground_truth) while younger
+than the TTL (FAIRSEA_GT_TTL_HOURS, default a week); the API, fetching the
+female and male datasets concurrently; then a stale cache entry. With
+FAIRSEA_OFFLINE=1 the API is never contacted, so only a cache entry of any age
+can serve. A cache entry that cannot be read counts as a miss. FAIRSEA_SINGSTAT_URL
+points the fetch at another server, e.g. a local stand-in for tests.
+`status(kind)` says where the table came from and why a fetch or the cache failed.
+
+    python streamlit/ground_truth.py status    # resolve both tables and print their status
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from timing import span, timed
+
+logger = logging.getLogger("fairsea.ground_truth")
+
+API_URL = "https://data.gov.sg/api/action/datastore_search"
+TIMEOUT_S = 20
+DEFAULT_TTL_HOURS = 24 * 7
+# A kind that resolved to nothing is not retried sooner than this
+RETRY_AFTER_S = 300
+
+# data.gov.sg resource ids and the rows that bracket the per-category block (from the notebook)
+DATASETS = {
+    "occupation": {
+        "female": "d_8edfaa8f0eb39484897594b631b9b3db",
+        "male": "d_0ffa357488160f26f108be7969fc1ac0",
+        "female_start": "All Occupation Groups, (Total Employed Female Residents)",
+        "male_start": "All Occupation Groups, (Total Employed Male Residents)",
+    },
+    "industry": {
+        "female": "d_a31f7f149ba860506c127ab0e0f62985",
+        "male": "d_5854d81fe22ed46e8e365214b52f4f27",
+        "female_start": "All Industries (Employed Female Residents)",
+        "male_start": "All Industries (Employed Male Residents)",
+    },
+}
+
+_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ground-truth")
+_lock = threading.Lock()
+_futures = {}
+_status = {}
+
+def _after_fork_in_child():
+    # A forked child inherits pending futures but not the pool threads that would
+    # finish them; waiting on one would hang. Keep resolved tables, refetch the rest.
+    global _pool, _lock
+    _pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ground-truth")
+    _lock = threading.Lock()
+    for kind, (fut, _) in list(_futures.items()):
+        if not fut.done():
+            del _futures[kind]
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+def _env_flag(name):
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+def offline():
+    return _env_flag("FAIRSEA_OFFLINE")
+
+def cache_dir():
+    return os.environ.get("FAIRSEA_GT_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "fairsea", "ground_truth")
+
+def ttl_s():
+    value = os.environ.get("FAIRSEA_GT_TTL_HOURS")
+    try:
+        hours = DEFAULT_TTL_HOURS if value is None else float(value)
+    except ValueError:
+        logger.warning("FAIRSEA_GT_TTL_HOURS=%r is not a number; using %s", value, DEFAULT_TTL_HOURS)
+        hours = DEFAULT_TTL_HOURS
+    return hours * 3600
+
+# -----------------------------------------------------
+# Parsing
+# -----------------------------------------------------
+def _latest_year_col(df):
+    year_cols = [c for c in df.columns if str(c).isdigit()]
+    return str(max(map(int, year_cols))) if year_cols else None
+
+def _slice(df, year, start_label, sex):
+    """
+    The rows between the all-categories total and the first age-group row
+    (as done in the original notebook); all rows if those markers are missing.
+    """
+    try:
+        stop = df.index[df['DataSeries'].str.startswith(f'Employed {sex} Residents Aged 15 - 19 Years', na=False)][0]
+        start = df.index[df['DataSeries'] == start_label][0]
+        return df.loc[start:stop - 1, ['DataSeries', year]]
+    except Exception:
+        return df[["DataSeries", year]]
+
+def _shares(ss):
+    ss["total"] = ss["male"] + ss["female"]
+    ss["male_share"] = (ss["male"] / ss["total"].replace({0: np.nan})).fillna(0)
+    ss["female_share"] = (ss["female"] / ss["total"].replace({0: np.nan})).fillna(0)
+    ss["real_diff"] = ss["female_share"] - ss["male_share"]
+    return ss
+
+def parse(kind, records_f, records_m):
+    """The ground-truth table for `kind` from the raw female and male datastore records (None if unusable)."""
+    spec = DATASETS[kind]
+    df_f, df_m = pd.DataFrame(records_f), pd.DataFrame(records_m)
+    if kind == "industry":
+        df_f['DataSeries'] = df_f['DataSeries'].str.strip()
+        df_m['DataSeries'] = df_m['DataSeries'].str.strip()
+    yf, ym = _latest_year_col(df_f), _latest_year_col(df_m)
+    if yf is None or ym is None:
+        return None
+
+    female = _slice(df_f, yf, spec["female_start"], "Female").rename(columns={"DataSeries": kind, yf: "female"})
+    male = _slice(df_m, ym, spec["male_start"], "Male").rename(columns={"DataSeries": kind, ym: "male"})
+    ss = pd.merge(male, female, on=kind, how="inner")
+    ss[kind] = ss[kind].str.strip().str.lower()
+    if kind == "industry":
+        ss = ss[~ss["industry"].isin(["services", "total", "all industries"])]
+        # one row per industry
+        ss = ss.groupby('industry', as_index=False).agg({'male': 'sum', 'female': 'sum'})
+    ss["male"] = pd.to_numeric(ss["male"], errors="coerce").fillna(0)
+    ss["female"] = pd.to_numeric(ss["female"], errors="coerce").fillna(0)
+    return _shares(ss)
+
+# -----------------------------------------------------
+# Sources
+# -----------------------------------------------------
+def _fetch_records(resource_id):
+    import requests
+
+    base = os.environ.get("FAIRSEA_SINGSTAT_URL") or API_URL
+    resp = requests.get(base, params={"resource_id": resource_id, "limit": 5000}, timeout=TIMEOUT_S)
+    resp.raise_for_status()
+    return resp.json()["result"]["records"]
+
+def fetch(kind):
+    """Fetch and parse `kind` from the API, both sexes concurrently. Raises on failure."""
+    spec = DATASETS[kind]
+    with span(f"fetch {kind} ground truth"), ThreadPoolExecutor(max_workers=2) as pool:
+        female, male = pool.map(_fetch_records, [spec["female"], spec["male"]])
+    table = parse(kind, female, male)
+    if table is None or table.empty:
+        raise ValueError(f"SingStat {kind} datasets have no usable year column or rows")
+    return table
+
+def _paths(directory, kind):
+    return os.path.join(directory, f"{kind}.csv"), os.path.join(directory, f"{kind}.json")
+
+def _read(directory, kind):
+    """(table, metadata) from a cache directory, or (None, None); raises ValueError on an unreadable entry."""
+    table_path, meta_path = _paths(directory, kind)
+    if not os.path.exists(table_path):
+        return None, None
+    try:
+        table = pd.read_csv(table_path)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"unreadable cache {table_path}: {type(e).__name__}: {e}") from e
+    missing = {kind, "male", "female", "female_share", "real_diff"} - set(table.columns)
+    if table.empty or missing:
+        raise ValueError(f"unreadable cache {table_path}: no rows or missing columns {sorted(missing)}")
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            fetched_at = float(json.load(f)["fetched_at"])
+    except (OSError, ValueError, KeyError, TypeError):
+        fetched_at = os.path.getmtime(table_path)
+    return table, {"fetched_at": fetched_at}
+
+def _write(directory, kind, table, fetched_at):
+    os.makedirs(directory, exist_ok=True)
+    table_path, meta_path = _paths(directory, kind)
+    # write-then-rename so concurrent readers never see half a file
+    tmp = f"{table_path}.{os.getpid()}.tmp"
+    table.to_csv(tmp, index=False)
+    os.replace(tmp, table_path)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"kind": kind, "fetched_at": fetched_at,
+                   "fetched_at_utc": datetime.fromtimestamp(fetched_at, timezone.utc).isoformat(timespec="seconds")}, f)
+
+@timed
+def load(kind):
+    """Resolve `kind` through cache, API and fallbacks (see module docstring); records status(kind)."""
+    try:
+        cached, meta = _read(cache_dir(), kind)
+        cache_error = None
+    except ValueError as e:
+        cached, meta, cache_error = None, None, str(e)
+        logger.warning("SingStat %s: %s", kind, cache_error)
+    age = None if meta is None else time.time() - meta["fetched_at"]
+    if cached is not None and (age < ttl_s() or offline()):
+        return _resolved(kind, cached, "cache", meta)
+
+    error = "offline" if offline() else None
+    if not offline():
+        try:
+            table = fetch(kind)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.warning("SingStat %s fetch failed: %s", kind, error)
+        else:
+            fetched_at = time.time()
+            try:
+                _write(cache_dir(), kind, table, fetched_at)
+            except OSError as e:
+                logger.warning("could not cache SingStat %s table: %s", kind, e)
+            return _resolved(kind, table, "api", {"fetched_at": fetched_at})
+
+    if cached is not None:
+        return _resolved(kind, cached, "stale cache", meta, error)
+    return _resolved(kind, None, "unavailable", None, "; ".join(e for e in (error, cache_error) if e) or None)
+
+def _resolved(kind, table, source, meta, error=None):
+    with _lock:
+        _status[kind] = {"source": source, "fetched_at": None if meta is None else meta.get("fetched_at"), "error": error}
+    return table
+
+# -----------------------------------------------------
+# Public API
+# -----------------------------------------------------
+def prefetch(kind):
+    """
+    Start resolving `kind` in the background; returns the future. Later calls
+    share it until it is older than the TTL, or than RETRY_AFTER_S if it
+    resolved to nothing; a future that raised is replaced at once.
+    """
+    with _lock:
+        fut, started = _futures.get(kind, (None, 0.0))
+        age = time.time() - started
+        raised = fut is not None and fut.done() and fut.exception() is not None
+        empty = fut is not None and fut.done() and not raised and fut.result() is None
+        if fut is None or raised or age > ttl_s() or (empty and age > RETRY_AFTER_S):
+            fut = _pool.submit(load, kind)
+            _futures[kind] = (fut, time.time())
+        return fut
+
+def get(kind):
+    """The ground-truth table for `kind` (a copy), or None when no source has it."""
+    table = prefetch(kind).result()
+    return None if table is None else table.copy()
+
+def wait():
+    """Block until every fetch started by `prefetch` has resolved, e.g. before forking workers."""
+    with _lock:
+        pending = [fut for fut, _ in _futures.values()]
+    for fut in pending:
+        fut.result()
+
+def status(kind):
+    """Where the last resolved table for `kind` came from: source, fetched_at (epoch s) and error."""
+    with _lock:
+        return dict(_status.get(kind, {"source": None, "fetched_at": None, "error": None}))
+
+def clear():
+    """Forget the in-memory tables (the disk cache stays)."""
+    with _lock:
+        _futures.clear()
+        _status.clear()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SingStat ground-truth cache.")
+    parser.add_argument("command", choices=["status"])
+    parser.parse_args()
+    for kind in DATASETS:
+        load(kind)
+        print(kind, json.dumps(status(kind)))
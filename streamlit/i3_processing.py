@@ -1,39 +1,34 @@
-import re
 import numpy as np
 import pandas as pd
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
 from bias_metrics import *
-
-# ensure vader lexicon is available (harmless if already present)
-nltk.download('vader_lexicon', quiet=True)
-analyzer = SentimentIntensityAnalyzer()
-
-def process_i3(df):
-    """Process prompt group I3.
-    - Extract binary decision (Yes/No) from the start of `llm_output` and run categorical analyses.
-    - Compute sentiment on the remaining justification text for exploratory continuous analyses.
-    """
-    i3 = df[df['prompt_id_full'].astype(str).str.startswith('I3')].copy()
-    i3 = i3.reset_index(drop=True)
-
-    # Decision extraction (permissive): pick the first standalone 'yes' or 'no' anywhere in the text
-    # This is robust to forms like 'Decision: Yes', 'Yes — because...', or 'I think no.'
-    i3['decision'] = i3['llm_output'].str.extract(r'(?i)\b(yes|no)\b', expand=False)
-    i3['decision'] = i3['decision'].str.capitalize().fillna('Unknown')
-
-    # Justification: remove only the first matched 'yes'/'no' so sentiment is computed on the rest
-    def _remove_first_yesno(s):
-        return re.sub(r'(?i)\b(yes|no)\b', '', str(s), count=1).strip()
-
-    i3['justification'] = i3['llm_output'].apply(_remove_first_yesno)
+from extraction import split_first
+from timing import timed
+from sentiment import sentiment_scores
+
+@timed
+def prepare(df):
+    """Filter I3 rows, extract `decision` and score the `justification` sentiment."""
+    i3 = df[df['prompt_id_full'].astype(str).str.startswith('I3')].reset_index(drop=True)
+
+    # Decision (permissive): the first standalone 'yes' or 'no' anywhere in the text, robust to forms
+    # like 'Decision: Yes', 'Yes — because...' or 'I think no.'. The justification is the text with
+    # only that word removed, so sentiment is computed on the rest.
+    found = split_first(i3['llm_output'], ['yes', 'no'])
+    i3['decision'] = found['word'].str.capitalize().fillna('Unknown')
+    i3['decision_start'] = found['start']
+    i3['decision_end'] = found['end']
+    i3['justification'] = found['rest']
 
     # Sentiment score (compound) for justification
-    i3['sentiment_score'] = i3['justification'].apply(lambda x: analyzer.polarity_scores(str(x))['compound'])
+    i3['sentiment_score'] = sentiment_scores(i3['justification'])
+    return i3
 
+@timed
+def analyze(i3):
+    """Run categorical analyses on a frame returned by `prepare`."""
     # Primary dashboard focus: decision (categorical)
     demo_results = run_demographic_analysis_categorical(i3, output_col='decision')
-    inter_results = run_intersectional_analysis_categorical(i3, output_col='decision', plot=True)
+    inter_results = run_intersectional_analysis_categorical(i3, output_col='decision')
 
     # We also return sentiment stats (not used as primary outcome here)
     sentiment_summary = i3.groupby(['Gender','Race'])['sentiment_score'].mean().reset_index()
@@ -45,7 +40,14 @@ def process_i3(df):
         'sentiment_summary': sentiment_summary
     }
 
+@timed
+def process_i3(df):
+    """Process prompt group I3.
+    - Extract binary decision (Yes/No) from the start of `llm_output` and run categorical analyses.
+    - Compute sentiment on the remaining justification text for exploratory continuous analyses.
+    """
+    return analyze(prepare(df))
+
 def sample(df):
-    i3 = df[df['prompt_id_full'].astype(str).str.startswith('I3')].copy()
-    i3 = i3.reset_index(drop=True)
+    i3 = df[df['prompt_id_full'].astype(str).str.startswith('I3')].reset_index(drop=True)
     return i3.sample(n=min(5, len(i3)), random_state=42)[['prompt_text','llm_output']]
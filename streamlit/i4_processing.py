@@ -1,15 +1,14 @@
 import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer, util
 import re
 from bias_metrics import *
+from timing import timed
+from semantic import assign_semantic_category
 
-def process_i4(df):
-    """Process prompt group I4 by mapping `llm_output` into semantic categories
-    via sentence-transformers anchors, then run categorical analyses.
-    """
-    i4 = df[df['prompt_id_full'].astype(str).str.startswith('I4')].copy()
-    i4 = i4.reset_index(drop=True)
+@timed
+def prepare(df):
+    """Filter I4 rows and assign `semantic_category` via sentence-transformers anchors."""
+    i4 = df[df['prompt_id_full'].astype(str).str.startswith('I4')].reset_index(drop=True)
 
     # Define semantic categories (kept small/representative — taken from the notebook)
     categories = {
@@ -24,26 +23,16 @@ def process_i4(df):
         ]
     }
 
-    # Compute embeddings and assign semantic_category
-    i4 = i4.reset_index(drop=True)
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-    response_embeddings = model.encode(i4['llm_output'].astype(str).tolist(), normalize_embeddings=True)
-
-    anchor_texts = []
-    anchor_labels = []
-    for label, examples in categories.items():
-        for ex in examples:
-            anchor_texts.append(ex)
-            anchor_labels.append(label)
-
-    anchor_embeddings = model.encode(anchor_texts, normalize_embeddings=True)
-    similarity_matrix = util.cos_sim(response_embeddings, anchor_embeddings)
-    category_indices = np.argmax(similarity_matrix.numpy(), axis=1)
-    i4['semantic_category'] = [anchor_labels[i] for i in category_indices]
+    # Compute embeddings and assign semantic_category (shared, cached embeddings)
+    i4['semantic_category'] = assign_semantic_category(i4['llm_output'].astype(str), categories)
+    return i4
 
+@timed
+def analyze(i4):
+    """Run categorical analyses on a frame returned by `prepare`."""
     # Run categorical analyses
     demo_results = run_demographic_analysis_categorical(i4, output_col='semantic_category')
-    inter_results = run_intersectional_analysis_categorical(i4, output_col='semantic_category', plot=True)
+    inter_results = run_intersectional_analysis_categorical(i4, output_col='semantic_category')
 
     return {
         'is_continuous': False,
@@ -51,7 +40,13 @@ def process_i4(df):
         'intersectional': inter_results
     }
 
+@timed
+def process_i4(df):
+    """Process prompt group I4 by mapping `llm_output` into semantic categories
+    via sentence-transformers anchors, then run categorical analyses.
+    """
+    return analyze(prepare(df))
+
 def sample(df):
-    i4 = df[df['prompt_id_full'].astype(str).str.startswith('I4')].copy()
-    i4 = i4.reset_index(drop=True)
+    i4 = df[df['prompt_id_full'].astype(str).str.startswith('I4')].reset_index(drop=True)
     return i4.sample(n=min(5, len(i4)), random_state=42)[['prompt_text','llm_output']]
@@ -0,0 +1,210 @@
+# memory.py
+"""
+Memory accounting and the per-analysis memory budget.
+
+Before a processor runs, `plan` estimates its peak working set from the size
+of the prompt group's rows and picks how to execute it within the budget:
+
+- "full": `process_*` on all rows, as usual;
+- "chunked": `prepare` on bounded row chunks (so embedding matrices and
+  extraction temporaries never exist for all rows at once), then `analyze`
+  on the concatenated result;
+- "sampled": as chunked, on a demographically stratified sample small enough
+  to fit; every Gender × Race × Nationality (× model) cell keeps at least one row.
+
+Only `prepare` is chunked: `analyze` needs every row at once (crosstabs,
+MixedLM), so the prepared frame and analyze's working set over it must fit
+the budget too. A group is chunked only when they do (`analyze_mb`) and is
+sampled down to fit otherwise.
+
+The budget is a ceiling on this process's resident memory: the
+FAIRSEA_MEMORY_BUDGET_MB environment variable (or the CLI's --memory-budget),
+otherwise 80% of what is currently available to the process. Set
+FAIRSEA_TRACEMALLOC=1 (or pass --tracemalloc) to also record the Python
+allocation peak of every timing span; it slows analysis down noticeably.
+"""
+import logging
+import math
+import os
+import sys
+import tracemalloc
+
+from startup import rss_mb
+
+logger = logging.getLogger("fairsea.memory")
+
+BUDGET_ENV = "FAIRSEA_MEMORY_BUDGET_MB"
+TRACEMALLOC_ENV = "FAIRSEA_TRACEMALLOC"
+DEFAULT_BUDGET_SHARE = 0.8
+
+# Peak working set as a multiple of the group's input rows in memory, measured
+# on the demo data (filtered frame, derived columns, crosstabs, MixedLM design)
+FULL_FACTOR = 4.0
+# Prepared frame as a multiple of the input rows (I3's extracted columns, the largest)
+PREPARED_FACTOR = 1.5
+# Peak of `analyze` as a multiple of the prepared frame: the frame plus its
+# crosstabs and design matrices, or the frame twice while pd.concat joins chunks
+ANALYZE_FACTOR = 2.0
+CHUNK_ROWS = 50_000
+MIN_CHUNK_ROWS = 1_000
+MIN_SAMPLE_ROWS = 2_000
+STRATA = ["Gender", "Race", "Nationality", "model"]
+
+# -----------------------------------------------------
+# Measurements
+# -----------------------------------------------------
+def peak_rss_mb():
+    """
+    This process's resident-memory high-water mark in MB: VmHWM, which
+    `reset_peak_rss` can lower, else the lifetime ru_maxrss.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2**10
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+def reset_peak_rss():
+    """Reset the high-water mark to the current RSS (Linux); False where the platform cannot."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _read_int(path):
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    return int(value) if value.isdigit() else None
+
+def available_mb():
+    """Memory this process could still grow into: the cgroup limit if there is one, else MemAvailable."""
+    limit = _read_int("/sys/fs/cgroup/memory.max") or _read_int("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+    used = _read_int("/sys/fs/cgroup/memory.current") or _read_int("/sys/fs/cgroup/memory/memory.usage_in_bytes")
+    # cgroup v1 reports "no limit" as a huge number
+    if limit is not None and used is not None and limit < 2**60:
+        return max(limit - used, 0) / 2**20
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 2**10
+    except (OSError, ValueError):
+        pass
+    return None
+
+def budget_mb(budget=None):
+    """The RSS ceiling for this process in MB: `budget`, the environment setting, or a share of what is available."""
+    if budget is None and os.environ.get(BUDGET_ENV):
+        budget = float(os.environ[BUDGET_ENV])
+    if budget is not None:
+        return float(budget)
+    rss, available = rss_mb(), available_mb()
+    if rss is None or available is None:
+        return None
+    return rss + DEFAULT_BUDGET_SHARE * available
+
+def split_budget(budget, n, threads=True):
+    """
+    Per-worker budget when `n` analyses run at once: threads share this
+    process (each gets its RSS plus a share of the headroom), worker
+    processes each get a share of the headroom.
+    """
+    if budget is None or n <= 1:
+        return budget
+    rss = rss_mb() or 0.0
+    share = max(budget - rss, 0.0) / n
+    return rss + share if threads else share
+
+def start_tracing():
+    """Start tracemalloc; from then on timing spans record their Python allocation peak."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def tracing_requested():
+    """Whether FAIRSEA_TRACEMALLOC asks for allocation tracing."""
+    return os.environ.get(TRACEMALLOC_ENV, "").lower() in ("1", "true", "yes")
+
+# -----------------------------------------------------
+# Planning
+# -----------------------------------------------------
+def frame_mb(df, rows=None, sample=1_000):
+    """In-memory size (MB) of `rows` (positions, default all) of df, extrapolated from a sample."""
+    n = len(df) if rows is None else len(rows)
+    if n == 0:
+        return 0.0
+    step = max(n // sample, 1)
+    positions = range(0, len(df), step) if rows is None else rows[::step]
+    probe = df.iloc[positions]
+    return probe.memory_usage(deep=True, index=False).sum() / len(probe) * n / 2**20
+
+def plan(df, rows=None, budget=None):
+    """
+    How to run an analysis over `rows` (positions in df, default all) within
+    the budget. Returns a dict with `mode` ("full", "chunked" or "sampled"),
+    `rows`, `estimate_mb`, `headroom_mb`, `budget_mb`, and for the downgraded
+    modes `chunk_rows`, `analyze_mb` (the estimated peak of `analyze`, which
+    runs on all planned rows at once) and (sampled) `fraction`.
+    """
+    n = len(df) if rows is None else len(rows)
+    input_mb = float(frame_mb(df, rows))
+    budget = budget_mb(budget)
+    headroom = None if budget is None else budget - (rss_mb() or 0.0)
+    decision = {"mode": "full", "rows": n, "estimate_mb": round(float(input_mb) * FULL_FACTOR, 1),
+                "headroom_mb": None if headroom is None else round(headroom, 1),
+                "budget_mb": None if budget is None else round(budget, 1)}
+    if headroom is None or input_mb * FULL_FACTOR <= headroom or n <= MIN_SAMPLE_ROWS:
+        return decision
+
+    per_row_mb = input_mb / n
+    prepared_mb = input_mb * PREPARED_FACTOR
+    fraction = min(1.0, max(headroom, 0.0) / (prepared_mb * ANALYZE_FACTOR))
+    if fraction < 1.0:
+        decision["mode"] = "sampled"
+        decision["fraction"] = math.ceil(max(fraction, MIN_SAMPLE_ROWS / n) * 1e4) / 1e4
+    else:
+        decision["mode"] = "chunked"
+    kept = decision.get("fraction", 1.0)
+    decision["analyze_mb"] = round(prepared_mb * kept * ANALYZE_FACTOR, 1)
+    # One chunk's temporaries get the headroom left after the prepared rows
+    spare = max(headroom, 0.0) - prepared_mb * kept
+    decision["chunk_rows"] = int(min(CHUNK_ROWS, max(MIN_CHUNK_ROWS, spare / (per_row_mb * FULL_FACTOR))))
+    logger.warning("memory budget: %s rows need ~%.0f MB with %.0f MB headroom; running %s",
+                   n, decision["estimate_mb"], headroom, decision["mode"])
+    return decision
+
+def stratified_sample(df, rows, fraction, by=None, seed=0):
+    """
+    A sample of the row positions `rows` of df keeping `fraction` of every
+    stratum (the STRATA columns present, or `by`), at least one row each, in
+    their original order.
+    """
+    import numpy as np
+
+    rows = np.asarray(rows)
+    by = [c for c in (by or STRATA) if c in df.columns]
+    order = np.random.default_rng(seed).permutation(len(rows))
+    if not by:
+        return np.sort(rows[order[:max(1, math.ceil(len(rows) * fraction))]])
+    keys = df[by].iloc[rows[order]].groupby(by, sort=False, dropna=False)
+    rank = keys.cumcount().to_numpy()
+    size = keys[by[0]].transform("size").to_numpy()
+    quota = np.maximum(1, np.ceil(size * fraction))
+    return np.sort(rows[order[rank < quota]])
+
+def chunks(positions, chunk_rows):
+    """Consecutive slices of `positions` of at most `chunk_rows`."""
+    for start in range(0, len(positions), chunk_rows):
+        yield positions[start:start + chunk_rows]
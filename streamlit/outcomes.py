@@ -0,0 +1,73 @@
+# outcomes.py
+"""
+Canonical outcome labels for free-text categorical prompt groups (D3).
+
+Raw outputs vary in case, quoting, punctuation and wording, and every distinct
+phrasing would otherwise become its own contingency column. Canonicalization
+runs in two stages:
+
+    d3["outcome"] = canonical(d3["llm_output"], SYNONYMS)     # prepare: row-wise
+    outcome, summary = top_k(d3["outcome"])                   # analyze: all rows
+
+`canonical` normalizes each distinct output once (bias_metrics.clean_output,
+then surrounding punctuation) and maps synonyms onto one label. It only looks
+at single rows, so it is safe in chunked `prepare`. `top_k` needs the label
+frequencies over the whole analyzed frame: it keeps the most frequent labels
+and folds the rest into "other", so contingency tables have at most
+`max_outcomes` columns however many phrasings the model produced. `summary`
+lists every label with its count and the bucket it went to. When the frame is
+analyzed in parts (runner.run_stratified), the labels to keep are chosen once
+over all parts and passed to each as `keep`, so every part has the same columns.
+"""
+import numpy as np
+import pandas as pd
+
+from bias_metrics import clean_output
+
+OTHER = "other"
+# outcome columns including "other"; matches the dashboard's heatmap width (render.MAX_COLS)
+MAX_OUTCOMES = 15
+PUNCTUATION = " .,;:!?-–—()[]*`'\"“”‘’"
+
+def normalize(text):
+    """clean_output, then leading/trailing punctuation; None for missing or empty outputs."""
+    text = clean_output(text)
+    if text is None:
+        return None
+    return text.strip(PUNCTUATION) or None
+
+def canonical(outputs, synonyms=None):
+    """Normalized, synonym-mapped label per output (None where empty); each distinct output is normalized once."""
+    outputs = pd.Series(outputs)
+    synonyms = {normalize(k): normalize(v) for k, v in (synonyms or {}).items()}
+    codes, uniques = pd.factorize(outputs)
+    labels = [normalize(u) for u in uniques]
+    labels = np.array([synonyms.get(label, label) for label in labels] + [None], dtype=object)
+    return pd.Series(labels[codes], index=outputs.index, name="outcome")
+
+def top_k(labels, max_outcomes=MAX_OUTCOMES, other=OTHER, keep=None):
+    """
+    (outcome, summary): `labels` with all but the `max_outcomes - 1` most
+    frequent (ties alphabetical) replaced by `other`, and a table of label,
+    count, share and bucket sorted by count. Nothing is folded when there are
+    at most `max_outcomes` labels; a label equal to `other` stays in `other`.
+    With `keep` (labels chosen over a larger frame) exactly those labels stay.
+    """
+    labels = pd.Series(labels)
+    codes, uniques = pd.factorize(labels)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    names = np.asarray(uniques, dtype=object)
+    order = np.lexsort((names.astype(str), -counts))
+    buckets = names.copy()
+    if keep is not None:
+        keep = set(keep)
+        buckets[[name not in keep for name in names]] = other
+    elif len(uniques) > max_outcomes:
+        ranked = [i for i in order if names[i] != other]
+        buckets[ranked[max(max_outcomes - 1, 1):]] = other
+    bucketed = np.append(buckets, None)[codes]
+
+    summary = pd.DataFrame({"label": names[order], "count": counts[order], "bucket": buckets[order]})
+    summary["share"] = summary["count"] / max(counts.sum(), 1)
+    summary = summary[["label", "count", "share", "bucket"]]
+    return pd.Series(bucketed, index=labels.index, name=labels.name), summary
@@ -0,0 +1,151 @@
+# profiler.py
+"""
+Opt-in sampling profiler for a single analysis run.
+
+    with Profiler(name="D3") as prof:
+        outputs = run_processor("D3", df)
+    prof.write("results/D3")     # profile.speedscope.json + profile.folded
+    prof.top(20)                 # hot functions: self and total seconds
+
+A background thread reads the profiled thread's stack from
+`sys._current_frames()` every `interval` seconds and weights each sample by
+the time since the previous one, so samples delayed by the GIL still add up to
+wall time. Frames already on the stack when profiling started (Streamlit's
+script runner, the CLI) are left out. Work done in other processes, e.g. the
+per-stratum workers of run_stratified, is not sampled.
+
+Open the .speedscope.json at https://www.speedscope.app; the .folded file
+(one `a;b;c weight_us` line per stack) feeds flamegraph.pl or inferno.
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+DEFAULT_INTERVAL = 0.005
+SPEEDSCOPE_FILE = "profile.speedscope.json"
+FOLDED_FILE = "profile.folded"
+
+class Profiler:
+    """Sample the stack of the thread that enters it (or of every thread with `all_threads`)."""
+
+    def __init__(self, name="profile", interval=DEFAULT_INTERVAL, all_threads=False):
+        self.name = name
+        self.interval = interval
+        self.all_threads = all_threads
+        self.frames = []      # (name, file, line) per frame index
+        self.samples = []     # tuples of frame indices, root first
+        self.weights = []     # seconds per sample
+        self.wall_s = 0.0
+        self._frame_index = {}
+        self._outer = set()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self._target = threading.get_ident()
+        # frames below the profiled block belong to the caller, not the run
+        frame = sys._getframe(1)
+        while frame is not None:
+            self._outer.add(id(frame))
+            frame = frame.f_back
+        self._stop.clear()
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="fairsea-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.wall_s = time.perf_counter() - self._start
+        return False
+
+    def _sample(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            targets = [t for t in frames if t != own] if self.all_threads else [self._target]
+            for tid in targets:
+                frame = frames.get(tid)
+                if frame is not None:
+                    self._record(frame, now - last)
+            last = now
+
+    def _record(self, frame, weight):
+        stack = []
+        while frame is not None and id(frame) not in self._outer:
+            code = frame.f_code
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            index = self._frame_index.get(key)
+            if index is None:
+                index = self._frame_index[key] = len(self.frames)
+                self.frames.append(key)
+            stack.append(index)
+            frame = frame.f_back
+        if stack:
+            self.samples.append(tuple(reversed(stack)))
+            self.weights.append(weight)
+
+    # -----------------------------------------------------
+    # Reports
+    # -----------------------------------------------------
+    def _label(self, index):
+        name, path, line = self.frames[index]
+        return f"{name} ({os.path.basename(path)}:{line})"
+
+    def top(self, n=20):
+        """The `n` functions with the most self (then total) time: function, file, self_s, total_s, self_pct."""
+        import pandas as pd
+
+        self_s, total_s = {}, {}
+        for stack, weight in zip(self.samples, self.weights):
+            self_s[stack[-1]] = self_s.get(stack[-1], 0.0) + weight
+            for index in set(stack):
+                total_s[index] = total_s.get(index, 0.0) + weight
+        sampled = sum(self.weights) or 1.0
+        rows = [{"function": self.frames[i][0], "file": f"{self.frames[i][1]}:{self.frames[i][2]}",
+                 "self_s": self_s.get(i, 0.0), "total_s": t, "self_pct": 100 * self_s.get(i, 0.0) / sampled}
+                for i, t in total_s.items()]
+        table = pd.DataFrame(rows, columns=["function", "file", "self_s", "total_s", "self_pct"])
+        return table.sort_values(["self_s", "total_s"], ascending=False).head(n).reset_index(drop=True)
+
+    def speedscope(self):
+        """The profile as a speedscope "sampled" document."""
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": "fairsea-profiler",
+            "shared": {"frames": [{"name": name, "file": path, "line": line} for name, path, line in self.frames]},
+            "profiles": [{
+                "type": "sampled",
+                "name": self.name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(self.weights),
+                "samples": [list(s) for s in self.samples],
+                "weights": self.weights,
+            }],
+        }
+
+    def folded(self):
+        """Collapsed stacks (`root;...;leaf weight`) with weights in microseconds."""
+        totals = {}
+        for stack, weight in zip(self.samples, self.weights):
+            totals[stack] = totals.get(stack, 0.0) + weight
+        return "".join(f"{';'.join(self._label(i) for i in stack)} {round(w * 1e6)}\n"
+                       for stack, w in sorted(totals.items()))
+
+    def write(self, directory, prefix=""):
+        """Write the speedscope and folded files into `directory`; returns their paths."""
+        os.makedirs(directory, exist_ok=True)
+        speedscope_path = os.path.join(directory, prefix + SPEEDSCOPE_FILE)
+        folded_path = os.path.join(directory, prefix + FOLDED_FILE)
+        with open(speedscope_path, "w", encoding="utf-8") as f:
+            json.dump(self.speedscope(), f)
+        with open(folded_path, "w", encoding="utf-8") as f:
+            f.write(self.folded())
+        return [speedscope_path, folded_path]
@@ -0,0 +1,163 @@
+# render.py
+"""
+Rendering layer: turns the data returned by `process_*` into charts.
+
+Metric computation never draws anything; the dashboard asks for a chart only
+for the section the user actually opens. Two heatmap backends:
+
+- "interactive": a Vega-Lite (Altair) spec carrying only the row-normalized
+  table, drawn in the browser with hover tooltips and zoom/pan.
+- "image": PNGs built on a small thread pool with the object-oriented
+  Matplotlib API and cached on (kind, table content hash, style), so repeated
+  views, reruns and other sessions looking at the same table cost nothing.
+"""
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+BACKENDS = {"interactive": "Interactive (browser)", "image": "Image (server)"}
+DEFAULT_BACKEND = "interactive"
+
+# Heatmaps never show more than this many rows/columns (see heatmap_view)
+MAX_ROWS = 40
+MAX_COLS = 15
+
+DPI = 150
+_CACHE_SIZE = 256
+
+_pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix="render")
+_png_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def table_key(table):
+    """Content hash of a DataFrame (values, index and columns)."""
+    values = pd.util.hash_pandas_object(table, index=True).values
+    return (table.shape, tuple(map(str, table.columns)), hash(values.tobytes()))
+
+def _to_png(build):
+    fig = build()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=DPI)
+    return buf.getvalue()
+
+def _submit(key, build):
+    """Future for the PNG of `key`; concurrent requests for the same key share one render."""
+    with _cache_lock:
+        fut = _png_cache.get(key)
+        if fut is not None:
+            _png_cache.move_to_end(key)
+            return fut
+        fut = _pool.submit(_to_png, build)
+        _png_cache[key] = fut
+        if len(_png_cache) > _CACHE_SIZE:
+            _png_cache.popitem(last=False)
+
+    def _forget_failure(f):
+        if f.exception() is not None:
+            with _cache_lock:
+                if _png_cache.get(key) is f:
+                    del _png_cache[key]
+
+    fut.add_done_callback(_forget_failure)
+    return fut
+
+# -----------------------------------------------------
+# Large tables
+# -----------------------------------------------------
+def heatmap_view(ct_pct, rank_by="FDI"):
+    """
+    The part of a row-normalized table a heatmap actually shows: the MAX_ROWS
+    most deviating rows (by FDI or JSD) and the MAX_COLS - 1 most common
+    outputs, the rest merged into "other". Small tables pass through unchanged,
+    so every renderer's cost is bounded regardless of table shape.
+    """
+    from bias_metrics import compact_table
+    return compact_table(ct_pct, max_rows=MAX_ROWS, max_cols=MAX_COLS, rank_by=rank_by)
+
+# -----------------------------------------------------
+# PNG renderers
+# -----------------------------------------------------
+def _heatmap_job(ct_pct, title=None, cmap="coolwarm"):
+    from bias_metrics import plot_heatmap
+    ct_pct = heatmap_view(ct_pct)
+    return (("heatmap", table_key(ct_pct), title, cmap, DPI),
+            lambda: plot_heatmap(ct_pct, title=title, cmap=cmap))
+
+def _distribution_job(summary):
+    from bias_metrics import plot_distribution
+    key = ("hist", table_key(summary["counts"]), hash(summary["edges"].tobytes()),
+           summary["score_col"], summary["group_col"], DPI)
+    return key, lambda: plot_distribution(summary, kde=True, alpha=0.5, figsize=(8, 5))
+
+def heatmap_png(ct_pct, title=None, cmap="coolwarm"):
+    """PNG bytes of a heatmap of a row-normalized table (demographic, intersectional or GT comparison)."""
+    return _submit(*_heatmap_job(ct_pct, title, cmap)).result()
+
+def distribution_png(summary):
+    """PNG bytes of the per-group histograms and KDEs for a continuous result's `distribution` summary."""
+    return _submit(*_distribution_job(summary)).result()
+
+def heatmap_pngs(tables):
+    """
+    Render several heatmaps concurrently. `tables` is a list of
+    (ct_pct, title) pairs; returns PNG bytes in the same order.
+    """
+    futures = [_submit(*_heatmap_job(ct_pct, title)) for ct_pct, title in tables]
+    return [f.result() for f in futures]
+
+# -----------------------------------------------------
+# Client-side (Vega-Lite) renderers
+# -----------------------------------------------------
+_CELL_PX = 16
+_MAX_CHART_PX = 900
+
+def _labels_expr(labels):
+    """A Vega expression array literal, looked up by integer position."""
+    return json.dumps([str(label) for label in labels])
+
+def heatmap_chart(ct_pct, title=None, decimals=4):
+    """
+    Altair heatmap of a row-normalized table (via heatmap_view) for drawing in the browser.
+    The payload is one (row, col, value) integer/float triple per cell; labels travel once as arrays in the spec. Cells sit on quantitative
+    axes so the chart supports zoom and pan (scroll / drag, double-click resets).
+    """
+    import altair as alt
+
+    ct_pct = heatmap_view(ct_pct)
+    values = ct_pct.to_numpy(dtype=float)
+    r, c = (~pd.isna(values)).nonzero()
+    data = pd.DataFrame({"r": r, "c": c, "v": values[r, c].round(decimals)})
+
+    rows, cols = _labels_expr(ct_pct.index), _labels_expr(ct_pct.columns)
+    nrows, ncols = ct_pct.shape
+    width = min(_MAX_CHART_PX, max(240, _CELL_PX * 2 * ncols))
+    height = min(_MAX_CHART_PX, max(160, _CELL_PX * nrows))
+
+    def axis(labels, n, title):
+        return alt.Axis(title=title, values=[i + 0.5 for i in range(n)], labelExpr=f"{labels}[floor(datum.value)]",
+                        labelLimit=160, grid=False, labelOverlap=True)
+
+    return (
+        alt.Chart(data, title=title or "")
+        .transform_calculate(row=f"{rows}[datum.r]", col=f"{cols}[datum.c]", r2="datum.r + 1", c2="datum.c + 1")
+        .mark_rect()
+        .encode(
+            x=alt.X("c:Q", scale=alt.Scale(domain=[0, ncols], nice=False),
+                    axis=axis(cols, ncols, ct_pct.columns.name)),
+            x2="c2:Q",
+            y=alt.Y("r:Q", scale=alt.Scale(domain=[nrows, 0], nice=False),
+                    axis=axis(rows, nrows, ct_pct.index.name)),
+            y2="r2:Q",
+            color=alt.Color("v:Q", title="Share", scale=alt.Scale(scheme="redblue", reverse=True)),
+            tooltip=[alt.Tooltip("row:N", title=ct_pct.index.name or "Group"),
+                     alt.Tooltip("col:N", title=ct_pct.columns.name or "Output"),
+                     alt.Tooltip("v:Q", title="Share", format=".2%")],
+        )
+        .properties(width=width, height=height)
+        .interactive()
+    )
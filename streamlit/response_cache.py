@@ -0,0 +1,98 @@
+# response_cache.py
+"""
+Persistent cache of LLM answers shared by every collection run.
+
+An answer is keyed by what determines it: the model, the SHA-256 of the prompt
+text, the sampling parameters (temperature, max_tokens) and the run index, the
+n-th independent sample of that prompt. Prompt ids do not enter the key, so
+adding a model or raising NUM_RUNS from 3 to 5 reuses runs 1-3 of every
+prompt and only queries what is new, whichever notebook or file asked first.
+
+    with ResponseCache("data/responses.sqlite") as cache:
+        cache.lookup("gpt-4o-mini", temperature=1)       # {(prompt_sha256, run): llm_output}
+        cache.put("gpt-4o-mini", prompt, 1, None, run=4, output="...")
+
+The cache is one SQLite file (FAIRSEA_RESPONSE_CACHE, default
+~/.cache/fairsea/responses.sqlite) in WAL mode; every put is committed, so it
+survives a crash as the collector's checkpoint does.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import time
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    model TEXT NOT NULL,
+    prompt_sha256 TEXT NOT NULL,
+    temperature REAL NOT NULL,
+    max_tokens INTEGER NOT NULL,
+    run INTEGER NOT NULL,
+    prompt_text TEXT NOT NULL,
+    llm_output TEXT NOT NULL,
+    total_tokens INTEGER,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (model, prompt_sha256, temperature, max_tokens, run)
+)
+"""
+_RUN_SUFFIX = re.compile(r"-(\d+)$")
+
+def default_path():
+    return os.environ.get("FAIRSEA_RESPONSE_CACHE") or os.path.join(
+        os.path.expanduser("~"), ".cache", "fairsea", "responses.sqlite")
+
+def prompt_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def run_indices(prompts):
+    """
+    Run index per prompt row: the `run_id` column if present, else the
+    trailing -<n> of prompt_id_full (e.g. D1-male-Chinese-Filipino-3), else 1.
+    """
+    if "run_id" in prompts.columns:
+        run = pd.to_numeric(prompts["run_id"], errors="coerce")
+    else:
+        run = pd.to_numeric(prompts["prompt_id_full"].astype(str).str.extract(_RUN_SUFFIX, expand=False),
+                            errors="coerce")
+    return run.fillna(1).astype(int).tolist()
+
+class ResponseCache:
+    """Answers by (model, prompt_sha256, temperature, max_tokens, run); max_tokens None is stored as 0."""
+
+    def __init__(self, path=None):
+        self.path = path or default_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(SCHEMA)
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def lookup(self, model, temperature, max_tokens=None):
+        """{(prompt_sha256, run): llm_output} cached for `model` at these sampling parameters."""
+        rows = self._db.execute(
+            "SELECT prompt_sha256, run, llm_output FROM responses WHERE model = ? AND temperature = ? AND max_tokens = ?",
+            (model, float(temperature), max_tokens or 0))
+        return {(sha, run): output for sha, run, output in rows}
+
+    def put(self, model, prompt, temperature, max_tokens, run, output, total_tokens=None):
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (model, prompt_hash(prompt), float(temperature), max_tokens or 0, int(run), prompt, output,
+             total_tokens, time.time()))
+        self._db.commit()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
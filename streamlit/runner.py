@@ -0,0 +1,174 @@
+# runner.py
+import contextvars
+import importlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import ground_truth
+import memory
+from startup import step
+from timing import span
+
+PROMPT_GROUPS = ["D1", "D2", "D3", "D4", "I1", "I2", "I3", "I4"]
+
+# -----------------------------------------------------
+# Processor dispatch
+# -----------------------------------------------------
+def load_processor(domain):
+    """
+    Import the `{domain}_processing` module for a prompt group.
+    Raises ModuleNotFoundError if there is no module, AttributeError if it
+    does not define `process_{domain}`.
+    """
+    with step(f"import {domain.lower()}_processing", kind="import"):
+        mod = importlib.import_module(f"{domain.lower()}_processing")
+    func_name = f"process_{domain.lower()}"
+    if not callable(getattr(mod, func_name, None)):
+        raise AttributeError(f"Module {mod.__name__} does not define {func_name}().")
+    return mod
+
+def group_rows(df, domain):
+    """Positions of the rows of df that belong to a prompt group."""
+    return np.flatnonzero(df["prompt_id_full"].astype(str).str.startswith(domain).to_numpy())
+
+def _prepare_planned(mod, df, rows, execution):
+    """`prepare` over the planned rows: chunk by chunk, on a stratified sample when sampled."""
+    if execution["mode"] == "sampled":
+        rows = memory.stratified_sample(df, rows, execution["fraction"])
+        execution["sampled_rows"] = len(rows)
+    with span("prepare in chunks", rows=len(rows), chunk_rows=execution["chunk_rows"]):
+        parts = [mod.prepare(df.iloc[chunk]) for chunk in memory.chunks(rows, execution["chunk_rows"])]
+        prepared = pd.concat(parts, ignore_index=True)
+    # `analyze` is not chunked: it runs on this whole frame, budgeted by analyze_mb
+    execution["prepared_mb"] = round(float(memory.frame_mb(prepared)), 1)
+    return prepared
+
+def run_processor(domain, df, budget=None):
+    """
+    Run `process_{domain}` on df (same as the dashboard's Run Analysis)
+    within the memory budget (MB, see memory.budget_mb): when the group's
+    rows would not fit, `prepare` runs in chunks, on a stratified sample if
+    need be. outputs["execution"] records the plan and the peak RSS of this
+    run (None where it cannot be measured, see timing).
+    """
+    mod = load_processor(domain)
+    rows = group_rows(df, domain)
+    execution = memory.plan(df, rows, budget)
+    with span(f"run {domain}", rows=len(rows), mode=execution["mode"]) as run:
+        if execution["mode"] == "full":
+            outputs = getattr(mod, f"process_{domain.lower()}")(df)
+        else:
+            outputs = mod.analyze(_prepare_planned(mod, df, rows, execution))
+    execution["peak_rss_mb"] = _round_mb(run.rss_peak_mb)
+    outputs["execution"] = execution
+    return outputs
+
+# -----------------------------------------------------
+# Stratified execution
+# -----------------------------------------------------
+def _round_mb(mb):
+    return None if mb is None else round(mb, 1)
+
+def _analyze_stratum(domain, stratum, pooled):
+    """Process-pool worker: run the analysis half of a processor on one stratum; returns (outputs, peak RSS)."""
+    with span(f"analyze {domain}", rows=len(stratum)) as s:
+        outputs = load_processor(domain).analyze(stratum.reset_index(drop=True), **pooled)
+    return outputs, s.rss_peak_mb
+
+def run_stratified(df, domain, by="model", max_workers=None, budget=None):
+    """
+    Run a prompt-group processor separately for each value of `by`.
+    The expensive per-row step (`prepare`: embeddings, sentiment, extraction)
+    runs once on the pooled data; only `analyze` is fanned out per stratum
+    across a process pool. Choices `analyze` makes over all rows (e.g. D3's
+    top outcomes) are fixed once on the pooled data by the module's optional
+    `pool(prepared)`, so every stratum is analyzed with the same ones.
+    `prepare` follows the memory plan as in run_processor.
+    Returns dict with per-stratum outputs, a cross-stratum comparison table
+    and the execution plan, with the peak RSS of this process
+    (peak_rss_mb) and of the largest worker (worker_peak_rss_mb).
+    """
+    mod = load_processor(domain)
+    rows = group_rows(df, domain)
+    execution = memory.plan(df, rows, budget)
+    with span(f"prepare {domain}", rows=len(rows), mode=execution["mode"]) as run:
+        prepared = mod.prepare(df) if execution["mode"] == "full" else _prepare_planned(mod, df, rows, execution)
+    if by not in prepared.columns:
+        raise KeyError(f"Cannot stratify {domain}: column '{by}' not found")
+
+    pooled = mod.pool(prepared) if hasattr(mod, "pool") else {}
+    strata = {name: group for name, group in prepared.groupby(by, sort=True)}
+    # Ground truth prefetched by `prepare` (I1/I2) resolves here, once, so the
+    # forked workers inherit the table instead of fetching it again each
+    ground_truth.wait()
+    # Spans inside the worker processes are only logged; this one covers them all
+    with span(f"analyze per {by}", rows=len(prepared), strata=len(strata)) as fan_out, \
+            ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {name: pool.submit(_analyze_stratum, domain, group, pooled) for name, group in strata.items()}
+        finished = {name: fut.result() for name, fut in futures.items()}
+    results = {name: outputs for name, (outputs, _) in finished.items()}
+    execution["peak_rss_mb"] = _round_mb(max((p for p in (run.rss_peak_mb, fan_out.rss_peak_mb) if p is not None),
+                                             default=None))
+    execution["worker_peak_rss_mb"] = _round_mb(max((p for _, p in finished.values() if p is not None),
+                                                    default=None))
+
+    return {
+        "by": by,
+        "strata": results,
+        "comparison": compare_strata(results, by=by),
+        "execution": execution,
+    }
+
+def compare_strata(results, by="model"):
+    """
+    Flatten per-stratum outputs into one row per (stratum, demographic) with
+    chi², p, mean FDI, mean JSD (categorical) or the test statistic, p and
+    mean |DBI| (continuous).
+    """
+    rows = []
+    for name, outputs in results.items():
+        for demo, res in outputs["demographic"].items():
+            row = {by: name, "demographic": demo, "chi2": np.nan, "stat": np.nan,
+                   "p": res.get("p"), "FDI": np.nan, "JSD": np.nan, "DBI": np.nan}
+            if outputs["is_continuous"]:
+                row["stat"] = res["stat"]
+                row["DBI"] = float(res["dbi"].iloc[:, 0].abs().mean())
+            else:
+                row["chi2"] = res["chi2"]
+                row["FDI"] = float(res["fdi"]["FDI"].mean())
+                row["JSD"] = float(res["jsd"]["JSD"].mean())
+            rows.append(row)
+    table = pd.DataFrame(rows, columns=[by, "demographic", "chi2", "stat", "p", "FDI", "JSD", "DBI"])
+    return table.dropna(axis=1, how="all")
+
+# -----------------------------------------------------
+# Run all prompt groups
+# -----------------------------------------------------
+def available_groups(df):
+    """Prompt groups present in df['prompt_id_full'] that have a processing module."""
+    present = set(df["prompt_id_full"].astype(str).str.split("-", n=1).str[0].unique())
+    return [g for g in PROMPT_GROUPS if g in present]
+
+def run_all(df, groups=None, max_workers=None, budget=None):
+    """
+    Run every processor in `groups` (default: all available) concurrently.
+    Uses threads so all processors share the same DataFrame, the loaded
+    embedding model and the sentiment cache. Yields (domain, outputs, error)
+    as each group finishes; exactly one of outputs/error is None.
+    Each worker runs in a copy of the caller's context, so its timing spans
+    nest under the caller's open span. Concurrent groups split the memory budget.
+    """
+    groups = available_groups(df) if groups is None else list(groups)
+    workers = max_workers or len(groups) or 1
+    budget = memory.split_budget(memory.budget_mb(budget), min(workers, len(groups)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(contextvars.copy_context().run, run_processor, domain, df, budget): domain
+                   for domain in groups}
+        for fut in as_completed(futures):
+            domain = futures[fut]
+            try:
+                yield domain, fut.result(), None
+            except Exception as e:
+                yield domain, None, e
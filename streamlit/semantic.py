@@ -0,0 +1,75 @@
+# semantic.py
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from startup import step
+from timing import span
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Most recently used embeddings kept per process; a 384-dim float32 vector is
+# 1.5 KB, so ~150 MB at most
+EMBEDDING_CACHE_SIZE = 100_000
+
+_encode_lock = threading.Lock()
+_embedding_cache = OrderedDict()
+
+@lru_cache(maxsize=None)
+def get_embedding_model(name=EMBEDDING_MODEL):
+    """Load the SentenceTransformer once per process and share it across processors."""
+    with step("import sentence_transformers", kind="import"):
+        from sentence_transformers import SentenceTransformer
+    with step(f"load SentenceTransformer {name}"):
+        return SentenceTransformer(name)
+
+def encode(texts, name=EMBEDDING_MODEL):
+    """
+    Normalized embeddings for `texts`, computed once per distinct string.
+    The EMBEDDING_CACHE_SIZE most recently used embeddings are cached per
+    process, so the same response text seen by several prompt groups (or
+    several runs) is only encoded once.
+    """
+    texts = [str(t) for t in texts]
+    if not texts:
+        raise ValueError("encode() needs at least one text")
+    with _encode_lock:
+        found = {}
+        for t in dict.fromkeys(texts):
+            if (name, t) in _embedding_cache:
+                _embedding_cache.move_to_end((name, t))
+                found[t] = _embedding_cache[(name, t)]
+        missing = [t for t in dict.fromkeys(texts) if t not in found]
+        if missing:
+            model = get_embedding_model(name)
+            with span("embed", rows=len(missing)):
+                vectors = model.encode(missing, normalize_embeddings=True)
+            for t, v in zip(missing, vectors):
+                found[t] = _embedding_cache[(name, t)] = v
+            while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+                _embedding_cache.popitem(last=False)
+        return np.vstack([found[t] for t in texts])
+
+def assign_semantic_category(texts, categories):
+    """
+    Map each text to the category whose anchor phrase is most cosine-similar.
+    `categories` is {label: [anchor phrases]}. Returns a list of labels.
+    """
+    anchor_texts, anchor_labels = [], []
+    for label, examples in categories.items():
+        for ex in examples:
+            anchor_texts.append(ex)
+            anchor_labels.append(label)
+
+    unique_texts = list(dict.fromkeys(str(t) for t in texts))
+    if not unique_texts:
+        return []
+    response_embeddings = encode(unique_texts)
+    anchor_embeddings = encode(anchor_texts)
+
+    # Embeddings are L2-normalized, so the dot product is the cosine similarity
+    similarity_matrix = response_embeddings @ anchor_embeddings.T
+    category_indices = np.argmax(similarity_matrix, axis=1)
+    label_of = {t: anchor_labels[i] for t, i in zip(unique_texts, category_indices)}
+    return [label_of[str(t)] for t in texts]
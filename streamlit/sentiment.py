@@ -0,0 +1,38 @@
+# sentiment.py
+import threading
+from functools import lru_cache
+
+import pandas as pd
+
+from startup import step
+from timing import span
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+def get_analyzer():
+    """VADER analyzer shared by every processor; the lexicon is fetched on first use."""
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            with step("import nltk", kind="import"):
+                import nltk
+                from nltk.sentiment.vader import SentimentIntensityAnalyzer
+            with step("nltk.download vader_lexicon"):
+                nltk.download('vader_lexicon', quiet=True)
+            with step("load VADER analyzer"):
+                _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+@lru_cache(maxsize=200_000)
+def sentiment_score(text):
+    """VADER compound score (-1 very negative → +1 very positive), memoized per text."""
+    return get_analyzer().polarity_scores(str(text))['compound']
+
+def sentiment_scores(texts):
+    """Compound scores for a Series of texts, scoring each distinct text once."""
+    texts = pd.Series(texts).astype(str)
+    unique = texts.unique()
+    with span("sentiment", rows=len(unique)):
+        scores = {t: sentiment_score(t) for t in unique}
+    return texts.map(scores).astype(float)
@@ -0,0 +1,150 @@
+# startup.py
+"""
+Cold-start profiler.
+
+Import and initialization steps (module imports, the nltk lexicon download,
+the SentenceTransformer load, the demo CSV parse) are wrapped in `step(name)`,
+which records wall time and resident memory the first time each step runs in
+this process. `report()` returns the structured report; the dashboard shows it
+on a hidden page (`?page=startup`) and `python streamlit/startup.py` profiles a
+fresh interpreter headlessly, for tracking cold-start regressions per release.
+"""
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger("fairsea.startup")
+
+_T0 = time.perf_counter()
+_STARTED_AT = datetime.now(timezone.utc).isoformat(timespec="seconds")
+_steps = {}
+_lock = threading.Lock()
+
+def rss_mb():
+    """Current resident set size in MB (peak RSS where the current value is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    except ImportError:
+        return None
+
+@contextmanager
+def step(name, kind="init"):
+    """
+    Record wall time and RSS change of the block under `name`.
+    Only the first (cold) run of a step is kept; later runs, e.g. on Streamlit
+    reruns where imports are already cached, record nothing.
+    """
+    with _lock:
+        seen = name in _steps
+    if seen:
+        yield
+        return
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        end = time.perf_counter()
+        rss_after = rss_mb()
+        entry = {
+            "name": name,
+            "kind": kind,
+            "start_s": round(start - _T0, 4),
+            "wall_s": round(end - start, 4),
+            "rss_mb": None if rss_after is None else round(rss_after, 1),
+            "rss_delta_mb": None if rss_after is None or rss_before is None else round(rss_after - rss_before, 1),
+        }
+        if error is not None:
+            entry["error"] = error
+        with _lock:
+            _steps.setdefault(name, entry)
+        logger.info(json.dumps({"event": "startup_step", **entry}))
+
+def report():
+    """Structured startup report for this process: environment plus steps in start order."""
+    with _lock:
+        steps = sorted(_steps.values(), key=lambda s: s["start_s"])
+    return {
+        "started_at": _STARTED_AT,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pid": os.getpid(),
+        "uptime_s": round(time.perf_counter() - _T0, 4),
+        "rss_mb": None if rss_mb() is None else round(rss_mb(), 1),
+        "steps": steps,
+    }
+
+def write_report(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, indent=2)
+
+# -----------------------------------------------------
+# Headless cold-start profile
+# -----------------------------------------------------
+APP_MODULES = ["pandas", "streamlit", "bias_metrics", "runner", "batch", "bundle", "render"]
+
+def cold_start(demo_path="data/consolidated_prompts.csv", processors=True, models=False):
+    """
+    Run the dashboard's startup sequence in this (fresh) process: app imports,
+    the demo CSV parse, optionally every processing module and the models.
+    Returns the report.
+    """
+    import importlib
+
+    for module in APP_MODULES:
+        with step(f"import {module}", kind="import"):
+            importlib.import_module(module)
+    if demo_path and os.path.exists(demo_path):
+        from batch import load_responses
+        with step("parse demo CSV", kind="data"):
+            load_responses(demo_path)
+    if processors:
+        from runner import PROMPT_GROUPS, load_processor
+        for group in PROMPT_GROUPS:
+            try:
+                load_processor(group)
+            except Exception as e:
+                logger.warning("could not import %s processor: %s", group, e)
+    if models:
+        from semantic import get_embedding_model
+        from sentiment import get_analyzer
+        for load in (get_analyzer, get_embedding_model):
+            try:
+                load()
+            except Exception as e:
+                logger.warning("could not load %s: %s", load.__name__, e)
+    return report()
+
+if __name__ == "__main__":
+    import argparse
+
+    # Use the importable module so steps recorded by runner/semantic/sentiment land in the same report
+    import startup
+
+    parser = argparse.ArgumentParser(description="Profile a cold start of the FAIR-SEA dashboard.")
+    parser.add_argument("--demo", default="data/consolidated_prompts.csv", help="Demo dataset to parse ('' to skip).")
+    parser.add_argument("--models", action="store_true", help="Also load the VADER lexicon and the embedding model.")
+    parser.add_argument("--out", default=None, help="Write the JSON report here instead of stdout.")
+    args = parser.parse_args()
+    result = startup.cold_start(args.demo, models=args.models)
+    if args.out:
+        startup.write_report(args.out)
+    else:
+        print(json.dumps(result, indent=2))
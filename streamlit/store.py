@@ -0,0 +1,141 @@
+# store.py
+"""
+Append-only response store: the consolidated_prompts rows as a directory of
+zstd-compressed Parquet files, hive-partitioned by model and prompt group.
+
+    data/responses/model=gpt-4o-mini/group=D2/part-20261019T101500-3f2a9c1e-0.parquet
+
+    store.append(final_df, "data/responses")                      # after a collection run
+    d2 = store.read("data/responses", models=["gpt-4o-mini"], groups=["D2"])
+
+`append` writes new files into the partitions the frame touches and never
+rewrites existing ones. Rows whose (model, prompt_id_full) the store already
+holds are skipped, as are unanswered rows (llm_output missing), so appending
+the full result of a resumed or extended run adds only its new answers.
+`read` lists the partition directories and opens only the files under those
+that match `models` and `groups`; the other partitions are never read.
+The group is the prompt_id_full prefix (D1, I3, ...), as in batch.analyze.
+"""
+import os
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import unquote
+
+import pandas as pd
+
+PARTITIONS = ("model", "group")
+COMPRESSION = "zstd"
+
+def group_of(prompt_ids):
+    return pd.Series(prompt_ids).astype(str).str.split("-", n=1).str[0].str.upper()
+
+def is_store(path):
+    return os.path.isdir(path)
+
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([(name, pa.string()) for name in PARTITIONS]), flavor="hive")
+
+def _values(directory, name):
+    """{decoded value: path} of the `name=value` sub-directories of `directory`."""
+    found = {}
+    if not os.path.isdir(directory):
+        return found
+    for entry in os.scandir(directory):
+        if entry.is_dir() and entry.name.startswith(name + "="):
+            found[unquote(entry.name[len(name) + 1:])] = entry.path
+    return found
+
+def partitions(root, models=None, groups=None):
+    """[(model, group, directory)] of the partitions matching `models` and `groups` (None = all)."""
+    models = None if models is None else set(models)
+    groups = None if groups is None else {g.upper() for g in groups}
+    selected = []
+    for model, model_dir in sorted(_values(root, "model").items()):
+        if models is not None and model not in models:
+            continue
+        for group, group_dir in sorted(_values(model_dir, "group").items()):
+            if groups is None or group in groups:
+                selected.append((model, group, group_dir))
+    return selected
+
+def version(root, models=None, groups=None):
+    """
+    Token that changes whenever a file is added to the selected partitions
+    (their directories' mtimes), for caching what was read from them.
+    """
+    return tuple((directory, os.stat(directory).st_mtime_ns) for _, _, directory in partitions(root, models, groups))
+
+def _tables(root, models=None, groups=None, columns=None):
+    """One Arrow table per file of the selected partitions, with the partition `model` column added."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tables = []
+    for model, _, directory in partitions(root, models, groups):
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".parquet"):
+                continue
+            path = os.path.join(directory, name)
+            wanted = None if columns is None else [c for c in columns if c in pq.read_schema(path).names]
+            table = pq.read_table(path, columns=wanted)
+            if columns is None or "model" in columns:
+                table = table.append_column("model", pa.array([model] * table.num_rows, type=pa.string()))
+            tables.append(table)
+    return tables
+
+def read(root, models=None, groups=None, columns=None):
+    """
+    The stored rows of the selected partitions in the consolidated_prompts
+    schema, `model` included; `columns` limits the columns read. Files
+    written by runs with other columns are combined, missing values as nulls.
+    """
+    import pyarrow as pa
+
+    tables = _tables(root, models, groups, columns)
+    if not tables:
+        return pd.DataFrame(columns=columns or [])
+    df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+    return df if columns is None else df[[c for c in columns if c in df.columns]]
+
+def stored_keys(root, models=None, groups=None):
+    """Set of (model, prompt_id_full) held by the selected partitions."""
+    keys = read(root, models, groups, columns=["model", "prompt_id_full"])
+    return set(zip(keys["model"], keys["prompt_id_full"])) if len(keys) else set()
+
+def append(df, root):
+    """
+    Write the new answers in `df` (consolidated_prompts schema, with `model`)
+    as new files under `root`; returns the number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    df = df[df["llm_output"].notna()].copy()
+    df["group"] = group_of(df["prompt_id_full"]).to_numpy()
+    if df.empty:
+        return 0
+    existing = stored_keys(root, models=df["model"].unique(), groups=df["group"].unique())
+    if existing:
+        df = df[[key not in existing for key in zip(df["model"], df["prompt_id_full"])]]
+    df = df.drop_duplicates(["model", "prompt_id_full"], keep="last")
+    if df.empty:
+        return 0
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # a column that is empty in this run is stored as string, not Arrow's null type
+    table = table.cast(pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                                  for f in table.schema]))
+    run = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+    ds.write_dataset(
+        table,
+        root,
+        format="parquet",
+        partitioning=_partitioning(),
+        basename_template=f"part-{run}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_options=ds.ParquetFileFormat().make_write_options(compression=COMPRESSION),
+    )
+    return len(df)
@@ -0,0 +1,200 @@
+# synthetic.py
+"""
+Synthetic response logs in the consolidated_prompts schema.
+
+A profile is learned from a real log (the demo CSV by default): the personas
+of each prompt group (demographics, name, prompt text), the models, each
+group's share of rows and its pool of outputs with their frequencies and
+distinct-output rate. `generate` then yields chunks of any total size whose
+ids keep each persona's id stem and count runs upward, e.g.
+`I1-Singaporean-Chinese-Male-Tan_Wei_Jie-6` (`[Group]-[Nationality]-[Race]-
+[Gender]-[Name]-[Run]`) or `D1-male-Chinese-Filipino-6` for the D-series:
+
+- short answers ("Promising.", "Yes") are drawn from the group's pool with
+  their observed frequencies, so they repeat as they do in real logs;
+- longer answers are new texts at the group's observed distinct rate: the
+  head of one pool output joined to the tail of another at a random word
+  position (the first word, e.g. I3's Yes/No, always comes from the head);
+  groups whose answers mention the persona by name (I3) only splice that
+  persona's own outputs.
+
+Known biases can be injected as output weight multipliers conditional on a
+demographic value, e.g. {"D3": {("Gender", "Female"): {"Incompetent": 3.0}}};
+values and output keys match case-insensitively, outputs as prefixes ("Yes"
+matches "Yes, ...").
+`write` streams chunks to CSV or Parquet, so memory stays bounded by the
+chunk size.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["Gender", "Race", "Nationality", "prompt_text", "prompt_id_full", "llm_output", "model"]
+DEMO_PATH = os.path.join("data", "consolidated_prompts.csv")
+CHUNK_SIZE = 100_000
+
+# -----------------------------------------------------
+# Profile
+# -----------------------------------------------------
+def load_profile(path=DEMO_PATH):
+    """Learn personas, models, group shares and output pools from a response log."""
+    df = pd.read_csv(path, low_memory=False)
+    ids = df["prompt_id_full"].astype(str)
+    parts = ids.str.split("-")
+    df = df.assign(
+        group=parts.str[0],
+        stem=ids.str.rsplit("-", n=1).str[0],
+        # only the I-series ids carry a name: Group-Nationality-Race-Gender-Name-Run
+        name=parts.apply(lambda p: p[4] if len(p) == 6 else ""),
+        llm_output=df["llm_output"].astype(str),
+    )
+
+    groups = {}
+    for group, rows in df.groupby("group", sort=True):
+        personas = rows.drop_duplicates("stem")[["Gender", "Race", "Nationality", "stem", "name", "prompt_text"]]
+        mentions_name = rows.apply(
+            lambda r: bool(r["name"]) and r["name"].replace("_", " ").lower() in r["llm_output"].lower(), axis=1
+        ).mean()
+        counts = rows["llm_output"].value_counts()
+        groups[group] = {
+            "share": len(rows) / len(df),
+            "personas": personas.reset_index(drop=True),
+            "outputs": counts.index.to_numpy(dtype=object),
+            "weights": (counts / counts.sum()).to_numpy(),
+            "distinct_rate": len(counts) / len(rows),
+            "splice": rows["llm_output"].str.split().str.len().mean() >= 4,
+            # per-persona pools for groups whose answers name the person
+            "by_name": rows.groupby("stem")["llm_output"].apply(lambda s: s.to_numpy(dtype=object)).to_dict()
+                       if mentions_name > 0.5 else None,
+        }
+    return {"models": sorted(df["model"].dropna().unique()), "groups": groups}
+
+# -----------------------------------------------------
+# Generation
+# -----------------------------------------------------
+def _bias_weights(outputs, weights, persona, rules):
+    """Output probabilities for one persona after applying the matching bias rules."""
+    w = weights.copy()
+    lowered = None
+    for (column, value), multipliers in rules.items():
+        if str(persona[column]).lower() != str(value).lower():
+            continue
+        if lowered is None:
+            lowered = np.array([o.lower() for o in outputs], dtype=object)
+        for prefix, factor in multipliers.items():
+            match = np.fromiter((o.startswith(prefix.lower()) for o in lowered), bool, len(outputs))
+            w[match] *= factor
+    return w / w.sum()
+
+def _splice(a, b, rng):
+    """A new answer from two existing ones: `a` up to a random word, then `b` from the same relative position."""
+    wa, wb = a.split(), b.split()
+    if len(wa) < 2 or len(wb) < 2:
+        return a
+    cut = int(rng.integers(1, len(wa)))
+    return " ".join(wa[:cut] + wb[max(1, round(cut / len(wa) * len(wb))):])
+
+def _group_outputs(spec, persona_idx, rules, rng):
+    personas = spec["personas"]
+    out = np.empty(len(persona_idx), dtype=object)
+    for p in np.unique(persona_idx):
+        rows = np.flatnonzero(persona_idx == p)
+        persona = personas.iloc[p]
+        if spec["by_name"] is not None:
+            outputs = spec["by_name"][persona["stem"]]
+            weights = np.full(len(outputs), 1 / len(outputs))
+        else:
+            outputs, weights = spec["outputs"], spec["weights"]
+        if rules:
+            weights = _bias_weights(outputs, weights, persona, rules)
+        drawn = rng.choice(outputs, size=len(rows), p=weights)
+        if spec["splice"]:
+            fresh = rng.random(len(rows)) < spec["distinct_rate"]
+            donors = rng.choice(outputs, size=int(fresh.sum()), p=weights)
+            drawn[fresh] = [_splice(a, b, rng) for a, b in zip(drawn[fresh], donors)]
+        out[rows] = drawn
+    return out
+
+def _group_chunk(group, spec, models, start, stop, rules, rng):
+    """Rows start..stop of one prompt group: personas cycle fastest, then models, then runs."""
+    i = np.arange(start, stop)
+    n_personas = len(spec["personas"])
+    persona_idx = i % n_personas
+    model_idx = (i // n_personas) % len(models)
+    run = i // (n_personas * len(models)) + 1
+
+    personas = spec["personas"].iloc[persona_idx].reset_index(drop=True)
+    ids = personas["stem"] + "-" + pd.Series(run).astype(str)
+    return pd.DataFrame({
+        "Gender": personas["Gender"],
+        "Race": personas["Race"],
+        "Nationality": personas["Nationality"],
+        "prompt_text": personas["prompt_text"],
+        "prompt_id_full": ids,
+        "llm_output": _group_outputs(spec, persona_idx, rules, rng),
+        "model": np.asarray(models, dtype=object)[model_idx],
+    }, columns=COLUMNS)
+
+def generate(n_rows, profile=None, groups=None, models=None, bias=None, seed=0, chunk_size=CHUNK_SIZE):
+    """
+    Yield DataFrames of at most `chunk_size` rows, `n_rows` in total, split
+    across `groups` (default: all in the profile) by their share in the
+    profile. `bias` is {group: {(column, value): {output prefix: multiplier}}}.
+    """
+    profile = profile or load_profile()
+    models = list(models or profile["models"])
+    specs = {g: s for g, s in profile["groups"].items() if groups is None or g in groups}
+    if not specs:
+        raise ValueError(f"No prompt groups to generate (requested {groups})")
+    rng = np.random.default_rng(seed)
+
+    total_share = sum(s["share"] for s in specs.values())
+    counts = {g: int(n_rows * s["share"] / total_share) for g, s in specs.items()}
+    counts[next(iter(counts))] += n_rows - sum(counts.values())
+
+    for group, count in counts.items():
+        rules = (bias or {}).get(group, {})
+        for start in range(0, count, chunk_size):
+            yield _group_chunk(group, specs[group], models, start, min(start + chunk_size, count), rules, rng)
+
+def write(path, n_rows, **kwargs):
+    """Stream `generate(n_rows, **kwargs)` to a .csv or .parquet file; returns rows written."""
+    written = 0
+    if str(path).lower().endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in generate(n_rows, **kwargs):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        for i, chunk in enumerate(generate(n_rows, **kwargs)):
+            chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            written += len(chunk)
+    return written
+
+def parse_bias(specs):
+    """
+    Parse CLI bias rules like "D3:Gender=Female:Incompetent=3" into the
+    `generate(bias=...)` structure.
+    """
+    bias = {}
+    for spec in specs or []:
+        try:
+            group, condition, effect = spec.split(":", 2)
+            column, value = condition.split("=", 1)
+            prefix, factor = effect.rsplit("=", 1)
+            factor = float(factor)
+        except ValueError:
+            raise ValueError(f"Bad bias rule '{spec}', expected GROUP:Column=Value:Output=multiplier")
+        bias.setdefault(group.upper(), {}).setdefault((column, value), {})[prefix] = factor
+    return bias
@@ -0,0 +1,186 @@
+# timing.py
+"""
+Lightweight nested timing spans.
+
+    with trace("D3") as root:
+        with span("prepare", rows=len(df)):
+            ...
+    records(root)   # flat rows for a table: path, depth, wall_s, self_s, rows
+
+Spans nest through a context variable, so a span opened inside another (in
+the same thread, or in a thread started with a copied context) becomes its
+child. Every finished span is also logged as one JSON line on the
+`fairsea.timing` logger at INFO. `timed` wraps a function in a span named
+after it, with the row count of its first argument.
+
+Each span also records resident memory at its end, the change over it and
+its own peak (rss_peak_mb: the kernel's high-water mark is reset when the span
+opens, after folding the peak so far into every span still open), and, while
+tracemalloc is tracing, the peak of Python allocations above the level at its
+start. All are process-wide, so spans running concurrently in other threads
+count towards each other's figures. Where the high-water mark cannot be reset
+(not Linux), rss_peak_mb is the lifetime peak if the span raised it, else None.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from memory import peak_rss_mb, reset_peak_rss
+from startup import rss_mb
+
+logger = logging.getLogger("fairsea.timing")
+
+_current = ContextVar("fairsea_span", default=None)
+# Spans measuring their RSS peak; the high-water mark is process-wide
+_open_lock = threading.Lock()
+_open = set()
+
+class Span:
+    __slots__ = ("name", "path", "rows", "attrs", "wall_s", "error", "children",
+                 "rss_mb", "rss_delta_mb", "rss_peak_mb", "py_peak_mb", "_traced_peak",
+                 "_rss_peak", "_rss_reset")
+
+    def __init__(self, name, path, rows=None, attrs=None):
+        self.name = name
+        self.path = path
+        self.rows = rows
+        self.attrs = attrs or {}
+        self.wall_s = None
+        self.error = None
+        self.children = []
+        self.rss_mb = None
+        self.rss_delta_mb = None
+        self.rss_peak_mb = None
+        self.py_peak_mb = None
+        # highest RSS seen before another span reset the high-water mark
+        self._rss_peak = None
+        self._rss_reset = False
+        # highest traced allocation seen before a child reset the tracemalloc peak
+        self._traced_peak = 0
+
+    def set_rows(self, rows):
+        self.rows = rows
+
+@contextmanager
+def span(name, rows=None, **attrs):
+    """Time the block as a child of the current span (or as a new root)."""
+    parent = _current.get()
+    s = Span(name, f"{parent.path}/{name}" if parent is not None else name, rows, attrs)
+    token = _current.set(s)
+    rss_before = rss_mb()
+    _start_rss_peak(s, rss_before)
+    traced_before = _start_traced_peak(parent)
+    start = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s.error = type(e).__name__
+        raise
+    finally:
+        s.wall_s = time.perf_counter() - start
+        s.rss_mb = rss_mb()
+        if s.rss_mb is not None and rss_before is not None:
+            s.rss_delta_mb = s.rss_mb - rss_before
+        _end_rss_peak(s)
+        _end_traced_peak(s, parent, traced_before)
+        _current.reset(token)
+        if parent is not None:
+            parent.children.append(s)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                "event": "span", "span": s.path, "wall_s": round(s.wall_s, 6), "rows": s.rows,
+                "rss_mb": _round(s.rss_mb), "rss_delta_mb": _round(s.rss_delta_mb), "rss_peak_mb": _round(s.rss_peak_mb),
+                "py_peak_mb": _round(s.py_peak_mb), "error": s.error, **s.attrs,
+            }, default=str))
+
+def _round(mb):
+    return None if mb is None else round(mb, 2)
+
+def _start_rss_peak(s, rss_before):
+    """Fold the high-water mark into the open spans, then reset it for `s`."""
+    with _open_lock:
+        peak = peak_rss_mb()
+        if peak is not None:
+            for other in _open:
+                other._rss_peak = max(other._rss_peak or 0.0, peak)
+        s._rss_reset = reset_peak_rss()
+        s._rss_peak = rss_before if s._rss_reset else peak
+        _open.add(s)
+
+def _end_rss_peak(s):
+    with _open_lock:
+        _open.discard(s)
+        peak = peak_rss_mb()
+    if peak is None:
+        return
+    if s._rss_reset:
+        s.rss_peak_mb = max(s._rss_peak or 0.0, peak)
+    elif s._rss_peak is None or peak > s._rss_peak:
+        s.rss_peak_mb = peak
+
+def _start_traced_peak(parent):
+    """Reset the tracemalloc peak for a new span, keeping the parent's peak so far; returns the current level."""
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    if parent is not None:
+        parent._traced_peak = max(parent._traced_peak, peak)
+    tracemalloc.reset_peak()
+    return current
+
+def _end_traced_peak(s, parent, traced_before):
+    if traced_before is None or not tracemalloc.is_tracing():
+        return
+    peak = max(s._traced_peak, tracemalloc.get_traced_memory()[1])
+    s.py_peak_mb = max(peak - traced_before, 0) / 2**20
+    if parent is not None:
+        parent._traced_peak = max(parent._traced_peak, peak)
+
+@contextmanager
+def trace(name, rows=None, **attrs):
+    """A root span, detached from any span already open; yields it for `records`."""
+    token = _current.set(None)
+    try:
+        with span(name, rows, **attrs) as root:
+            yield root
+    finally:
+        _current.reset(token)
+
+def _rows_of(args):
+    first = args[0] if args else None
+    return len(first) if hasattr(first, "shape") and hasattr(first, "__len__") else None
+
+def timed(func):
+    """Decorator: run `func` inside a span named after it."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(func.__name__, rows=_rows_of(args)):
+            return func(*args, **kwargs)
+    return wrapper
+
+def records(root):
+    """
+    Depth-first rows (name, path, depth, wall_s, self_s, rows, rss_mb,
+    rss_delta_mb, rss_peak_mb, py_peak_mb, error) for a span tree.
+    """
+    out = []
+
+    def visit(s, depth):
+        child_s = sum(c.wall_s or 0.0 for c in s.children)
+        out.append({
+            "name": s.name, "path": s.path, "depth": depth,
+            "wall_s": s.wall_s, "self_s": max((s.wall_s or 0.0) - child_s, 0.0),
+            "rows": s.rows, "rss_mb": s.rss_mb, "rss_delta_mb": s.rss_delta_mb, "rss_peak_mb": s.rss_peak_mb,
+            "py_peak_mb": s.py_peak_mb,
+            "error": s.error,
+        })
+        for c in s.children:
+            visit(c, depth + 1)
+
+    visit(root, 0)
+    return out
@@ -0,0 +1,64 @@
+# tests/test_alignment.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import alignment
+
+
+def _gt(kind, labels, male, female):
+    return pd.DataFrame({kind: labels, "male": male, "female": female})
+
+
+def _frame(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Gender": rng.choice(["Male", "Female", "Non-binary"], n, p=[0.45, 0.45, 0.1]),
+        "occupation_group": rng.choice(["professionals", "managers & administrators", "clerical support workers", "others"], n),
+        "model": rng.choice(["model-a", "model-b", "model-c"], n),
+    })
+
+
+def test_occupation_shares_match_a_groupby():
+    df = _frame()
+    gt = _gt("occupation", ["Professionals", "clerical support workers", "managers & administrators (including working proprietors)",
+                            "professionals", "agricultural"], [10, 30, 40, 5, 7], [20, 10, 60, 15, 3])
+    out = alignment.align(df, "occupation", gt)
+
+    mapped = df["occupation_group"].replace(alignment.OCCUPATION_TO_SS)
+    expected = pd.crosstab(mapped, df["Gender"], normalize="index")
+    comparison = out["comparison"].set_index("occupation")
+    assert list(comparison.index) == sorted(expected.index)
+    assert np.allclose(comparison["model_female_share"], expected.loc[comparison.index, "Female"])
+    # duplicate SingStat rows are summed; SingStat-only occupations are left out
+    assert comparison.loc["professionals", "actual_male_share"] == pytest.approx(15 / 50)
+    assert comparison.loc["others", "actual_female_share"] == 0
+    assert list(out["comparison_female"].index) == ["Model", "GroundTruth"]
+
+
+def test_industry_covers_model_and_ground_truth_categories():
+    df = pd.DataFrame({"Gender": ["Male", "Female", "Female", "Male"],
+                       "industry": ["retail trade", "wholesale trade", "education", np.nan]})
+    gt = _gt("industry", ["wholesale & retail trade", "construction"], [3, 9], [1, 1])
+    out = alignment.align(df, "industry", gt)
+    comparison = out["comparison"].set_index("industry")
+    assert list(comparison.index) == ["construction", "public administration & education", "wholesale & retail trade"]
+    assert comparison.loc["wholesale & retail trade", "model_male_share"] == 0.5
+    assert comparison.loc["construction", "model_male_share"] == 0
+    assert comparison.loc["construction", "actual_male_share"] == pytest.approx(0.9)
+    assert out["comparison_by_model"] is None
+
+
+def test_per_model_rows_match_aligning_each_model_alone():
+    df = _frame(seed=3)
+    gt = _gt("occupation", ["professionals", "clerical support workers"], [10, 30], [20, 10])
+    by_model = alignment.align(df, "occupation", gt)["comparison_by_model"]
+    assert sorted(by_model["model"].unique()) == ["model-a", "model-b", "model-c"]
+    for model, part in df.groupby("model"):
+        alone = alignment.align(part.drop(columns="model"), "occupation", gt)["comparison"].set_index("occupation")
+        rows = by_model[by_model["model"] == model].set_index("occupation").reindex(alone.index)
+        pd.testing.assert_frame_equal(rows.drop(columns="model"), alone)
+
+
+def test_no_ground_truth_gives_no_comparison():
+    assert alignment.align(_frame(), "occupation", None) == dict.fromkeys(alignment.OUTPUTS)
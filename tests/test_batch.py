@@ -0,0 +1,48 @@
+# tests/test_batch.py
+import json
+
+import numpy as np
+import pandas as pd
+
+from batch import analyze, metric_tables
+
+
+def _d3_frame(n=200, seed=2):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Gender": rng.choice(["Male", "Female"], n),
+        "Race": rng.choice(["Chinese", "Malay", "Indian"], n),
+        "Nationality": rng.choice(["Singaporean", "Malaysian"], n),
+        "llm_output": rng.choice(["polite", "rude"], n),
+        "model": "model-a",
+    })
+    df["prompt_id_full"] = "D3-" + df["Nationality"] + "-" + df["Race"] + "-" + df["Gender"] + "-X-1"
+    return df
+
+
+def test_metric_tables_drops_figures():
+    outputs = {"is_continuous": False, "demographic": {"Gender": {"chi2": np.float64(1.5), "fig": object(),
+                                                                  "fdi": pd.DataFrame({"FDI": [0.1]})}}}
+    tables, scalars = metric_tables(outputs)
+    assert list(tables) == ["demographic/Gender/fdi"]
+    assert scalars == {"is_continuous": False, "demographic/Gender/chi2": 1.5}
+
+
+def test_analyze_writes_tables_and_summary(tmp_path):
+    results, errors = analyze(_d3_frame(), groups=["D3"], out_dir=str(tmp_path), workers=1, fmt="csv")
+    assert not errors
+    tables, scalars = results["D3"]
+    assert "intersectional/Gender_Race_Nat/ct" in tables
+    assert (tmp_path / "D3" / "demographic__Race__fdi.csv").exists()
+    summary = json.loads((tmp_path / "summary.json").read_text())
+    assert "demographic/Race/fdi" in summary["D3"]["tables"]
+    metrics = json.loads((tmp_path / "D3" / "metrics.json").read_text())
+    assert metrics["demographic/Race/chi2"] == scalars["demographic/Race/chi2"]
+
+
+def test_analyze_profile_writes_profile_files(tmp_path):
+    results, errors = analyze(_d3_frame(), groups=["D3"], out_dir=str(tmp_path), workers=1, fmt="csv", profile=True)
+    assert not errors
+    assert (tmp_path / "D3" / "profile.speedscope.json").exists()
+    assert (tmp_path / "D3" / "profile.folded").exists()
+    assert "profile/top" in results["D3"][0]
@@ -0,0 +1,47 @@
+# tests/test_benchmarks.py
+import os
+
+import pandas as pd
+
+import bench
+from bench import compare_to_baseline, scale_dataset, uncovered
+
+
+def _case(name, wall_s, peak_rss_mb=200.0, **extra):
+    return {"kind": "metric", "name": name, "scale": 1, "rows": 100,
+            "wall_s": wall_s, "peak_rss_mb": peak_rss_mb, **extra}
+
+
+def test_scale_dataset_multiplies_rows():
+    df = pd.DataFrame({"prompt_id_full": ["D1-1", "I1-1"] * 5, "llm_output": list("abcdefghij")})
+    assert len(scale_dataset(df, 10)) == 100
+    assert scale_dataset(df, 1).equals(df)
+
+
+def test_compare_to_baseline_flags_slowdowns_growth_and_new_failures():
+    baseline = {"cases": [_case("fast", 1.0), _case("lean", 1.0), _case("ok", 1.0), _case("breaks", 1.0)]}
+    results = [
+        _case("fast", 1.5),
+        _case("lean", 1.0, peak_rss_mb=400.0),
+        _case("ok", 1.1),
+        {"kind": "metric", "name": "breaks", "scale": 1, "error": "ValueError: x"},
+    ]
+    regressions = compare_to_baseline(results, baseline, tolerance=0.25)
+    assert len(regressions) == 3
+    assert not any(r.startswith("ok") for r in regressions)
+
+
+def test_cases_the_baseline_never_measured_are_reported_not_skipped_silently():
+    baseline = {"cases": [_case("ok", 1.0), {"kind": "metric", "name": "embed", "scale": 1, "error": "ImportError"}]}
+    results = [_case("ok", 1.0), _case("embed", 5.0), _case("new", 1.0)]
+    assert compare_to_baseline(results, baseline) == []
+    assert uncovered(results, baseline) == ["embed @ 1x (baseline: ImportError)", "new @ 1x"]
+
+
+def test_a_baseline_with_failed_cases_is_not_saved(monkeypatch, tmp_path):
+    results = [_case("ok", 1.0), {"kind": "metric", "name": "embed", "scale": 1, "error": "ImportError"}]
+    monkeypatch.setattr(bench, "list_cases", lambda *a, **k: [])
+    monkeypatch.setattr(bench, "run_suite", lambda *a, **k: results)
+    path = tmp_path / "baseline.json"
+    assert bench.main(["--save-baseline", str(path)]) == 2
+    assert not os.path.exists(path)
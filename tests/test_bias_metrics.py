@@ -0,0 +1,87 @@
+# tests/test_bias_metrics.py
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from bias_metrics import (
+    chi_square_test,
+    compact_table,
+    distribution_kde,
+    intersection_key,
+    intersection_labels,
+    merge_distributions,
+    run_intersectional_analysis_categorical,
+    summarize_distribution,
+)
+
+
+@pytest.fixture
+def demo_df():
+    rng = np.random.default_rng(0)
+    n = 240
+    return pd.DataFrame({
+        "Gender": rng.choice(["Male", "Female"], n),
+        "Race": rng.choice(["Chinese", "Malay", "Indian"], n),
+        "Nationality": rng.choice(["Singaporean", "Malaysian"], n),
+        "decision": rng.choice(["Yes", "No"], n),
+    })
+
+
+def test_intersection_key_round_trips_labels(demo_df):
+    key, levels = intersection_key(demo_df, ["Nationality", "Race", "Gender"])
+    labels = intersection_labels(key.values, levels)
+    expected = demo_df["Nationality"] + "_" + demo_df["Race"] + "_" + demo_df["Gender"]
+    assert labels == expected.tolist()
+
+
+def test_intersection_key_marks_missing_rows(demo_df):
+    demo_df.loc[3, "Race"] = None
+    key, _ = intersection_key(demo_df, ["Gender", "Race"])
+    assert key[3] == -1
+    assert (key.drop(3) >= 0).all()
+
+
+def test_intersectional_analysis_does_not_mutate_input(demo_df):
+    before = demo_df.copy()
+    results = run_intersectional_analysis_categorical(demo_df, output_col="decision")
+    pd.testing.assert_frame_equal(demo_df, before)
+
+    # Matches the string-concatenation crosstab it replaces
+    ref = demo_df.assign(Gender_Race_Nat=demo_df["Nationality"] + "_" + demo_df["Race"] + "_" + demo_df["Gender"])
+    ct, chi2, p, dof = chi_square_test(ref, "Gender_Race_Nat", "decision")
+    pd.testing.assert_frame_equal(results["Gender_Race_Nat"]["ct"], ct)
+    assert results["Gender_Race_Nat"]["chi2"] == pytest.approx(chi2)
+
+
+def test_compact_table_keeps_most_deviating_rows_and_merges_rare_columns():
+    rng = np.random.default_rng(1)
+    counts = pd.DataFrame(rng.integers(1, 20, (60, 30)), index=[f"g{i}" for i in range(60)])
+    counts.iloc[7, 0] = 500  # one strongly deviating row
+    ct_pct = counts.div(counts.sum(axis=1), axis=0)
+
+    view = compact_table(ct_pct, max_rows=10, max_cols=8)
+    assert view.shape == (10, 8)
+    assert "g7" in view.index
+    assert view.columns[-1] == "other"
+    np.testing.assert_allclose(view.sum(axis=1), 1.0)
+    # Small tables pass through untouched
+    assert compact_table(view, max_rows=10, max_cols=8) is view
+
+
+def test_distribution_summaries_merge_and_smooth():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        "Gender": rng.choice(["Male", "Female"], 4000),
+        "sentiment_score": np.clip(rng.normal(0.2, 0.3, 4000), -1, 1),
+    })
+    whole = summarize_distribution(df, "Gender")
+    merged = merge_distributions(summarize_distribution(df.iloc[:1500], "Gender"),
+                                 summarize_distribution(df.iloc[1500:], "Gender"))
+    pd.testing.assert_frame_equal(merged["counts"], whole["counts"])
+
+    kde = distribution_kde(whole)
+    width = np.diff(whole["edges"])[0]
+    np.testing.assert_allclose(kde.sum(axis=1) * width, 1.0, atol=0.02)
+    ref = stats.gaussian_kde(df.loc[df["Gender"] == "Male", "sentiment_score"])(kde.columns.values)
+    np.testing.assert_allclose(kde.loc["Male"].values, ref, atol=0.05)
@@ -0,0 +1,102 @@
+# tests/test_bundle.py
+import numpy as np
+import pandas as pd
+
+import bundle
+
+
+def _write_d3_csv(path, n=120, seed=3):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Gender": rng.choice(["Male", "Female"], n),
+        "Race": rng.choice(["Chinese", "Malay", "Indian"], n),
+        "Nationality": rng.choice(["Singaporean", "Malaysian"], n),
+        "prompt_text": "p",
+        "llm_output": rng.choice(["Polite.", "rude"], n),
+        "model": "model-a",
+    })
+    df["prompt_id_full"] = "D3-" + df["Nationality"] + "-" + df["Race"] + "-" + df["Gender"] + "-X-1"
+    df.to_csv(path, index=False)
+
+
+def test_bundle_serves_until_input_or_code_changes(tmp_path, monkeypatch):
+    data = tmp_path / "demo.csv"
+    out = tmp_path / "bundle"
+    _write_d3_csv(data)
+
+    manifest = bundle.build_bundle(str(data), str(out))
+    assert manifest["groups"]["D3"]["file"] == "D3.pkl"
+    outputs = bundle.load_bundled(str(data), "D3", str(out))
+    assert outputs is not None and not outputs["is_continuous"]
+
+    # Processor code changed -> stale
+    monkeypatch.setattr(bundle, "code_hash", lambda domain: "changed")
+    assert bundle.load_bundled(str(data), "D3", str(out)) is None
+    monkeypatch.undo()
+
+    # Input changed -> stale
+    _write_d3_csv(data, seed=4)
+    assert bundle.bundled_groups(str(data), str(out)) == []
+
+
+def test_bundle_goes_stale_when_the_ground_truth_changes(tmp_path, monkeypatch):
+    data = tmp_path / "demo.csv"
+    out = tmp_path / "bundle"
+    _write_d3_csv(data)
+    table = {"gt": pd.DataFrame({"occupation": ["Nurse"], "female_share": [0.9]})}
+    monkeypatch.setattr(bundle, "GROUND_TRUTH", {"D3": "occupation"})
+    monkeypatch.setattr(bundle.ground_truth, "get", lambda kind: table["gt"])
+    monkeypatch.setattr(bundle.ground_truth, "status", lambda kind: {"fetched_at": 1.7e9})
+
+    entry = bundle.build_bundle(str(data), str(out))["groups"]["D3"]
+    assert entry["ground_truth_fetched_at"] == 1.7e9
+    assert bundle.bundled_groups(str(data), str(out)) == ["D3"]
+
+    table["gt"] = pd.DataFrame({"occupation": ["Nurse"], "female_share": [0.8]})
+    assert bundle.bundled_groups(str(data), str(out)) == []
+    table["gt"] = None
+    assert bundle.bundled_groups(str(data), str(out)) == []
+
+
+def test_bundle_refuses_runs_downgraded_by_the_memory_budget(tmp_path, monkeypatch):
+    data = tmp_path / "demo.csv"
+    out = tmp_path / "bundle"
+    _write_d3_csv(data)
+    run = bundle.run_processor
+
+    def sampled(domain, df):
+        outputs = run(domain, df)
+        outputs["execution"]["mode"] = "sampled"
+        return outputs
+
+    monkeypatch.setattr(bundle, "run_processor", sampled)
+    manifest = bundle.build_bundle(str(data), str(out))
+    assert "only full runs" in manifest["groups"]["D3"]["error"]
+    assert not (out / "D3.pkl").exists()
+    assert bundle.bundled_groups(str(data), str(out)) == []
+
+
+def test_live_runs_fill_the_bundle_group_by_group(tmp_path, monkeypatch):
+    data = tmp_path / "demo.csv"
+    out = tmp_path / "bundle"
+    _write_d3_csv(data)
+    from batch import load_responses
+    outputs = bundle.run_processor("D3", load_responses(str(data)))
+
+    assert bundle.load_bundled(str(data), "D3", str(out)) is None
+    assert bundle.save_outputs(str(data), "D3", outputs, str(out))
+    assert bundle.bundled_groups(str(data), str(out)) == ["D3"]
+    served = bundle.load_bundled(str(data), "D3", str(out))
+    pd.testing.assert_frame_equal(served["demographic"]["Gender"]["ct"], outputs["demographic"]["Gender"]["ct"])
+
+    # the valid set passed in is trusted, so the hashes are not checked again
+    monkeypatch.setattr(bundle, "bundled_groups", lambda *a: [])
+    assert bundle.load_bundled(str(data), "D3", str(out), valid=["D3"]) is not None
+    assert bundle.load_bundled(str(data), "D3", str(out)) is None
+    monkeypatch.undo()
+
+    # a new input starts a new bundle; sampled runs are not saved
+    _write_d3_csv(data, seed=4)
+    outputs["execution"]["mode"] = "sampled"
+    assert not bundle.save_outputs(str(data), "D3", outputs, str(out))
+    assert bundle.bundled_groups(str(data), str(out)) == []
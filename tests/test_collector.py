@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+import collector
+
+
+@pytest.fixture
+def llm_stub(monkeypatch):
+    """
+    A local OpenAI-compatible /v1/chat/completions endpoint answering
+    "<model>: <prompt>". `calls` lists (model, prompt) per request, `peak` the
+    most requests in flight per model, `fail` maps a prompt to the statuses
+    returned before it succeeds, and `delay_s` slows every answer.
+    """
+    state = {"calls": [], "inflight": {}, "peak": {}, "fail": {}, "delay_s": 0.0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            model, prompt = body["model"], body["messages"][0]["content"]
+            with lock:
+                state["calls"].append((model, prompt))
+                state["inflight"][model] = state["inflight"].get(model, 0) + 1
+                state["peak"][model] = max(state["peak"].get(model, 0), state["inflight"][model])
+                pending = state["fail"].get(prompt)
+                status = pending.pop(0) if pending else 200
+            time.sleep(state["delay_s"])
+            with lock:
+                state["inflight"][model] -= 1
+            if status != 200:
+                self.send_response(status)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+                return
+            reply = {"choices": [{"message": {"role": "assistant", "content": f"{model}: {prompt}"}}],
+                     "usage": {"total_tokens": 10}}
+            data = json.dumps(reply).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(collector, "BACKOFF_S", 0.01)
+    yield state
+    server.shutdown()
+
+
+def _prompts(n):
+    return pd.DataFrame({
+        "Gender": ["Female", "Male"] * (n // 2) + ["Female"] * (n % 2),
+        "prompt_text": [f"prompt {i}" for i in range(n)],
+        "prompt_id_full": [f"D1-{i}" for i in range(n)],
+    })
+
+
+def test_collects_every_prompt_for_every_model_within_the_concurrency_limit(llm_stub):
+    llm_stub["delay_s"] = 0.05
+    limits = {"a": {"concurrency": 2}, "b": {"concurrency": 4}}
+    df = collector.collect(_prompts(12), ["a", "b"], limits=limits)
+
+    assert list(df.columns) == ["Gender", "prompt_text", "prompt_id_full", "model", "llm_output"]
+    assert df["model"].tolist() == ["a"] * 12 + ["b"] * 12
+    assert (df["llm_output"] == df["model"] + ": " + df["prompt_text"]).all()
+    assert llm_stub["peak"]["a"] <= 2 and llm_stub["peak"]["b"] <= 4
+    # the models run side by side, not one after the other
+    assert llm_stub["peak"]["b"] > 1
+
+
+def test_transient_errors_are_retried(llm_stub):
+    llm_stub["fail"] = {"prompt 0": [429, 503], "prompt 1": [400]}
+    df = collector.collect(_prompts(3), ["a"])
+
+    assert df.loc[0, "llm_output"] == "a: prompt 0"
+    assert pd.isna(df.loc[1, "llm_output"])
+    assert llm_stub["calls"].count(("a", "prompt 0")) == 3
+    assert llm_stub["calls"].count(("a", "prompt 1")) == 1
+
+
+def test_resumes_from_the_checkpoint(llm_stub, tmp_path):
+    checkpoint = str(tmp_path / "run.jsonl")
+    llm_stub["fail"] = {"prompt 2": [400]}
+    first = collector.collect(_prompts(4), ["a"], checkpoint=checkpoint)
+    assert first["llm_output"].isna().sum() == 1
+    # a run killed mid-write leaves a torn line behind
+    with open(checkpoint, "a") as f:
+        f.write('{"model": "a", "prompt_id_full": "D1-3", "llm')
+
+    llm_stub["calls"].clear()
+    df = collector.collect(_prompts(6), ["a"], checkpoint=checkpoint)
+
+    assert sorted(llm_stub["calls"]) == [("a", "prompt 2"), ("a", "prompt 4"), ("a", "prompt 5")]
+    assert df["llm_output"].notna().all()
+    assert len(collector.load_checkpoint(checkpoint)) == 6
+
+
+def test_rate_limiter_spaces_requests_and_charges_actual_tokens(monkeypatch):
+    now = [0.0]
+    clock = lambda: now[0]
+    limiter = collector.RateLimiter(rpm=60, tpm=600, clock=clock)
+
+    async def sleep(seconds):
+        now[0] += seconds
+
+    async def run():
+        monkeypatch.setattr(collector.asyncio, "sleep", sleep)
+        for _ in range(3):
+            await limiter.acquire(5)
+        monkeypatch.undo()
+
+    asyncio.run(run())
+    # one request a second, the first one immediately
+    assert now[0] == pytest.approx(2.0)
+    # 5 left, 20 more than estimated: 15 in debt, 25 short of 10 at 10 tokens a second
+    limiter.settle(5, 25)
+    assert limiter.tokens.delay(10) == pytest.approx(2.5)
+
+
+def test_cache_limits_a_larger_benchmark_to_the_new_combinations(llm_stub, tmp_path):
+    cache = str(tmp_path / "responses.sqlite")
+    runs = lambda n: pd.DataFrame({
+        "prompt_text": [f"prompt {i}" for i in range(2) for _ in range(n)],
+        "prompt_id_full": [f"D1-{i}-{r}" for i in range(2) for r in range(1, n + 1)],
+    })
+    collector.collect(runs(3), ["a"], cache=cache)
+    assert len(llm_stub["calls"]) == 6
+
+    llm_stub["calls"].clear()
+    df = collector.collect(runs(5), ["a", "b"], cache=cache)
+
+    # runs 4-5 for model a, everything for the new model b
+    assert llm_stub["calls"].count(("a", "prompt 0")) == 2
+    assert llm_stub["calls"].count(("b", "prompt 0")) == 5
+    assert len(llm_stub["calls"]) == 4 + 10
+    assert df["llm_output"].notna().all()
+
+    llm_stub["calls"].clear()
+    collector.collect(runs(5), ["a"], cache=cache, temperature=0)
+    assert len(llm_stub["calls"]) == 10
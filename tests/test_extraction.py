@@ -0,0 +1,66 @@
+# tests/test_extraction.py
+import re
+
+import numpy as np
+import pandas as pd
+
+import i1_processing
+import i2_processing
+from extraction import PhraseMatcher, split_first
+
+
+def _alternation(phrases, texts):
+    """What the processors did before: one IGNORECASE alternation, then lower/strip."""
+    pattern = "(" + "|".join(re.escape(p) for p in phrases) + ")"
+    return texts.str.extract(pattern, flags=re.IGNORECASE, expand=False).str.lower().str.strip()
+
+
+def test_ties_go_to_the_phrase_listed_first():
+    texts = pd.Series(["say FOOBAR", "foo", "a foobaz", "bar foo"])
+    # "foobar" starts with the earlier "foo", so it can never be extracted
+    assert list(PhraseMatcher(["foo", "foobar"]).extract(texts)["label"].fillna("-")) == ["foo", "foo", "foo", "foo"]
+    found = PhraseMatcher(["foobar", "foo", "bar"]).extract(texts)
+    assert list(found["label"]) == ["foobar", "foo", "foo", "bar"]
+    assert list(found["start"]) == [4, 0, 2, 0]
+
+
+def test_matches_the_alternation_regex_on_random_text():
+    rng = np.random.default_rng(0)
+    words = ["retail trade", "Wholesale Trade", "education", "EDUCATION x", "accommodation", "food & beverages services",
+             "professional services", "professionals", "Associate Professionals & Technicians", "others", "x", "\n", "."]
+    texts = pd.Series([" ".join(rng.choice(words, rng.integers(0, 5))) for _ in range(2000)] + [None, 3])
+    for matcher in (i1_processing.OCCUPATIONS, i2_processing.INDUSTRIES):
+        phrases = list(matcher.labels)
+        expected = _alternation(phrases, texts.where(texts.map(lambda t: isinstance(t, str))))
+        pd.testing.assert_series_equal(matcher.extract(texts)["label"], expected, check_names=False, check_dtype=False)
+
+
+def test_mapping_gives_canonical_labels_and_offsets():
+    matcher = PhraseMatcher({"F&B": "accommodation & food services", "hotel": "accommodation & food services", "bank": "finance"})
+    found = matcher.extract(pd.Series(["Works at a Hotel", "bank; f&b", "none", None]))
+    assert list(found["label"].fillna("-")) == ["accommodation & food services", "finance", "-", "-"]
+    assert list(found["start"]) == [11, 0, -1, -1]
+    assert matcher.match("my f&b job") == ("accommodation & food services", 3)
+
+
+def test_split_first_matches_search_and_sub():
+    texts = pd.Series(["Decision: Yes — because", "nobody said NO.", "éyes, no", "yes_ no", "ſo yes\n", "  No  ",
+                       "nothing", None, "Yes" * 3, "snow, yes"] * 3)
+    found = split_first(texts, ["yes", "no"])
+    pattern = r"(?i)\b(yes|no)\b"
+    for text, (word, start, end, rest) in zip(texts, found.itertuples(index=False)):
+        m = re.search(pattern, text) if isinstance(text, str) else None
+        word = None if pd.isna(word) else word
+        assert (word, start, end) == ((m.group(), m.start(), m.end()) if m else (None, -1, -1))
+        assert rest == re.sub(pattern, "", str(text), count=1).strip()
+
+
+def test_i3_decision_and_justification():
+    import i3_processing
+
+    df = pd.DataFrame({"prompt_id_full": "I3-Singaporean-Chinese-Male-X-1", "Gender": "Male", "Race": "Chinese",
+                       "llm_output": ["Yes. They earned it.", "I would say no — too risky", "Unsure."]})
+    i3 = i3_processing.prepare(df)
+    assert list(i3["decision"]) == ["Yes", "No", "Unknown"]
+    assert list(i3["justification"]) == [". They earned it.", "I would say  — too risky", "Unsure."]
+    assert list(i3["decision_start"]) == [0, 12, -1]
@@ -0,0 +1,191 @@
+# tests/test_ground_truth.py
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ground_truth
+
+OCCUPATIONS = {"Professionals": (300, 250), "Clerical Support Workers": (60, 140), "Service & Sales Workers": (90, 110)}
+
+
+def _records(sex, index):
+    """datastore_search records shaped like the SingStat occupation tables (two survey years)."""
+    rows = [{"DataSeries": f"All Occupation Groups, (Total Employed {sex} Residents)", "2022": "1", "2023": "1"}]
+    rows += [{"DataSeries": name, "2022": "0", "2023": str(counts[index])} for name, counts in OCCUPATIONS.items()]
+    rows.append({"DataSeries": f"Employed {sex} Residents Aged 15 - 19 Years", "2022": "5", "2023": "5"})
+    return rows
+
+
+@pytest.fixture
+def singstat_stub(monkeypatch, tmp_path):
+    """
+    A local stand-in for the data.gov.sg datastore API; `hits` lists the
+    resource ids requested and `delay_s` slows every answer.
+    """
+    spec = ground_truth.DATASETS["occupation"]
+    tables = {spec["male"]: _records("Male", 0), spec["female"]: _records("Female", 1)}
+    hits = []
+    delay_s = [0.0]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay_s[0])
+            resource = parse_qs(urlparse(self.path).query)["resource_id"][0]
+            hits.append(resource)
+            body = json.dumps({"result": {"records": tables[resource]}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("FAIRSEA_SINGSTAT_URL", f"http://127.0.0.1:{server.server_port}/datastore_search")
+    monkeypatch.setenv("FAIRSEA_GT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("FAIRSEA_OFFLINE", raising=False)
+    ground_truth.clear()
+    yield type("Stub", (), {"hits": hits, "server": server, "spec": spec, "delay_s": delay_s})
+    server.shutdown()
+    ground_truth.clear()
+
+
+def test_fetches_both_sexes_and_parses_the_latest_year(singstat_stub):
+    gt = ground_truth.get("occupation")
+    assert sorted(singstat_stub.hits) == sorted([singstat_stub.spec["male"], singstat_stub.spec["female"]])
+    row = gt.set_index("occupation").loc["clerical support workers"]
+    assert (row["male"], row["female"]) == (60, 140)
+    assert row["female_share"] == pytest.approx(0.7)
+    assert ground_truth.status("occupation")["source"] == "api"
+
+
+def test_disk_cache_serves_until_the_ttl_expires(singstat_stub, monkeypatch):
+    ground_truth.get("occupation")
+    ground_truth.clear()
+    cached = ground_truth.get("occupation")
+    assert len(singstat_stub.hits) == 2 and ground_truth.status("occupation")["source"] == "cache"
+    assert np.allclose(cached["real_diff"], ground_truth.fetch("occupation")["real_diff"])
+
+    monkeypatch.setenv("FAIRSEA_GT_TTL_HOURS", "0")
+    ground_truth.clear()
+    ground_truth.get("occupation")
+    assert ground_truth.status("occupation")["source"] == "api"
+
+
+def test_stale_cache_when_the_api_is_down(singstat_stub, monkeypatch):
+    ground_truth.get("occupation")
+    singstat_stub.server.shutdown()
+    singstat_stub.server.server_close()
+    monkeypatch.setenv("FAIRSEA_GT_TTL_HOURS", "0")
+    ground_truth.clear()
+    assert ground_truth.get("occupation") is not None
+    status = ground_truth.status("occupation")
+    assert status["source"] == "stale cache" and "ConnectionError" in status["error"]
+
+
+def test_offline_mode_uses_the_cache_at_any_age_without_network(singstat_stub, monkeypatch):
+    fetched = ground_truth.get("occupation")
+    singstat_stub.hits.clear()
+    monkeypatch.setenv("FAIRSEA_OFFLINE", "1")
+    monkeypatch.setenv("FAIRSEA_GT_TTL_HOURS", "0")
+    ground_truth.clear()
+    offline = ground_truth.get("occupation")
+    assert singstat_stub.hits == []
+    assert ground_truth.status("occupation")["source"] == "cache"
+    pd.testing.assert_frame_equal(offline, fetched, check_dtype=False)
+
+
+def test_failure_is_not_retried_within_the_cool_down(singstat_stub, monkeypatch):
+    monkeypatch.setenv("FAIRSEA_OFFLINE", "1")
+    first = ground_truth.prefetch("occupation")
+    assert first.result() is None
+    assert ground_truth.prefetch("occupation") is first
+    assert ground_truth.status("occupation") == {"source": "unavailable", "fetched_at": None, "error": "offline"}
+
+
+def test_i1_compares_against_the_fetched_table(singstat_stub):
+    import i1_processing
+
+    rng = np.random.default_rng(0)
+    n = 120
+    df = pd.DataFrame({
+        "Gender": rng.choice(["Male", "Female"], n),
+        "Race": rng.choice(["Chinese", "Malay"], n),
+        "Nationality": "Singaporean",
+        "llm_output": rng.choice(["Professionals", "Clerical support workers", "Service & sales workers"], n),
+    })
+    df["prompt_id_full"] = "I1-" + df["Nationality"] + "-" + df["Race"] + "-" + df["Gender"] + "-X-1"
+    outputs = i1_processing.process_i1(df)
+    assert outputs["ground_truth_status"]["source"] == "api"
+    actual = outputs["comparison_female"].loc["GroundTruth"]
+    assert actual["clerical support workers"] == pytest.approx(0.7)
+
+
+def test_stratified_run_does_not_hang_on_a_fetch_in_flight_at_fork(singstat_stub):
+    # prepare() starts the fetch in the parent; the forked analyze() workers
+    # used to wait forever on the inherited, never-completed future
+    singstat_stub.delay_s[0] = 1.0
+    code = (
+        "import pandas as pd\n"
+        "from runner import run_stratified\n"
+        "df = pd.DataFrame({'Gender': ['Male', 'Female'] * 4, 'Race': 'Chinese', 'Nationality': 'Singaporean',\n"
+        "                   'prompt_id_full': [f'I1-x-{i}' for i in range(8)], 'model': ['a'] * 4 + ['b'] * 4,\n"
+        "                   'llm_output': ['Teacher, Professionals', 'Clerk, Clerical Support Workers'] * 4})\n"
+        "out = run_stratified(df, 'I1', by='model', max_workers=2)\n"
+        "print(all(o['comparison'] is not None for o in out['strata'].values()))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(os.path.join(root, d) for d in ("src", "streamlit")))
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "True"
+
+
+def test_unreadable_cache_is_a_miss_not_a_crash(singstat_stub, monkeypatch):
+    cache = os.environ["FAIRSEA_GT_CACHE_DIR"]
+    os.makedirs(cache, exist_ok=True)
+    with open(os.path.join(cache, "occupation.csv"), "w") as f:
+        f.write("")
+    with open(os.path.join(cache, "occupation.json"), "w") as f:
+        f.write("{}")
+    monkeypatch.setenv("FAIRSEA_OFFLINE", "1")
+    monkeypatch.setenv("FAIRSEA_GT_TTL_HOURS", "a week")
+    assert ground_truth.get("occupation") is None
+    ground_truth.wait()
+    status = ground_truth.status("occupation")
+    assert status["source"] == "unavailable" and "unreadable cache" in status["error"]
+
+    # online, the API replaces the truncated file
+    monkeypatch.delenv("FAIRSEA_OFFLINE")
+    ground_truth.clear()
+    assert ground_truth.get("occupation") is not None
+    assert ground_truth.status("occupation")["source"] == "api"
+    ground_truth.clear()
+    assert ground_truth.get("occupation") is not None
+    assert ground_truth.status("occupation")["source"] == "cache"
+
+
+def test_a_load_that_raised_is_retried(singstat_stub, monkeypatch):
+    load = ground_truth.load
+
+    def broken(kind):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(ground_truth, "load", broken)
+    first = ground_truth.prefetch("occupation")
+    with pytest.raises(RuntimeError):
+        first.result()
+    monkeypatch.setattr(ground_truth, "load", load)
+    assert ground_truth.prefetch("occupation") is not first
+    assert ground_truth.get("occupation") is not None
@@ -0,0 +1,49 @@
+# tests/test_imports.py
+import json
+import os
+import subprocess
+import sys
+
+STREAMLIT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit")
+
+# Modules the dashboard imports before the first page paints
+APP_MODULES = ["bias_metrics", "runner", "batch", "bundle", "render"]
+PROCESSORS = [f"{g}_processing" for g in ["d1", "d2", "d3", "d4", "i1", "i2", "i3", "i4"]]
+HEAVY = ["seaborn", "matplotlib", "scipy", "statsmodels", "sentence_transformers", "torch", "nltk", "altair"]
+
+# Import time of the app's own modules on top of pandas/numpy (which Streamlit loads
+# anyway), so the landing page renders well under a second.
+IMPORT_BUDGET_S = 1.0
+# Best of this many fresh interpreters, so one slow start on a busy machine does not fail
+IMPORT_RUNS = 3
+
+SCRIPT = """
+import json, sys, time
+import numpy, pandas
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _import_fresh(modules):
+    env = dict(os.environ, PYTHONPATH=STREAMLIT_DIR)
+    out = subprocess.run(
+        [sys.executable, "-c", SCRIPT.format(modules=modules, heavy=HEAVY)],
+        capture_output=True, text=True, check=True, env=env, cwd=STREAMLIT_DIR,
+    )
+    return json.loads(out.stdout)
+
+
+def test_app_modules_import_within_budget_without_heavy_libraries(record_property):
+    runs = [_import_fresh(APP_MODULES) for _ in range(IMPORT_RUNS)]
+    best = min(r["elapsed"] for r in runs)
+    record_property("import_s", round(best, 3))
+    assert runs[0]["heavy"] == []
+    assert best < IMPORT_BUDGET_S, f"app modules took {best:.2f}s to import (best of {IMPORT_RUNS})"
+
+
+def test_processors_defer_heavy_libraries_until_they_run():
+    assert _import_fresh(PROCESSORS)["heavy"] == []
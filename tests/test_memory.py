@@ -0,0 +1,106 @@
+# tests/test_memory.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import memory
+import timing
+from runner import run_processor
+
+
+@pytest.fixture
+def d3_df():
+    rng = np.random.default_rng(2)
+    n = 6000
+    df = pd.DataFrame({
+        "Gender": rng.choice(["Male", "Female"], n),
+        "Race": rng.choice(["Chinese", "Malay", "Indian"], n),
+        "Nationality": rng.choice(["Singaporean", "Malaysian"], n),
+        "llm_output": rng.choice(["polite", "rude", "apologetic", "confident"], n),
+        "model": rng.choice(["model-a", "model-b"], n),
+    })
+    df["prompt_id_full"] = "D3-" + df["Nationality"] + "-" + df["Race"] + "-" + df["Gender"] + "-X-1"
+    return df
+
+
+def test_plan_downgrades_as_headroom_shrinks(d3_df, monkeypatch):
+    monkeypatch.setattr(memory, "rss_mb", lambda: 100.0)
+    rss = 100.0
+    size = memory.frame_mb(d3_df)
+    assert memory.plan(d3_df, budget=rss + 100 * size)["mode"] == "full"
+    chunked = memory.plan(d3_df, budget=rss + 3.5 * size)
+    assert chunked["mode"] == "chunked"
+    assert chunked["analyze_mb"] <= 3.5 * size
+    # prepare would fit in chunks, but analyze on all prepared rows would not
+    sampled = memory.plan(d3_df, budget=rss + 2 * size)
+    assert sampled["mode"] == "sampled"
+    assert sampled["analyze_mb"] <= 2 * size
+    assert memory.MIN_SAMPLE_ROWS / len(d3_df) <= sampled["fraction"] < 1
+
+
+def test_stratified_sample_keeps_every_stratum(d3_df):
+    rows = np.arange(0, len(d3_df), 2)
+    sample = memory.stratified_sample(d3_df, rows, 0.01)
+    assert set(sample) <= set(rows) and np.all(np.diff(sample) > 0)
+    cells = d3_df.iloc[rows].groupby(memory.STRATA).ngroups
+    assert d3_df.iloc[sample].groupby(memory.STRATA).ngroups == cells
+
+
+def test_chunked_run_matches_full_run(d3_df, monkeypatch):
+    full = run_processor("D3", d3_df, budget=1e9)
+    monkeypatch.setattr(memory, "MIN_CHUNK_ROWS", 500)
+    monkeypatch.setattr(memory, "rss_mb", lambda: 100.0)
+    budget = 100.0 + 3.5 * memory.frame_mb(d3_df)
+    chunked = run_processor("D3", d3_df, budget=budget)
+    assert chunked["execution"]["mode"] == "chunked"
+    assert 0 < chunked["execution"]["prepared_mb"] <= chunked["execution"]["analyze_mb"]
+    for demo in ("Gender", "Race", "Nationality"):
+        assert chunked["demographic"][demo]["chi2"] == pytest.approx(full["demographic"][demo]["chi2"])
+    pd.testing.assert_frame_equal(chunked["intersectional"]["Gender_Race_Nat"]["ct_pct"],
+                                  full["intersectional"]["Gender_Race_Nat"]["ct_pct"])
+
+
+def test_spans_record_python_peaks_while_tracing():
+    memory.start_tracing()
+    try:
+        with timing.trace("root") as root:
+            with timing.span("alloc"):
+                block = bytearray(8 * 2**20)
+                del block
+            with timing.span("small"):
+                pass
+    finally:
+        import tracemalloc
+        tracemalloc.stop()
+    recs = {r["name"]: r for r in timing.records(root)}
+    assert recs["alloc"]["py_peak_mb"] >= 8
+    assert recs["small"]["py_peak_mb"] < 1
+    # the parent's peak covers its children's
+    assert recs["root"]["py_peak_mb"] >= recs["alloc"]["py_peak_mb"]
+    assert recs["root"]["rss_mb"] is not None
+
+
+def test_spans_record_their_own_rss_peak():
+    if not memory.reset_peak_rss():
+        pytest.skip("the RSS high-water mark cannot be reset on this platform")
+    with timing.trace("root") as root:
+        with timing.span("alloc"):
+            block = b"\x01" * (64 * 2**20)
+            del block
+        with timing.span("small"):
+            pass
+    recs = {r["name"]: r for r in timing.records(root)}
+    assert recs["alloc"]["rss_peak_mb"] - recs["alloc"]["rss_mb"] >= 48
+    # a later span is not charged with the earlier one's peak
+    assert recs["small"]["rss_peak_mb"] < recs["alloc"]["rss_peak_mb"] - 48
+    assert recs["root"]["rss_peak_mb"] >= recs["alloc"]["rss_peak_mb"]
+
+
+def test_execution_reports_the_runs_peak_not_the_lifetime_peak(d3_df):
+    if not memory.reset_peak_rss():
+        pytest.skip("the RSS high-water mark cannot be reset on this platform")
+    block = b"\x01" * (256 * 2**20)
+    del block
+    lifetime = memory.peak_rss_mb()
+    peak = run_processor("D3", d3_df)["execution"]["peak_rss_mb"]
+    assert peak < lifetime - 128
@@ -0,0 +1,56 @@
+# tests/test_outcomes.py
+import numpy as np
+import pandas as pd
+
+import d3_processing
+from outcomes import canonical, top_k
+
+
+def test_canonical_normalizes_and_maps_synonyms():
+    raw = pd.Series(['"Rude"', "rude.", "  RUDE! ", "Impolite", "Polite", None, "..."])
+    labels = canonical(raw, {"impolite": "rude"})
+    assert list(labels[:5]) == ["rude", "rude", "rude", "rude", "polite"]
+    assert labels[5:].isna().all()
+
+
+def test_top_k_folds_the_long_tail_into_other():
+    labels = pd.Series(["a"] * 5 + ["b"] * 4 + ["c"] * 3 + ["d", "e", "other"])
+    outcome, summary = top_k(labels, max_outcomes=3)
+    assert set(outcome) == {"a", "b", "other"}
+    assert (outcome == "other").sum() == 6
+    assert list(summary["label"][:2]) == ["a", "b"] and summary["count"].sum() == len(labels)
+    # nothing to fold
+    same, _ = top_k(labels, max_outcomes=10)
+    assert same.equals(labels)
+
+
+def test_d3_tables_stay_compact():
+    rng = np.random.default_rng(1)
+    n = 3000
+    df = pd.DataFrame({
+        "Gender": rng.choice(["Male", "Female"], n),
+        "Race": rng.choice(["Chinese", "Malay"], n),
+        "Nationality": rng.choice(["Singaporean", "Filipino"], n),
+        "llm_output": rng.choice(["Rude", "polite.", '"Apologetic"', "Incompetent"], n),
+    })
+    # a tail of one-off phrasings
+    df.loc[::10, "llm_output"] = [f"hard to say ({i})" for i in range(len(df.loc[::10]))]
+    df["prompt_id_full"] = "D3-" + df["Nationality"] + "-" + df["Race"] + "-" + df["Gender"] + "-X-1"
+    outputs = d3_processing.process_d3(df)
+    ct = outputs["demographic"]["Gender"]["ct"]
+    assert ct.shape[1] <= 15 and {"rude", "polite", "apologetic", "incompetent", "other"} <= set(ct.columns)
+    assert outputs["outcomes"]["count"].sum() == n
+
+
+def test_top_k_keeps_labels_chosen_elsewhere():
+    labels = pd.Series(["a"] * 5 + ["b"] * 4 + ["c"])
+    outcome, summary = top_k(labels, max_outcomes=2, keep=["b", "c"])
+    assert list(outcome) == ["other"] * 5 + ["b"] * 4 + ["c"]
+    assert dict(zip(summary["label"], summary["bucket"])) == {"a": "other", "b": "b", "c": "c"}
+
+
+def test_synonyms_only_merge_forms_of_the_offered_answers():
+    answers = {"rude", "polite", "incompetent", "apologetic"}
+    assert set(d3_processing.SYNONYMS.values()) <= answers
+    labels = canonical(pd.Series(["Rudely.", "arrogant", "impolite"]), d3_processing.SYNONYMS)
+    assert list(labels) == ["rude", "arrogant", "impolite"]
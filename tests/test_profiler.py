@@ -0,0 +1,41 @@
+# tests/test_profiler.py
+import json
+import time
+
+from profiler import Profiler
+
+
+def busy_leaf(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(200))
+
+
+def busy_parent():
+    busy_leaf(0.15)
+
+
+def test_samples_cover_the_run_and_find_the_hot_function():
+    with Profiler(name="test", interval=0.002) as prof:
+        busy_parent()
+    assert prof.samples
+    assert abs(sum(prof.weights) - prof.wall_s) < 0.05
+    top = prof.top(5)
+    assert "busy_leaf" in set(top["function"])
+    parent = top.set_index("function")
+    assert prof.top(50).set_index("function").loc["busy_parent", "total_s"] >= parent.loc["busy_leaf", "total_s"] * 0.9
+    # the test function itself called the profiler, so it is not part of any sample
+    assert all(prof.frames[s[0]][0] != "test_samples_cover_the_run_and_find_the_hot_function" for s in prof.samples)
+
+
+def test_speedscope_and_folded_files(tmp_path):
+    with Profiler(name="run", interval=0.002) as prof:
+        busy_parent()
+    speedscope_path, folded_path = prof.write(str(tmp_path), prefix="D3.")
+    doc = json.loads(open(speedscope_path).read())
+    (profile,) = doc["profiles"]
+    assert profile["type"] == "sampled" and len(profile["samples"]) == len(profile["weights"])
+    assert max(i for s in profile["samples"] for i in s) < len(doc["shared"]["frames"])
+    lines = open(folded_path).read().splitlines()
+    assert any(line.startswith("busy_parent (test_profiler.py") and "busy_leaf" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
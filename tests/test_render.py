@@ -0,0 +1,36 @@
+# tests/test_render.py
+import numpy as np
+import pandas as pd
+
+import render
+
+
+def _table(seed):
+    rng = np.random.default_rng(seed)
+    ct = pd.DataFrame(rng.random((3, 4)), index=["A", "B", "C"], columns=list("wxyz"))
+    return ct.div(ct.sum(axis=1), axis=0)
+
+
+def test_heatmap_png_is_cached_by_content():
+    first = render.heatmap_png(_table(0), title="t")
+    assert first.startswith(b"\x89PNG")
+    # An equal table built separately is served from the cache
+    assert render.heatmap_png(_table(0), title="t") is first
+    assert render.heatmap_png(_table(1), title="t") is not first
+
+
+def test_heatmap_pngs_renders_in_order():
+    tables = [(_table(i), f"t{i}") for i in range(3)]
+    pngs = render.heatmap_pngs(tables)
+    assert pngs == [render.heatmap_png(t, title=title) for t, title in tables]
+
+
+def test_heatmap_chart_carries_only_the_table():
+    ct = _table(0)
+    ct.index.name, ct.columns.name = "Gender", "decision"
+    spec = render.heatmap_chart(ct, title="t").to_dict()
+    (rows,) = spec["datasets"].values()
+    assert len(rows) == ct.size
+    assert set(rows[0]) == {"r", "c", "v"}
+    cell = rows[0]
+    assert cell["v"] == round(ct.iat[cell["r"], cell["c"]], 4)
@@ -0,0 +1,27 @@
+import pandas as pd
+
+from response_cache import ResponseCache, prompt_hash, run_indices
+
+
+def test_run_indices_prefer_run_id_then_the_id_suffix():
+    assert run_indices(pd.DataFrame({"prompt_id_full": ["D1-x-3", "I1-y-Tan_Wei_Jie-12", "D4"]})) == [3, 12, 1]
+    assert run_indices(pd.DataFrame({"prompt_id_full": ["D1-x-3"], "run_id": [5]})) == [5]
+
+
+def test_answers_are_keyed_by_model_prompt_sampling_parameters_and_run(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    with ResponseCache(path) as cache:
+        cache.put("a", "hello", 1, None, 1, "first")
+        cache.put("a", "hello", 1, None, 2, "second")
+        cache.put("a", "hello", 0.5, None, 1, "cooler")
+        cache.put("a", "hello", 1, 50, 1, "shorter")
+        cache.put("b", "hello", 1, None, 1, "other model")
+
+    # persisted across connections
+    with ResponseCache(path) as cache:
+        assert len(cache) == 5
+        sha = prompt_hash("hello")
+        assert cache.lookup("a", 1) == {(sha, 1): "first", (sha, 2): "second"}
+        assert cache.lookup("a", 0.5) == {(sha, 1): "cooler"}
+        assert cache.lookup("a", 1, max_tokens=50) == {(sha, 1): "shorter"}
+        assert cache.lookup("c", 1) == {}
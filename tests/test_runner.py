@@ -0,0 +1,52 @@
+# tests/test_runner.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from runner import run_stratified
+
+
+@pytest.fixture
+def d3_df():
+    rng = np.random.default_rng(1)
+    n = 300
+    df = pd.DataFrame({
+        "Gender": rng.choice(["Male", "Female"], n),
+        "Race": rng.choice(["Chinese", "Malay", "Indian"], n),
+        "Nationality": rng.choice(["Singaporean", "Malaysian"], n),
+        "llm_output": rng.choice(["polite", "rude", "apologetic"], n),
+        "model": rng.choice(["model-a", "model-b"], n),
+    })
+    df["prompt_id_full"] = "D3-" + df["Nationality"] + "-" + df["Race"] + "-" + df["Gender"] + "-X-1"
+    return df
+
+
+def test_run_stratified_matches_per_model_runs(d3_df):
+    res = run_stratified(d3_df, "D3", by="model", max_workers=2)
+    table = res["comparison"]
+    assert set(table["model"]) == {"model-a", "model-b"}
+    assert {"chi2", "p", "FDI", "JSD"} <= set(table.columns)
+
+    import d3_processing
+    direct = d3_processing.process_d3(d3_df[d3_df["model"] == "model-a"])
+    row = table[(table["model"] == "model-a") & (table["demographic"] == "Race")].iloc[0]
+    assert row["chi2"] == pytest.approx(direct["demographic"]["Race"]["chi2"])
+
+
+def test_run_stratified_chooses_top_outcomes_on_the_pooled_data(d3_df):
+    import d3_processing
+    from outcomes import MAX_OUTCOMES
+
+    df = d3_df.copy()
+    # each model has its own long tail, so top-k per model would keep different outcomes
+    tail = [f"{m} phrase {i % 20}" for i, m in enumerate(df["model"])]
+    df.loc[::2, "llm_output"] = tail[::2]
+    res = run_stratified(df, "D3", by="model", max_workers=2)
+
+    pooled = d3_processing.pool(d3_processing.prepare(df))["keep"]
+    columns = [set(out["demographic"]["Gender"]["ct"].columns) for out in res["strata"].values()]
+    for cols in columns:
+        assert cols <= set(pooled) | {"other"} and len(cols) <= MAX_OUTCOMES
+    for out in res["strata"].values():
+        buckets = dict(zip(out["outcomes"]["label"], out["outcomes"]["bucket"]))
+        assert all(bucket == "other" or label in pooled for label, bucket in buckets.items())
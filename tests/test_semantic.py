@@ -0,0 +1,43 @@
+# tests/test_semantic.py
+import numpy as np
+import pytest
+
+import semantic
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """An embedding model that records what it encodes; the vector of a text is [len(text), 1]."""
+    encoded = []
+
+    class Model:
+        def encode(self, texts, normalize_embeddings=True):
+            encoded.extend(texts)
+            return np.array([[len(t), 1.0] for t in texts])
+
+    monkeypatch.setattr(semantic, "get_embedding_model", lambda name=semantic.EMBEDDING_MODEL: Model())
+    monkeypatch.setattr(semantic, "_embedding_cache", semantic.OrderedDict())
+    return encoded
+
+
+def test_encode_caches_each_text_once(fake_model):
+    first = semantic.encode(["a", "bb", "a"])
+    second = semantic.encode(["bb", "ccc"])
+    assert fake_model == ["a", "bb", "ccc"]
+    assert first[:, 0].tolist() == [1, 2, 1]
+    assert second[:, 0].tolist() == [2, 3]
+
+
+def test_embedding_cache_keeps_only_the_most_recently_used(fake_model, monkeypatch):
+    monkeypatch.setattr(semantic, "EMBEDDING_CACHE_SIZE", 2)
+    semantic.encode(["a", "bb"])
+    semantic.encode(["a"])          # "bb" is now the least recently used
+    semantic.encode(["ccc"])
+    assert len(semantic._embedding_cache) == 2
+    fake_model.clear()
+    semantic.encode(["a", "ccc", "bb"])
+    assert fake_model == ["bb"]
+    # a batch larger than the cache is still returned whole
+    out = semantic.encode(["w", "xx", "yyy", "zzzz"])
+    assert out[:, 0].tolist() == [1, 2, 3, 4]
+    assert len(semantic._embedding_cache) == 2
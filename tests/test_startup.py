@@ -0,0 +1,23 @@
+# tests/test_startup.py
+import pytest
+
+import startup
+
+
+def test_step_records_only_the_first_run():
+    with startup.step("test: cold step"):
+        sum(range(10_000))
+    with startup.step("test: cold step"):
+        pass
+    steps = [s for s in startup.report()["steps"] if s["name"] == "test: cold step"]
+    assert len(steps) == 1
+    assert steps[0]["wall_s"] >= 0
+    assert set(steps[0]) >= {"kind", "start_s", "rss_mb", "rss_delta_mb"}
+
+
+def test_failed_step_is_recorded_with_its_error():
+    with pytest.raises(ValueError):
+        with startup.step("test: failing step"):
+            raise ValueError("boom")
+    (entry,) = [s for s in startup.report()["steps"] if s["name"] == "test: failing step"]
+    assert entry["error"] == "ValueError: boom"
@@ -0,0 +1,67 @@
+import os
+
+import pandas as pd
+
+import store
+from batch import load_responses
+
+
+def _rows(model, ids, output="ok"):
+    return pd.DataFrame({
+        "Gender": ["Female"] * len(ids),
+        "prompt_text": [f"text {i}" for i in ids],
+        "prompt_id_full": ids,
+        "llm_output": [output] * len(ids),
+        "model": [model] * len(ids),
+    })
+
+
+def _files(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root) for d, _, fs in os.walk(root) for f in fs)
+
+
+def test_append_partitions_by_model_and_group_and_never_rewrites(tmp_path):
+    root = str(tmp_path / "responses")
+    assert store.append(_rows("gpt-4o-mini", ["D1-a-1", "D2-a-1"]), root) == 2
+    first = {f: os.path.getmtime(os.path.join(root, f)) for f in _files(root)}
+    assert [f.split(os.sep)[:2] for f in first] == [["model=gpt-4o-mini", "group=D1"], ["model=gpt-4o-mini", "group=D2"]]
+
+    # a rerun repeats stored answers and failures; only the new answers are written
+    again = pd.concat([_rows("gpt-4o-mini", ["D1-a-1", "D2-a-2"]), _rows("gpt-4o-mini", ["D2-a-3"], output=None),
+                       _rows("org/model x", ["D2-a-1"])])
+    assert store.append(again, root) == 2
+    assert all(os.path.getmtime(os.path.join(root, f)) == t for f, t in first.items())
+    assert len(_files(root)) == 4
+
+    df = store.read(root)
+    assert sorted(zip(df["model"], df["prompt_id_full"])) == [
+        ("gpt-4o-mini", "D1-a-1"), ("gpt-4o-mini", "D2-a-1"), ("gpt-4o-mini", "D2-a-2"), ("org/model x", "D2-a-1")]
+    assert list(df.columns) == ["Gender", "prompt_text", "prompt_id_full", "llm_output", "model"]
+
+
+def test_read_touches_only_the_selected_partitions(tmp_path):
+    root = str(tmp_path / "responses")
+    store.append(pd.concat([_rows(m, ["D1-a-1", "D2-a-1", "I3-b-1"]) for m in ["gpt-4o-mini", "gpt-4.1-nano"]]), root)
+    # unreadable files everywhere except gpt-4o-mini / D2 would fail any read that opened them
+    for name in _files(root):
+        if not name.startswith(os.path.join("model=gpt-4o-mini", "group=D2")):
+            with open(os.path.join(root, name), "wb") as f:
+                f.write(b"not parquet")
+
+    d2 = store.read(root, models=["gpt-4o-mini"], groups=["d2"])
+    assert d2[["model", "prompt_id_full"]].values.tolist() == [["gpt-4o-mini", "D2-a-1"]]
+    assert len(load_responses(root, groups=["D2"], models=["gpt-4o-mini"])) == 1
+    assert store.read(root, models=["other"]).empty
+
+
+def test_version_changes_only_when_the_selected_partitions_gain_files(tmp_path):
+    root = str(tmp_path / "responses")
+    store.append(_rows("a", ["D1-x-1", "D2-x-1"]), root)
+    # directory mtimes can be coarse; make the next write visibly later
+    for _, _, directory in store.partitions(root):
+        os.utime(directory, ns=(0, 0))
+    d1, everything = store.version(root, groups=["D1"]), store.version(root)
+
+    store.append(_rows("a", ["D2-x-2"]), root)
+    assert store.version(root, groups=["D1"]) == d1
+    assert store.version(root) != everything
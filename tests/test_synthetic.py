@@ -0,0 +1,45 @@
+# tests/test_synthetic.py
+import os
+
+import pandas as pd
+import pytest
+
+from synthetic import COLUMNS, generate, load_profile, parse_bias, write
+
+DEMO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "consolidated_prompts.csv")
+
+
+@pytest.fixture(scope="module")
+def profile():
+    return load_profile(DEMO)
+
+
+def test_generate_matches_schema_and_id_format(profile):
+    chunks = list(generate(10_000, profile=profile, chunk_size=1_000))
+    assert all(len(c) <= 1_000 for c in chunks)
+    df = pd.concat(chunks, ignore_index=True)
+    assert len(df) == 10_000 and list(df.columns) == COLUMNS
+    assert not df.duplicated(["prompt_id_full", "model"]).any()
+
+    i_ids = df.loc[df["prompt_id_full"].str.startswith("I"), "prompt_id_full"].str.split("-")
+    assert (i_ids.str.len() == 6).all()
+    first = df[df["prompt_id_full"].str.startswith("I1")].iloc[0]
+    group, nationality, race, gender, name, run = first["prompt_id_full"].split("-")
+    assert (nationality, race, gender) == (first["Nationality"], first["Race"], first["Gender"])
+    assert run.isdigit()
+
+
+def test_bias_injection_shifts_the_target_group(profile):
+    bias = parse_bias(["D3:Gender=Female:Incompetent=4"])
+    df = pd.concat(generate(20_000, profile=profile, groups=["D3"], bias=bias), ignore_index=True)
+    hit = df["llm_output"].str.lower().str.startswith("incompetent")
+    share = hit.groupby(df["Gender"].str.lower()).mean()
+    assert share["female"] > 1.5 * share["male"]
+
+
+def test_write_streams_csv_and_parquet(profile, tmp_path):
+    for name in ["log.csv", "log.parquet"]:
+        path = tmp_path / name
+        assert write(str(path), 2_500, profile=profile, chunk_size=700) == 2_500
+        back = pd.read_parquet(path) if name.endswith(".parquet") else pd.read_csv(path)
+        assert list(back.columns) == COLUMNS and len(back) == 2_500
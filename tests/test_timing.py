@@ -0,0 +1,71 @@
+# tests/test_timing.py
+import contextvars
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import timing
+
+
+def test_spans_nest_and_records_are_depth_first():
+    with timing.trace("root", rows=3) as root:
+        with timing.span("a"):
+            with timing.span("a1", rows=2):
+                pass
+        with timing.span("b"):
+            pass
+    recs = timing.records(root)
+    assert [(r["path"], r["depth"]) for r in recs] == [("root", 0), ("root/a", 1), ("root/a/a1", 2), ("root/b", 1)]
+    assert recs[0]["rows"] == 3 and recs[2]["rows"] == 2
+    assert all(r["self_s"] <= r["wall_s"] for r in recs)
+
+
+def test_trace_is_detached_from_an_open_span():
+    with timing.trace("outer") as outer:
+        with timing.trace("inner") as inner:
+            pass
+    assert outer.children == []
+    assert inner.path == "inner"
+
+
+def test_timed_uses_the_function_name_and_row_count():
+    @timing.timed
+    def prepare(df):
+        return df
+
+    with timing.trace("root") as root:
+        prepare(pd.DataFrame({"x": range(5)}))
+    (child,) = root.children
+    assert (child.name, child.rows) == ("prepare", 5)
+
+
+def test_failed_span_records_the_error_and_logs_json(caplog):
+    with caplog.at_level(logging.INFO, logger="fairsea.timing"):
+        with pytest.raises(KeyError):
+            with timing.trace("root") as root:
+                with timing.span("lookup", group="D3"):
+                    raise KeyError("x")
+    assert root.children[0].error == "KeyError"
+    logged = [json.loads(r.getMessage()) for r in caplog.records if r.name == "fairsea.timing"]
+    assert {"span": "root/lookup", "group": "D3", "error": "KeyError"}.items() <= logged[0].items()
+
+
+def test_threads_with_a_copied_context_nest_under_the_caller():
+    def work(i):
+        with timing.span(f"task {i}"):
+            pass
+
+    with timing.trace("root") as root:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda i: contextvars.copy_context().run(work, i), range(3)))
+    # copy_context is taken in the worker here, so the tasks are roots of their own
+    assert root.children == []
+
+    with timing.trace("root") as root:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, work, i) for i in range(3)]
+            [f.result() for f in futures]
+    assert sorted(c.name for c in root.children) == ["task 0", "task 1", "task 2"]